@@ -0,0 +1,89 @@
+"""
+Operational commands for the authentication service.
+
+Commands:
+  - calibrate-hash: benchmark bcrypt on this host and pick the highest cost
+    whose verify time stays within the login latency budget
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="authentication.cli", description="Authentication service tooling")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_calibrate = subparsers.add_parser("calibrate-hash", help="Pick bcrypt rounds for a target verify time")
+    p_calibrate.add_argument("--target-ms", type=float, default=None, help="Verify time budget (defaults to PASSWORD_VERIFY_TARGET_MS)")
+    p_calibrate.add_argument("--min-rounds", type=int, default=10, help="Lowest cost considered")
+    p_calibrate.add_argument("--max-rounds", type=int, default=16, help="Highest cost considered")
+    p_calibrate.add_argument("--samples", type=int, default=5, help="Verifications timed per cost")
+    p_calibrate.add_argument("--env-file", default=None, help="Write PASSWORD_HASH_ROUNDS into this .env file")
+
+    return parser.parse_args(argv)
+
+
+def _measure_verify_ms(rounds: int, samples: int) -> float:
+    from passlib.hash import bcrypt
+
+    handler = bcrypt.using(rounds=rounds)
+    hashed = handler.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _write_env(path: str, rounds: int) -> None:
+    lines = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line for line in f.read().splitlines() if not line.startswith("PASSWORD_HASH_ROUNDS=")]
+    lines.append(f"PASSWORD_HASH_ROUNDS={rounds}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _cmd_calibrate_hash(target_ms: float, min_rounds: int, max_rounds: int, samples: int, env_file: str) -> None:
+    if target_ms is None:
+        from settings import settings
+        target_ms = settings.PASSWORD_VERIFY_TARGET_MS
+
+    chosen = None
+    print(f"Target verify time: {target_ms:.0f} ms")
+    for rounds in range(min_rounds, max_rounds + 1):
+        verify_ms = _measure_verify_ms(rounds, samples)
+        within = verify_ms <= target_ms
+        print(f"  rounds={rounds:<3} median verify={verify_ms:8.1f} ms {'ok' if within else 'over budget'}")
+        if not within:
+            break
+        chosen = rounds
+
+    if chosen is None:
+        chosen = min_rounds
+        print(f"Even rounds={min_rounds} exceeds the budget; using the minimum")
+
+    print(f"PASSWORD_HASH_ROUNDS={chosen}")
+    if env_file:
+        _write_env(env_file, chosen)
+        print(f"Wrote PASSWORD_HASH_ROUNDS={chosen} to {env_file}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    args = _parse_args(argv if argv is not None else sys.argv[1:])
+    if args.command == "calibrate-hash":
+        _cmd_calibrate_hash(args.target_ms, args.min_rounds, args.max_rounds, args.samples, args.env_file)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+from common.user_deletion_stream import StreamConfig, UserDeletionStreamConsumer
+from db.redis_client import redis_client
+from repositories.token_repository import TokenRepository
+from repositories.user_repository import UserRepository
+from settings import settings
+
+
+class UserDeletionConsumer(UserDeletionStreamConsumer):
+    """Ends every session and removes the credentials of users deleted in the user service"""
+
+    SERVICE = "authentication"
+
+    def __init__(self, redis, user_repo: UserRepository, token_repo: TokenRepository):
+        super().__init__(redis, user_deletion_stream_config())
+        self.user_repo = user_repo
+        self.token_repo = token_repo
+
+    def cleanup(self, user_id: str) -> int:
+        sessions = len(self.token_repo.get_sessions(user_id))
+        self.token_repo.revoke_refresh_token(user_id)
+        deleted = 1 if self.user_repo.delete_user(user_id) else 0
+        return sessions + deleted
+
+
+def user_deletion_stream_config() -> StreamConfig:
+    return StreamConfig(
+        stream=settings.USER_DELETED_STREAM,
+        dead_letter_stream=settings.USER_DELETED_DLQ_STREAM,
+        batch_size=settings.USER_DELETION_BATCH_SIZE,
+        claim_idle_ms=settings.USER_DELETION_CLAIM_IDLE_MS,
+        max_deliveries=settings.USER_DELETION_MAX_DELIVERIES
+    )
+
+
+def create_user_deletion_consumer() -> UserDeletionConsumer:
+    return UserDeletionConsumer(redis_client, UserRepository(), TokenRepository())
@@ -1,8 +1,22 @@
+from repositories.rate_limit_repository import RateLimitRepository
+from repositories.revocation_repository import RevocationRepository
 from repositories.token_repository import TokenRepository
 from repositories.user_repository import UserRepository
 from services.auth_service import AuthService
+from services.login_throttle_service import LoginThrottleService
+from services.revocation_service import RevocationService
+
+# One revocation service per process: it owns the in-memory bloom filter
+_revocation_service = None
+
+def get_revocation_service():
+    global _revocation_service
+    if _revocation_service is None:
+        _revocation_service = RevocationService(RevocationRepository())
+    return _revocation_service
 
 def get_auth_service():
     user_repo = UserRepository()
     token_repo = TokenRepository()
-    return AuthService(user_repo, token_repo)
+    login_throttle = LoginThrottleService(RateLimitRepository())
+    return AuthService(user_repo, token_repo, get_revocation_service(), login_throttle)
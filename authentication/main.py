@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.auth_routes import router as auth_router
+from factories.auth_factory import get_revocation_service
+from consumers.user_deletion_consumer import create_user_deletion_consumer
+from settings import settings
 
 # Create FastAPI app
 app = FastAPI(
@@ -21,6 +24,22 @@ app.add_middleware(
 # Include routes
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 
+@app.on_event("startup")
+def start_revocation_listener():
+    get_revocation_service().start_listener()
+
+@app.on_event("startup")
+def start_user_deletion_consumer():
+    if settings.USER_DELETION_CONSUMER_ENABLED:
+        app.state.user_deletion_consumer = create_user_deletion_consumer()
+        app.state.user_deletion_consumer.start()
+
+@app.on_event("shutdown")
+def stop_user_deletion_consumer():
+    consumer = getattr(app.state, "user_deletion_consumer", None)
+    if consumer:
+        consumer.stop()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,73 @@
+from db.redis_client import redis_client
+import logging
+import time
+from redis.exceptions import ConnectionError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Token buckets checked and debited together in one round trip. A request is
+# only allowed when every bucket holds `cost` tokens; otherwise nothing is
+# debited and the longest wait across the buckets is returned. With `force`
+# set the cost is debited regardless (used to penalise failed logins), and a
+# bucket may go negative down to -capacity.
+#
+# ARGV: now_ms, cost, force, then capacity and refill-per-second per key.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local force = tonumber(ARGV[3]) == 1
+local tokens = {}
+local wait_ms = 0
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i + 2])
+    local rate = tonumber(ARGV[2 * i + 3])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate / 1000)
+    tokens[i] = available
+    if available < cost then
+        wait_ms = math.max(wait_ms, math.ceil((cost - available) * 1000 / rate))
+    end
+end
+
+local allowed = wait_ms == 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i + 2])
+    local rate = tonumber(ARGV[2 * i + 3])
+    local available = tokens[i]
+    if allowed or force then
+        available = math.max(-capacity, available - cost)
+    end
+    redis.call('HSET', key, 'tokens', available, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(2 * capacity * 1000 / rate))
+end
+
+if allowed then
+    return {1, 0}
+end
+return {0, wait_ms}
+"""
+
+token_bucket_script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+class RateLimitRepository:
+    def consume(self, buckets: list, cost: int = 1, force: bool = False):
+        """Debit `cost` from every (key, capacity, refill_per_second) bucket.
+
+        Returns (allowed, retry_after_ms). Fails open when Redis is unreachable
+        so an outage does not lock everybody out.
+        """
+        keys = []
+        args = [int(time.time() * 1000), cost, 1 if force else 0]
+        for key, capacity, refill_per_second in buckets:
+            keys.append(key)
+            args.extend([capacity, refill_per_second])
+        try:
+            allowed, retry_after_ms = token_bucket_script(keys=keys, args=args)
+            return allowed == 1, int(retry_after_ms)
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when checking rate limit: {e}")
+            return True, 0
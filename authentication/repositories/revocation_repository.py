@@ -0,0 +1,96 @@
+from common.revocation_filter import REVOKED_INDEX_KEY, REVOKED_VERSION_KEY
+from db.redis_client import redis_client
+import logging
+import time
+from redis.exceptions import ConnectionError, TimeoutError
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+REBUILD_LOCK_KEY = "revoked:bloom:rebuild"
+
+
+def _revoked_key(jti: str) -> str:
+    return f"revoked:{jti}"
+
+
+class RevocationRepository:
+    def add_revoked(self, jti: str, expires_at: int):
+        """Record a revoked jti until the token would have expired anyway; returns the new version or None"""
+        now = int(time.time())
+        ttl = expires_at - now
+        if ttl <= 0:
+            return None
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.setex(_revoked_key(jti), ttl, 1)
+            pipe.zadd(REVOKED_INDEX_KEY, {jti: expires_at})
+            pipe.zremrangebyscore(REVOKED_INDEX_KEY, "-inf", now)
+            pipe.incr(REVOKED_VERSION_KEY)
+            return pipe.execute()[-1]
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when revoking token: {e}")
+            raise Exception("Unable to revoke token - Redis connection failed")
+
+    def get_active_revocations(self):
+        """Return (version, jtis) read atomically so the version describes exactly the set"""
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.get(REVOKED_VERSION_KEY)
+            pipe.zrangebyscore(REVOKED_INDEX_KEY, int(time.time()), "+inf")
+            version, jtis = pipe.execute()
+            return int(version or 0), jtis
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when reading revocations: {e}")
+            raise Exception("Unable to read revocations - Redis connection failed")
+
+    def get_version(self) -> int:
+        try:
+            return int(redis_client.get(REVOKED_VERSION_KEY) or 0)
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when reading revocation version: {e}")
+            raise Exception("Unable to read revocations - Redis connection failed")
+
+    def is_revoked(self, jti: str) -> bool:
+        try:
+            return redis_client.exists(_revoked_key(jti)) == 1
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when checking revocation: {e}")
+            return False
+
+    def publish_filter(self, message: str):
+        """Store the latest filter for late joiners and push it to live verifiers"""
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.set(settings.REVOCATION_SNAPSHOT_KEY, message)
+            pipe.publish(settings.REVOCATION_CHANNEL, message)
+            pipe.execute()
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when publishing revocation filter: {e}")
+
+    def publish_update(self, message: str):
+        """Push an incremental update to live verifiers; the snapshot is left as it is"""
+        try:
+            redis_client.publish(settings.REVOCATION_CHANNEL, message)
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when publishing revocation update: {e}")
+
+    def acquire_rebuild(self, interval: int) -> bool:
+        """True for one replica per interval, which then rebuilds the filter"""
+        try:
+            return bool(redis_client.set(REBUILD_LOCK_KEY, 1, nx=True, ex=interval))
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when scheduling revocation rebuild: {e}")
+            return False
+
+    def get_filter_snapshot(self):
+        try:
+            return redis_client.get(settings.REVOCATION_SNAPSHOT_KEY)
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when loading revocation filter: {e}")
+            return None
+
+    def subscribe(self):
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(settings.REVOCATION_CHANNEL)
+        return pubsub
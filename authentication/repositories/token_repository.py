@@ -1,36 +1,140 @@
 from db.redis_client import redis_client
+import hashlib
 import json
 import logging
+import time
 from redis.exceptions import ConnectionError, TimeoutError
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Each user has one hash of device sessions: field = session id, value = JSON
+# with the refresh token hash and its absolute expiry. Redis only expires whole
+# keys, so expired fields are pruned on every save and the key TTL is pushed
+# out to the longest-lived session.
+SAVE_SESSION_SCRIPT = """
+local now = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local max_sessions = tonumber(ARGV[5])
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+
+local fields = redis.call('HGETALL', KEYS[1])
+local live = {}
+for i = 1, #fields, 2 do
+    local session = cjson.decode(fields[i + 1])
+    if tonumber(session['exp']) <= now then
+        redis.call('HDEL', KEYS[1], fields[i])
+    else
+        table.insert(live, {fields[i], tonumber(session['created_at'])})
+    end
+end
+
+if #live > max_sessions then
+    table.sort(live, function(a, b) return a[2] < b[2] end)
+    for i = 1, #live - max_sessions do
+        redis.call('HDEL', KEYS[1], live[i][1])
+    end
+end
+
+if redis.call('TTL', KEYS[1]) < ttl then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return 1
+"""
+
+# Check-and-rotate in one round trip: the presented token must be the current
+# one for the session and not expired, otherwise nothing is written.
+ROTATE_SESSION_SCRIPT = """
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+if not raw then
+    return 0
+end
+local session = cjson.decode(raw)
+if session['token_hash'] ~= ARGV[2] then
+    return 0
+end
+if tonumber(session['exp']) <= tonumber(ARGV[4]) then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 0
+end
+local rotated = cjson.decode(ARGV[3])
+rotated['created_at'] = session['created_at']
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(rotated))
+if redis.call('TTL', KEYS[1]) < tonumber(ARGV[5]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+end
+return 1
+"""
+
+save_session_script = redis_client.register_script(SAVE_SESSION_SCRIPT)
+rotate_session_script = redis_client.register_script(ROTATE_SESSION_SCRIPT)
+
+
+def _sessions_key(user_id: str) -> str:
+    return f"refresh_sessions:{user_id}"
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 class TokenRepository:
-    def save_refresh_token(self, user_info: dict, token: str, expire: int = 60*60*24*7):
+    def _session_value(self, token: str, role: str, created_at: int, expire: int) -> str:
+        return json.dumps({
+            "token_hash": _token_hash(token),
+            "role": role,
+            "created_at": created_at,
+            "exp": created_at + expire
+        })
+
+    def save_refresh_token(self, user_info: dict, session_id: str, token: str, expire: int = None):
+        expire = expire or settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
         try:
-            key = f"refresh:{user_info['id']}"
-            value = json.dumps({
-                "token": token,
-                "role": user_info.get("role")
-            })
-            redis_client.setex(key, expire, value)
+            now = int(time.time())
+            value = self._session_value(token, user_info.get("role"), now, expire)
+            save_session_script(
+                keys=[_sessions_key(user_info["id"])],
+                args=[session_id, value, now, expire, settings.MAX_REFRESH_SESSIONS]
+            )
         except (ConnectionError, TimeoutError) as e:
             logger.error(f"Redis connection error when saving refresh token: {e}")
             raise Exception("Unable to save refresh token - Redis connection failed")
 
-    def get_refresh_token(self, user_id: str):
+    def rotate_refresh_token(self, user_id: str, session_id: str, old_token: str, new_token: str,
+                             role: str = None, expire: int = None) -> bool:
+        expire = expire or settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+        try:
+            now = int(time.time())
+            value = self._session_value(new_token, role, now, expire)
+            rotated = rotate_session_script(
+                keys=[_sessions_key(user_id)],
+                args=[session_id, _token_hash(old_token), value, now, expire]
+            )
+            return rotated == 1
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error when rotating refresh token: {e}")
+            raise Exception("Unable to rotate refresh token - Redis connection failed")
+
+    def get_sessions(self, user_id: str) -> dict:
         try:
-            data = redis_client.get(f"refresh:{user_id}")
-            if data:
-                return json.loads(data)
-            return None
+            sessions = redis_client.hgetall(_sessions_key(user_id))
+            now = int(time.time())
+            result = {}
+            for session_id, raw in sessions.items():
+                session = json.loads(raw)
+                if session["exp"] > now:
+                    session.pop("token_hash", None)
+                    result[session_id] = session
+            return result
         except (ConnectionError, TimeoutError) as e:
-            logger.error(f"Redis connection error when getting refresh token: {e}")
-            return None
+            logger.error(f"Redis connection error when getting refresh sessions: {e}")
+            return {}
 
-    def revoke_refresh_token(self, user_id: str):
+    def revoke_refresh_token(self, user_id: str, session_id: str = None):
         try:
-            redis_client.delete(f"refresh:{user_id}")
+            if session_id:
+                redis_client.hdel(_sessions_key(user_id), session_id)
+            else:
+                redis_client.delete(_sessions_key(user_id))
         except (ConnectionError, TimeoutError) as e:
             logger.error(f"Redis connection error when revoking refresh token: {e}")
-                    
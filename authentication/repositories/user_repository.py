@@ -1,3 +1,5 @@
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceNotFoundError
 from db.database import container
 import uuid
 from models.user_model import User
@@ -16,3 +18,27 @@ class UserRepository:
     def create_user(self, user: dict):
         container.create_item(body=user)
         return user.dict()
+
+    def delete_user(self, user_id: str):
+        try:
+            container.delete_item(item=user_id, partition_key=user_id)
+            return True
+        except CosmosResourceNotFoundError:
+            return False
+
+    def update_password_hash(self, user: dict, password_hash: str, password_params: dict):
+        """Swap the stored hash only if the user document is unchanged since it was read"""
+        try:
+            container.patch_item(
+                item=user["id"],
+                partition_key=user["id"],
+                patch_operations=[
+                    {"op": "set", "path": "/password", "value": password_hash},
+                    {"op": "set", "path": "/password_params", "value": password_params}
+                ],
+                etag=user.get("_etag"),
+                match_condition=MatchConditions.IfNotModified
+            )
+            return True
+        except CosmosHttpResponseError:
+            return False
@@ -1,17 +1,29 @@
 from math import log
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, Request, Response
 from schemas.user_schema import LoginRequest, BaseResponse, LoginWithGoogleRequest, TokenDecodeRequest, TokenRefreshRequest
 from factories.auth_factory import get_auth_service
+from services.login_throttle_service import RateLimitExceeded
 
 
 router = APIRouter()
 service = get_auth_service()
 
+def get_client_ip(request: Request):
+    # Kong forwards the original client as the first X-Forwarded-For entry
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else None
+
 @router.post("/login")
-def login(user: LoginRequest, app_id: str =  Header(None)):
+def login(user: LoginRequest, request: Request, response: Response, app_id: str =  Header(None)):
     try:
-        tokens = service.login(user.email, user.password, app_id)
+        tokens = service.login(user.email, user.password, app_id, get_client_ip(request))
         return BaseResponse(status_code=200, data=tokens, message="Login successful")
+    except RateLimitExceeded as e:
+        response.status_code = 429
+        response.headers["Retry-After"] = str(e.retry_after)
+        return BaseResponse(status_code=429, data={"retry_after": e.retry_after}, message=str(e))
     except Exception as e:
         return BaseResponse(status_code=401, message=str(e))
 
@@ -32,13 +44,27 @@ def refresh_token(request: TokenRefreshRequest, app_id: str =  Header(None)):
         return BaseResponse(status_code=401, message=str(e))
 
 @router.post("/logout")
-def logout(user_id: str):
+def logout(user_id: str, session_id: str = None, authorization: str = Header(None)):
     try:
-        result = service.logout(user_id)
+        access_token = authorization.replace("Bearer ", "") if authorization else None
+        result = service.logout(user_id, session_id, access_token)
         return BaseResponse(status_code=200, data=result, message="Logout successful")
     except Exception as e:
         return BaseResponse(status_code=400, message=str(e))
     
+@router.get("/sessions/{user_id}")
+def get_sessions(user_id: str, response: Response, authorization: str = Header(None)):
+    try:
+        access_token = authorization.replace("Bearer ", "") if authorization else None
+        sessions = service.get_sessions(user_id, access_token)
+        return BaseResponse(status_code=200, data=sessions, message="Sessions retrieved successfully")
+    except PermissionError as e:
+        response.status_code = 403
+        return BaseResponse(status_code=403, data={}, message=str(e))
+    except Exception as e:
+        response.status_code = 401
+        return BaseResponse(status_code=401, data={}, message=str(e))
+
 @router.post("/register")
 def register(user_data: dict, app_id: str = Header(None)):
     try:
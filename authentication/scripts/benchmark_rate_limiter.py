@@ -0,0 +1,83 @@
+"""
+Measure the overhead of the login throttle against the configured Redis.
+
+Compares a plain PING round trip with a full three-bucket check (IP, email,
+app) so the cost attributable to the Lua script is visible. Run from the
+authentication service directory:
+
+    python -m scripts.benchmark_rate_limiter --iterations 20000 --threads 8
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from db.redis_client import redis_client
+from repositories.rate_limit_repository import RateLimitRepository
+from services.login_throttle_service import LoginThrottleService, RateLimitExceeded
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _timed(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+
+def _report(name: str, samples: list, elapsed: float):
+    print(
+        f"{name:<22} n={len(samples):>7}  "
+        f"p50={_percentile(samples, 0.50):8.1f}us  "
+        f"p99={_percentile(samples, 0.99):8.1f}us  "
+        f"mean={statistics.mean(samples):8.1f}us  "
+        f"throughput={len(samples) / elapsed:10.0f}/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throttle overhead")
+    parser.add_argument("--iterations", type=int, default=10000, help="Checks per thread")
+    parser.add_argument("--threads", type=int, default=1, help="Concurrent callers")
+    args = parser.parse_args()
+
+    throttle = LoginThrottleService(RateLimitRepository())
+    run_id = uuid.uuid4().hex[:8]
+
+    def check(worker: int):
+        # Distinct keys per call so the buckets never run dry mid-benchmark
+        counter = {"n": 0}
+
+        def _check():
+            counter["n"] += 1
+            try:
+                throttle.check(
+                    ip=f"bench-{run_id}-{worker}-{counter['n']}",
+                    email=f"bench-{run_id}-{worker}-{counter['n']}@example.com",
+                    app_id=f"bench-{run_id}-{worker}-{counter['n']}"
+                )
+            except RateLimitExceeded:
+                pass
+        return _check
+
+    for name, factory in (("redis PING", lambda worker: redis_client.ping), ("throttle check", check)):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            futures = [pool.submit(_timed, factory(worker), args.iterations) for worker in range(args.threads)]
+            samples = [sample for future in futures for sample in future.result()]
+        _report(name, samples, time.perf_counter() - start)
+
+    for key in redis_client.scan_iter(f"ratelimit:login:*bench-{run_id}-*", count=1000):
+        redis_client.delete(key)
+
+
+if __name__ == "__main__":
+    main()
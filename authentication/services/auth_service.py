@@ -1,47 +1,98 @@
+import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from repositories.token_repository import TokenRepository
 from repositories.user_repository import UserRepository
+from services.login_throttle_service import LoginThrottleService
+from services.revocation_service import RevocationService
 from settings import settings
 import utils as auth_utils
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
+logger = logging.getLogger(__name__)
+
+# Rehashing costs a full bcrypt round, keep it off the login request path
+rehash_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="password-rehash")
+
 class AuthService:
-    def __init__(self, user_repo: UserRepository, token_repo: TokenRepository):
+    def __init__(self, user_repo: UserRepository, token_repo: TokenRepository,
+                 revocation_service: RevocationService, login_throttle: LoginThrottleService):
         self.user_repo = user_repo
         self.token_repo = token_repo
+        self.revocation_service = revocation_service
+        self.login_throttle = login_throttle
 
-    def login(self, email: str, password: str, app_id: str = None):
+    def login(self, email: str, password: str, app_id: str = None, client_ip: str = None):
+        # Throttle before the user lookup and bcrypt so floods cost one Redis call each
+        self.login_throttle.check(ip=client_ip, email=email, app_id=app_id)
         user = self.user_repo.get_user_by_email(email, app_id)
         if not user or not auth_utils.verify_password(password, user["password"]):
+            self.login_throttle.penalize(ip=client_ip, email=email)
             raise Exception("Invalid credentials")
+        if auth_utils.needs_rehash(user["password"]):
+            rehash_executor.submit(self._rehash_password, user, password)
         user_payload = {"id": user["id"], "role": user.get("role")}
-        payload = {"sub": user_payload, "app_id": app_id}
+        session_id = uuid.uuid4().hex
+        payload = {"sub": user_payload, "app_id": app_id, "sid": session_id}
         access_token = auth_utils.create_access_token(payload)
         refresh_token = auth_utils.create_refresh_token(payload)
-        self.token_repo.save_refresh_token(user, refresh_token)
-        return {"access_token": access_token, "refresh_token": refresh_token}
+        self.token_repo.save_refresh_token(user, session_id, refresh_token)
+        return {"access_token": access_token, "refresh_token": refresh_token, "session_id": session_id}
     
+    def _rehash_password(self, user: dict, password: str):
+        try:
+            if self.user_repo.update_password_hash(user, auth_utils.hash_password(password), auth_utils.hash_params()):
+                logger.info(f"Rehashed password for user {user['id']} with current parameters")
+        except Exception as e:
+            logger.error(f"Password rehash failed for user {user['id']}: {e}")
+
     def decode_token(self, token: str, app_id: str = None):
         payload = auth_utils.decode_token(token)
         if payload.get("app_id") != app_id:
             raise Exception("Token app_id mismatch")
+        if self.revocation_service.is_revoked(payload.get("jti")):
+            raise Exception("Token revoked")
         return payload
 
     def refresh(self, user_id: str, refresh_token: str, app_id: str = None):
-        user = self.user_repo.get_user_by_id(user_id, app_id)
-        stored = self.token_repo.get_refresh_token(user_id)
-        if not stored or stored["token"] != refresh_token:
-            raise Exception("Invalid refresh token")
+        # Everything needed to mint the new pair is carried in the refresh token
+        # itself, so the only lookup is the atomic check-and-rotate in Redis.
         payload = auth_utils.decode_token(refresh_token)
-        new_access_token = auth_utils.create_access_token(payload)
-        refresh_token = auth_utils.create_refresh_token(payload)
-        self.token_repo.save_refresh_token(user, refresh_token)
-        return {"access_token": new_access_token, "refresh_token": refresh_token}
+        user_payload = payload.get("sub") or {}
+        session_id = payload.get("sid")
+        if not session_id or user_payload.get("id") != user_id or payload.get("app_id") != app_id:
+            raise Exception("Invalid refresh token")
+        claims = {"sub": user_payload, "app_id": app_id, "sid": session_id}
+        new_access_token = auth_utils.create_access_token(claims)
+        new_refresh_token = auth_utils.create_refresh_token(claims)
+        rotated = self.token_repo.rotate_refresh_token(
+            user_id, session_id, refresh_token, new_refresh_token, role=user_payload.get("role")
+        )
+        if not rotated:
+            raise Exception("Invalid refresh token")
+        return {"access_token": new_access_token, "refresh_token": new_refresh_token, "session_id": session_id}
 
-    def logout(self, user_id: str):
-        self.token_repo.revoke_refresh_token(user_id)
+    def logout(self, user_id: str, session_id: str = None, access_token: str = None):
+        if access_token:
+            payload = auth_utils.decode_token(access_token)
+            if (payload.get("sub") or {}).get("id") != user_id:
+                raise Exception("Token does not belong to user")
+            self.revocation_service.revoke(payload)
+            session_id = session_id or payload.get("sid")
+        self.token_repo.revoke_refresh_token(user_id, session_id)
         return {"message": "Logged out successfully"}
+
+    def get_sessions(self, user_id: str, access_token: str):
+        """Sessions of a user, listed only for that user's own unrevoked access token"""
+        if not access_token:
+            raise Exception("Missing access token")
+        payload = auth_utils.decode_token(access_token)
+        if self.revocation_service.is_revoked(payload.get("jti")):
+            raise Exception("Token revoked")
+        if (payload.get("sub") or {}).get("id") != user_id:
+            raise PermissionError("Token does not belong to user")
+        return self.token_repo.get_sessions(user_id)
     
     def register(self, user_data: dict, app_id: str = None):
         existing_user = self.user_repo.get_user_by_email(user_data["email"], app_id)
@@ -49,6 +100,7 @@ class AuthService:
             raise Exception("User already exists")
         hashed_password = auth_utils.hash_password(user_data["password"])
         user_data["password"] = hashed_password
+        user_data["password_params"] = auth_utils.hash_params()
         user_data["role"] = "user"  # Default role
         user_data["id"] = str(uuid.uuid4())  
         user_data["app_id"] = app_id
@@ -0,0 +1,52 @@
+import math
+from repositories.rate_limit_repository import RateLimitRepository
+from settings import settings
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Too many login attempts, please retry later")
+        self.retry_after = retry_after
+
+
+class LoginThrottleService:
+    """Token buckets per client IP, per email and per app in front of password checks"""
+
+    def __init__(self, rate_limit_repo: RateLimitRepository):
+        self.rate_limit_repo = rate_limit_repo
+
+    def _buckets(self, ip: str = None, email: str = None, app_id: str = None):
+        buckets = []
+        if ip:
+            buckets.append((
+                f"ratelimit:login:ip:{ip}",
+                settings.LOGIN_RATE_IP_BURST,
+                settings.LOGIN_RATE_IP_PER_MINUTE / 60
+            ))
+        if email:
+            buckets.append((
+                f"ratelimit:login:email:{email.strip().lower()}",
+                settings.LOGIN_RATE_EMAIL_BURST,
+                settings.LOGIN_RATE_EMAIL_PER_MINUTE / 60
+            ))
+        if app_id:
+            buckets.append((
+                f"ratelimit:login:app:{app_id}",
+                settings.LOGIN_RATE_APP_BURST,
+                settings.LOGIN_RATE_APP_PER_MINUTE / 60
+            ))
+        return buckets
+
+    def check(self, ip: str = None, email: str = None, app_id: str = None):
+        buckets = self._buckets(ip, email, app_id)
+        if not buckets:
+            return
+        allowed, retry_after_ms = self.rate_limit_repo.consume(buckets)
+        if not allowed:
+            raise RateLimitExceeded(max(1, math.ceil(retry_after_ms / 1000)))
+
+    def penalize(self, ip: str = None, email: str = None):
+        """Failed attempts drain the IP and email buckets faster than successful ones"""
+        buckets = self._buckets(ip, email)
+        if buckets and settings.LOGIN_FAILURE_PENALTY > 0:
+            self.rate_limit_repo.consume(buckets, cost=settings.LOGIN_FAILURE_PENALTY, force=True)
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from common.revocation_filter import RevocationFilter, add_message, snapshot_version
+from repositories.revocation_repository import RevocationRepository
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationService:
+    """Writes revoked jtis to Redis and keeps an in-memory bloom filter of them.
+
+    Every process that verifies tokens runs the listener, so the per-request
+    check is a local bloom lookup; Redis is only consulted to confirm a hit.
+    A revocation is added to the filters incrementally; the whole filter is
+    rebuilt (dropping expired jtis) once per REVOCATION_REBUILD_INTERVAL by
+    one replica, or when a listener starts from an outdated snapshot.
+    """
+
+    def __init__(self, revocation_repo: RevocationRepository):
+        self.revocation_repo = revocation_repo
+        self.filter = RevocationFilter()
+        self._listener = None
+
+    def revoke(self, payload: dict):
+        jti = payload.get("jti")
+        expires_at = payload.get("exp")
+        if not jti or not expires_at:
+            return False
+        version = self.revocation_repo.add_revoked(jti, int(expires_at))
+        if version is None:
+            return False
+        self.filter.add(version, jti)
+        self.revocation_repo.publish_update(add_message(version, jti))
+        return True
+
+    def rebuild_and_publish(self):
+        version, jtis = self.revocation_repo.get_active_revocations()
+        bloom = self.filter.rebuild(
+            version, jtis, settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE
+        )
+        self.revocation_repo.publish_filter(bloom.to_message(version))
+
+    def is_revoked(self, jti: str) -> bool:
+        if not jti:
+            return False
+        if not self.filter.may_contain(jti):
+            return False
+        # Either a bloom hit (possibly a false positive) or no filter loaded yet
+        return self.revocation_repo.is_revoked(jti)
+
+    def start_listener(self):
+        if self._listener and self._listener.is_alive():
+            return
+        self._listener = threading.Thread(target=self._listen, name="revocation-listener", daemon=True)
+        self._listener.start()
+
+    def _load(self):
+        snapshot = self.revocation_repo.get_filter_snapshot()
+        if snapshot and snapshot_version(snapshot) >= self.revocation_repo.get_version():
+            self.filter.apply_message(snapshot)
+        else:
+            # Missing, or older than revocations made since; build a complete one
+            self.rebuild_and_publish()
+
+    def _listen(self):
+        while True:
+            try:
+                # Subscribe before loading the snapshot so no update is missed in between
+                pubsub = self.revocation_repo.subscribe()
+                self._load()
+                next_rebuild = time.monotonic() + settings.REVOCATION_REBUILD_INTERVAL
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.filter.apply_message(message["data"])
+                    if time.monotonic() >= next_rebuild:
+                        next_rebuild = time.monotonic() + settings.REVOCATION_REBUILD_INTERVAL
+                        if self.revocation_repo.acquire_rebuild(settings.REVOCATION_REBUILD_INTERVAL):
+                            self.rebuild_and_publish()
+            except Exception as e:
+                logger.error(f"Revocation listener error, resubscribing: {e}")
+                time.sleep(1)
@@ -23,6 +23,36 @@ class Settings(BaseSettings):
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Password hashing (run `python cli.py calibrate-hash` on production hardware)
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+    PASSWORD_VERIFY_TARGET_MS: int = int(os.getenv("PASSWORD_VERIFY_TARGET_MS", "250"))
+
+    MAX_REFRESH_SESSIONS: int = int(os.getenv("MAX_REFRESH_SESSIONS", "10"))
+
+    # Login throttling (token buckets: burst size and sustained refill per minute)
+    LOGIN_RATE_IP_BURST: int = int(os.getenv("LOGIN_RATE_IP_BURST", "20"))
+    LOGIN_RATE_IP_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_IP_PER_MINUTE", "10"))
+    LOGIN_RATE_EMAIL_BURST: int = int(os.getenv("LOGIN_RATE_EMAIL_BURST", "5"))
+    LOGIN_RATE_EMAIL_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_EMAIL_PER_MINUTE", "5"))
+    LOGIN_RATE_APP_BURST: int = int(os.getenv("LOGIN_RATE_APP_BURST", "1000"))
+    LOGIN_RATE_APP_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_APP_PER_MINUTE", "600"))
+    LOGIN_FAILURE_PENALTY: int = int(os.getenv("LOGIN_FAILURE_PENALTY", "2"))
+
+    # Access token revocation
+    REVOCATION_CHANNEL: str = os.getenv("REVOCATION_CHANNEL", "auth:revocations")
+    REVOCATION_SNAPSHOT_KEY: str = os.getenv("REVOCATION_SNAPSHOT_KEY", "revoked:bloom")
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    # Full rebuilds drop expired jtis; revocations in between are published incrementally
+    REVOCATION_REBUILD_INTERVAL: int = int(os.getenv("REVOCATION_REBUILD_INTERVAL", "300"))
+
+    # Cleanup of data owned by deleted users (events published by the user service)
+    USER_DELETED_STREAM: str = os.getenv("USER_DELETED_STREAM", "events:user-deleted")
+    USER_DELETED_DLQ_STREAM: str = os.getenv("USER_DELETED_DLQ_STREAM", "events:user-deleted:dead")
+    USER_DELETION_CONSUMER_ENABLED: bool = os.getenv("USER_DELETION_CONSUMER_ENABLED", "true").lower() == "true"
+    USER_DELETION_BATCH_SIZE: int = int(os.getenv("USER_DELETION_BATCH_SIZE", "100"))
+    USER_DELETION_CLAIM_IDLE_MS: int = int(os.getenv("USER_DELETION_CLAIM_IDLE_MS", "60000"))
+    USER_DELETION_MAX_DELIVERIES: int = int(os.getenv("USER_DELETION_MAX_DELIVERIES", "5"))
 
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
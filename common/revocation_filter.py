@@ -0,0 +1,129 @@
+"""Bloom filter of revoked access token ids, shared by the services that verify tokens.
+
+The authentication service owns the revocation list in Redis. Every
+revocation is published on the revocation channel as a small "add" message
+carrying the jti, which listeners add to their local filter. Full snapshots
+(which also drop expired jtis) are published only when the filter is
+rebuilt. Messages carry the revocation version, so a snapshot older than
+what a listener already applied is ignored.
+"""
+import base64
+import hashlib
+import json
+import logging
+import math
+import threading
+import zlib
+
+# Keys written by the authentication service
+REVOKED_INDEX_KEY = "revoked:index"
+REVOKED_VERSION_KEY = "revoked:version"
+
+SNAPSHOT = "snapshot"
+ADD = "add"
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over jti strings using double hashing"""
+
+    def __init__(self, size_bits: int, hash_count: int, bits: bytearray = None):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        size_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        hash_count = max(1, round(size_bits / capacity * math.log(2)))
+        return cls(size_bits, hash_count)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.hash_count)]
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def to_message(self, version: int) -> str:
+        return json.dumps({
+            "type": SNAPSHOT,
+            "version": version,
+            "size_bits": self.size_bits,
+            "hash_count": self.hash_count,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits))).decode("ascii")
+        })
+
+    @classmethod
+    def from_data(cls, data: dict):
+        bits = bytearray(zlib.decompress(base64.b64decode(data["bits"])))
+        return cls(data["size_bits"], data["hash_count"], bits)
+
+
+def add_message(version: int, jti: str) -> str:
+    return json.dumps({"type": ADD, "version": version, "jti": jti})
+
+
+def snapshot_version(message: str) -> int:
+    return json.loads(message)["version"]
+
+
+class RevocationFilter:
+    """The latest revocation filter of a process, updated from channel messages"""
+
+    def __init__(self):
+        self._filter = None
+        self._version = -1
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def may_contain(self, jti: str) -> bool:
+        """False only when the jti is certainly not revoked; True without a filter"""
+        bloom = self._filter
+        return bloom is None or jti in bloom
+
+    def rebuild(self, version: int, jtis: list, capacity: int, error_rate: float) -> BloomFilter:
+        bloom = BloomFilter.for_capacity(max(len(jtis), capacity), error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self.replace(version, bloom)
+        return bloom
+
+    def replace(self, version: int, bloom: BloomFilter):
+        with self._lock:
+            if version >= self._version:
+                self._version = version
+                self._filter = bloom
+
+    def add(self, version: int, jti: str):
+        # Adds commute, so they are applied whatever order they arrive in
+        with self._lock:
+            if self._filter is None:
+                return
+            self._filter.add(jti)
+            self._version = max(self._version, version)
+
+    def apply_message(self, message: str):
+        try:
+            data = json.loads(message)
+            if data.get("type", SNAPSHOT) == ADD:
+                self.add(data["version"], data["jti"])
+            else:
+                self.replace(data["version"], BloomFilter.from_data(data))
+        except Exception as e:
+            logger.warning(f"Ignoring malformed revocation filter message: {e}")
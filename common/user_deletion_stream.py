@@ -0,0 +1,258 @@
+"""Consumer-group plumbing for the user-deleted stream, shared by every service that cleans up after a deletion.
+
+Each service subclasses one of the consumers below and implements
+`cleanup(user_id)`. Events are acknowledged only after cleanup; entries left
+pending by a crashed replica are claimed back after `claim_idle_ms`, and an
+event that has been delivered more than `max_deliveries` times is copied to
+the dead-letter stream and acknowledged so it stops blocking the group.
+"""
+import asyncio
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from redis.exceptions import ResponseError
+
+
+@dataclass(frozen=True)
+class StreamConfig:
+    stream: str
+    dead_letter_stream: str
+    batch_size: int
+    claim_idle_ms: int
+    max_deliveries: int
+
+
+def _progress_fields(service: str, status: str, processed: int = None, error: str = None) -> dict:
+    fields = {
+        f"{service}.status": status,
+        f"{service}.updated_at": datetime.utcnow().isoformat()
+    }
+    if processed is not None:
+        fields[f"{service}.processed"] = processed
+    if error:
+        fields[f"{service}.error"] = error
+    return fields
+
+
+def _dead_letter_fields(service: str, group: str, message_id: str, fields: dict, deliveries: int) -> dict:
+    return {
+        **(fields or {}),
+        "original_id": message_id,
+        "service": service,
+        "group": group,
+        "deliveries": deliveries,
+        "dead_lettered_at": datetime.utcnow().isoformat()
+    }
+
+
+def _delivery_counts(pending: list) -> dict:
+    return {entry["message_id"]: entry["times_delivered"] for entry in pending}
+
+
+class UserDeletionStreamConsumer:
+    """Thread-based consumer for services using the synchronous redis client"""
+
+    SERVICE = None
+
+    def __init__(self, redis, config: StreamConfig):
+        self.redis = redis
+        self.config = config
+        self.group = f"{self.SERVICE}-user-deletion"
+        self.consumer = f"{self.SERVICE}-{socket.gethostname()}"
+        self._stop = threading.Event()
+        self._thread = None
+
+    def cleanup(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run_forever, name="user-deletion-consumer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _ensure_group(self):
+        try:
+            self.redis.xgroup_create(self.config.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self._ensure_group()
+                while not self._stop.is_set():
+                    self._process_claimed()
+                    entries = self.redis.xreadgroup(
+                        self.group, self.consumer, {self.config.stream: ">"},
+                        count=self.config.batch_size, block=2000
+                    )
+                    for _, messages in entries or []:
+                        for message_id, fields in messages:
+                            self.handle(message_id, fields)
+            except Exception as e:
+                print(f"User deletion consumer error (retrying): {e}")
+                time.sleep(1)
+
+    def _process_claimed(self):
+        _, claimed, *_ = self.redis.xautoclaim(
+            self.config.stream, self.group, self.consumer,
+            min_idle_time=self.config.claim_idle_ms,
+            start_id="0-0", count=self.config.batch_size
+        )
+        if not claimed:
+            return
+        deliveries = _delivery_counts(self.redis.xpending_range(
+            self.config.stream, self.group, min=claimed[0][0], max=claimed[-1][0],
+            count=len(claimed), consumername=self.consumer
+        ))
+        for message_id, fields in claimed:
+            count = deliveries.get(message_id, 0)
+            if count > self.config.max_deliveries:
+                self._dead_letter(message_id, fields, count)
+            else:
+                self.handle(message_id, fields)
+
+    def _dead_letter(self, message_id: str, fields: dict, deliveries: int):
+        print(f"User deletion event {message_id} failed {deliveries} times, moving it to {self.config.dead_letter_stream}")
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xadd(self.config.dead_letter_stream, _dead_letter_fields(self.SERVICE, self.group, message_id, fields, deliveries))
+        pipe.xack(self.config.stream, self.group, message_id)
+        pipe.execute()
+        user_id = (fields or {}).get("user_id")
+        if user_id:
+            self._progress(user_id, status="dead_lettered")
+
+    def handle(self, message_id: str, fields: dict):
+        user_id = (fields or {}).get("user_id")
+        if not user_id:
+            self.redis.xack(self.config.stream, self.group, message_id)
+            return
+        self._progress(user_id, status="processing")
+        try:
+            processed = self.cleanup(user_id)
+        except Exception as e:
+            # Not acknowledged: the entry is claimed again once it has been idle long enough
+            self._progress(user_id, status="failed", error=str(e))
+            return
+        self._progress(user_id, status="done", processed=processed)
+        self.redis.xack(self.config.stream, self.group, message_id)
+
+    def _progress(self, user_id: str, status: str, processed: int = None, error: str = None):
+        try:
+            self.redis.hset(f"user_deletion:{user_id}", mapping=_progress_fields(self.SERVICE, status, processed, error))
+        except Exception as e:
+            print(f"Failed to record deletion progress for {user_id}: {e}")
+
+
+class AsyncUserDeletionStreamConsumer:
+    """Event-loop consumer for services using redis.asyncio"""
+
+    SERVICE = None
+
+    def __init__(self, redis, config: StreamConfig):
+        self.redis = redis
+        self.config = config
+        self.group = f"{self.SERVICE}-user-deletion"
+        self.consumer = f"{self.SERVICE}-{socket.gethostname()}"
+        self._task = None
+
+    async def cleanup(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.redis.close()
+
+    async def _ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.config.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self._ensure_group()
+                while True:
+                    await self._process_claimed()
+                    entries = await self.redis.xreadgroup(
+                        self.group, self.consumer, {self.config.stream: ">"},
+                        count=self.config.batch_size, block=2000
+                    )
+                    for _, messages in entries or []:
+                        for message_id, fields in messages:
+                            await self.handle(message_id, fields)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"User deletion consumer error (retrying): {e}")
+                await asyncio.sleep(1)
+
+    async def _process_claimed(self):
+        _, claimed, *_ = await self.redis.xautoclaim(
+            self.config.stream, self.group, self.consumer,
+            min_idle_time=self.config.claim_idle_ms,
+            start_id="0-0", count=self.config.batch_size
+        )
+        if not claimed:
+            return
+        deliveries = _delivery_counts(await self.redis.xpending_range(
+            self.config.stream, self.group, min=claimed[0][0], max=claimed[-1][0],
+            count=len(claimed), consumername=self.consumer
+        ))
+        for message_id, fields in claimed:
+            count = deliveries.get(message_id, 0)
+            if count > self.config.max_deliveries:
+                await self._dead_letter(message_id, fields, count)
+            else:
+                await self.handle(message_id, fields)
+
+    async def _dead_letter(self, message_id: str, fields: dict, deliveries: int):
+        print(f"User deletion event {message_id} failed {deliveries} times, moving it to {self.config.dead_letter_stream}")
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xadd(self.config.dead_letter_stream, _dead_letter_fields(self.SERVICE, self.group, message_id, fields, deliveries))
+        pipe.xack(self.config.stream, self.group, message_id)
+        await pipe.execute()
+        user_id = (fields or {}).get("user_id")
+        if user_id:
+            await self._progress(user_id, status="dead_lettered")
+
+    async def handle(self, message_id: str, fields: dict):
+        user_id = (fields or {}).get("user_id")
+        if not user_id:
+            await self.redis.xack(self.config.stream, self.group, message_id)
+            return
+        await self._progress(user_id, status="processing")
+        try:
+            processed = await self.cleanup(user_id)
+        except Exception as e:
+            # Not acknowledged: the entry is claimed again once it has been idle long enough
+            await self._progress(user_id, status="failed", error=str(e))
+            return
+        await self._progress(user_id, status="done", processed=processed)
+        await self.redis.xack(self.config.stream, self.group, message_id)
+
+    async def _progress(self, user_id: str, status: str, processed: int = None, error: str = None):
+        try:
+            await self.redis.hset(f"user_deletion:{user_id}", mapping=_progress_fields(self.SERVICE, status, processed, error))
+        except Exception as e:
+            print(f"Failed to record deletion progress for {user_id}: {e}")
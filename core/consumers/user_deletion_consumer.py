@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from common.user_deletion_stream import StreamConfig, UserDeletionStreamConsumer
+from db.redis_client import create_redis_client
+from repositories.item_repository import ItemRepository
+from settings import settings
+
+
+class UserDeletionConsumer(UserDeletionStreamConsumer):
+    """Soft-deletes the items authored by users removed from the user service"""
+
+    SERVICE = "core"
+
+    def __init__(self, redis, item_repository: ItemRepository):
+        super().__init__(redis, user_deletion_stream_config())
+        self.item_repository = item_repository
+
+    def cleanup(self, user_id: str) -> int:
+        item_ids = iter(self.item_repository.get_item_ids_by_author(user_id))
+        processed = 0
+        with ThreadPoolExecutor(max_workers=settings.USER_DELETION_CONCURRENCY) as pool:
+            while True:
+                batch = list(islice(item_ids, settings.USER_DELETION_BATCH_SIZE))
+                if not batch:
+                    break
+                list(pool.map(self.item_repository.mark_item_deleted, batch))
+                processed += len(batch)
+                self._progress(user_id, status="processing", processed=processed)
+        if processed:
+            self._clear_item_cache(user_id)
+        return processed
+
+    def _clear_item_cache(self, user_id: str):
+        # Failing here leaves the event unacknowledged, so stale pages are retried rather than kept
+        try:
+            for pattern in ("items:page:*", f"items:author:{user_id}:*", "items:category:*"):
+                batch = []
+                for key in self.redis.scan_iter(match=pattern, count=settings.USER_DELETION_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= settings.USER_DELETION_BATCH_SIZE:
+                        self.redis.delete(*batch)
+                        batch = []
+                if batch:
+                    self.redis.delete(*batch)
+        except Exception as e:
+            print(f"Item cache clear error for deleted user {user_id}: {e}")
+            raise
+
+
+def user_deletion_stream_config() -> StreamConfig:
+    return StreamConfig(
+        stream=settings.USER_DELETED_STREAM,
+        dead_letter_stream=settings.USER_DELETED_DLQ_STREAM,
+        batch_size=settings.USER_DELETION_BATCH_SIZE,
+        claim_idle_ms=settings.USER_DELETION_CLAIM_IDLE_MS,
+        max_deliveries=settings.USER_DELETION_MAX_DELIVERIES
+    )
+
+
+def create_user_deletion_consumer() -> UserDeletionConsumer:
+    return UserDeletionConsumer(create_redis_client(), ItemRepository())
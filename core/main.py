@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.item_route import router
+from consumers.user_deletion_consumer import create_user_deletion_consumer
+from settings import settings
 
 # Create FastAPI app
 app = FastAPI(
@@ -22,6 +24,20 @@ app.add_middleware(
 app.include_router(router, prefix="/items" , tags=["items"])
 
 
+@app.on_event("startup")
+def start_user_deletion_consumer():
+    if settings.USER_DELETION_CONSUMER_ENABLED:
+        app.state.user_deletion_consumer = create_user_deletion_consumer()
+        app.state.user_deletion_consumer.start()
+
+
+@app.on_event("shutdown")
+def stop_user_deletion_consumer():
+    consumer = getattr(app.state, "user_deletion_consumer", None)
+    if consumer:
+        consumer.stop()
+
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
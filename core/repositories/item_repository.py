@@ -87,6 +87,12 @@ class ItemRepository:
             "total_pages": total_pages
         }
 
+    def get_items_by_ids(self, item_ids: list[str]):
+        """Point-read many items in one round trip (partition key is the id)"""
+        if not item_ids:
+            return []
+        return list(container.read_items(items=[(item_id, item_id) for item_id in item_ids]))
+
     def create_item(self, user_data: dict):
         create_item = container.create_item(body=user_data)
         return create_item
@@ -109,4 +115,19 @@ class ItemRepository:
             container.replace_item(item=item['id'], body=item)
             return True
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+    def get_item_ids_by_author(self, author_id: str):
+        query = "SELECT VALUE c.id FROM c WHERE c.author_id=@author_id and c.status != 'deleted'"
+        return container.query_items(
+            query=query,
+            parameters=[{"name": "@author_id", "value": author_id}],
+            enable_cross_partition_query=True
+        )
+
+    def mark_item_deleted(self, item_id: str):
+        container.patch_item(
+            item=item_id,
+            partition_key=item_id,
+            patch_operations=[{"op": "set", "path": "/status", "value": "deleted"}]
+        )
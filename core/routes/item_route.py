@@ -3,6 +3,8 @@ from fastapi import APIRouter, Depends, Header, UploadFile
 from enums.role_enum import RoleEnum
 from factories.item_factory import ItemServiceFactory
 from schemas.base_response import BaseResponse
+from schemas.item_schema import ItemBatchRequest
+from settings import settings
 from services.file_service import upload_image
 from utils import verify_token
 
@@ -24,6 +26,17 @@ def get_items(page_number: int = 1, page_size: int = 10, app_id: str = Header(No
 def health_check():
     return BaseResponse(status_code=200, data={"status": "healthy"}, message="Service is healthy")
 
+@router.post("/batch")
+def get_items_batch(request: ItemBatchRequest):
+    """Price and availability for many items; used by the ecommerce service"""
+    try:
+        if len(request.ids) > settings.MAX_ITEM_BATCH_SIZE:
+            return BaseResponse(status_code=400, message=f"At most {settings.MAX_ITEM_BATCH_SIZE} ids per request", data=None)
+        products = item_service.get_products_by_ids(request.ids)
+        return BaseResponse(status_code=200, message="Items retrieved successfully", data=products)
+    except Exception as e:
+        return BaseResponse(status_code=500, message=str(e), data=None)
+
 @router.get("/{item_id}")
 def get_item_by_id(item_id: str):
     try:
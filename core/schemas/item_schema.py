@@ -20,6 +20,20 @@ class ItemDetailDTO(ItemDTO):
     category: list[str] = []
 
 
+class ItemBatchRequest(BaseModel):
+    ids: list[str]
+
+
+class ProductDTO(BaseModel):
+    """Commercial view of an item, as resolved by the ecommerce service"""
+    id: str
+    title: str
+    images: list[str] = []
+    category: list[str] = []
+    price: Optional[float] = None
+    available: bool = True
+
+
 class ItemCreateRequest(BaseModel):
     title: str
     abstract: str
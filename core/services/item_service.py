@@ -4,7 +4,7 @@ import uuid
 from zoneinfo import ZoneInfo
 
 from repositories.item_repository import ItemRepository
-from schemas.item_schema import ItemDTO, ItemDetailDTO
+from schemas.item_schema import ItemDTO, ItemDetailDTO, ProductDTO
 
 class ItemService:
     def __init__(self, item_repository: ItemRepository, redis_client=None):
@@ -87,6 +87,16 @@ class ItemService:
         
         return data
 
+    def get_products_by_ids(self, item_ids: list[str]):
+        """Resolve price and availability for many items with one multi-get"""
+        unique_ids = list(dict.fromkeys(item_ids))
+        items = self.item_repository.get_items_by_ids(unique_ids)
+        found = {item["id"]: item for item in items}
+        return {
+            "items": [self.map_item_to_product_dto(found[item_id]).model_dump() for item_id in unique_ids if item_id in found],
+            "not_found": [item_id for item_id in unique_ids if item_id not in found]
+        }
+
     def create_item(self, item_data: dict):
         item_data['id'] = uuid.uuid4().hex
         item_data['status'] = 'published'
@@ -134,5 +144,19 @@ class ItemService:
     def map_item_to_detail_dto(self, item: dict):
         return ItemDetailDTO(**item)    
     
+    def map_item_to_product_dto(self, item: dict):
+        meta_field = item.get("meta_field") or {}
+        category = item.get("category") or []
+        price = meta_field.get("price")
+        stock = meta_field.get("stock")
+        return ProductDTO(
+            id=item["id"],
+            title=item.get("title", ""),
+            images=item.get("images") or [],
+            category=category if isinstance(category, list) else [category],
+            price=float(price) if price is not None else None,
+            available=item.get("status") == "published" and price is not None and (stock is None or int(stock) > 0)
+        )
+
     def map_items_to_dto(self, items: list[dict]):
         return [ItemDTO(**item) for item in items]
\ No newline at end of file
@@ -24,6 +24,18 @@ class Settings(BaseSettings):
 
     
 
+    # Cleanup of data owned by deleted users (events published by the user service)
+    USER_DELETED_STREAM: str = os.getenv("USER_DELETED_STREAM", "events:user-deleted")
+    USER_DELETED_DLQ_STREAM: str = os.getenv("USER_DELETED_DLQ_STREAM", "events:user-deleted:dead")
+    USER_DELETION_CONSUMER_ENABLED: bool = os.getenv("USER_DELETION_CONSUMER_ENABLED", "true").lower() == "true"
+    USER_DELETION_BATCH_SIZE: int = int(os.getenv("USER_DELETION_BATCH_SIZE", "100"))
+    USER_DELETION_CONCURRENCY: int = int(os.getenv("USER_DELETION_CONCURRENCY", "8"))
+    USER_DELETION_CLAIM_IDLE_MS: int = int(os.getenv("USER_DELETION_CLAIM_IDLE_MS", "60000"))
+    USER_DELETION_MAX_DELIVERIES: int = int(os.getenv("USER_DELETION_MAX_DELIVERIES", "5"))
+
+    # Largest id list accepted by POST /items/batch
+    MAX_ITEM_BATCH_SIZE: int = int(os.getenv("MAX_ITEM_BATCH_SIZE", "200"))
+
     AUTHENTICATION_SERVICE_URL: str = os.getenv("AUTHENTICATION_SERVICE_URL", "http://localhost:8001")
 
     # Azure Blob Storage
@@ -0,0 +1,61 @@
+import asyncio
+
+from common.user_deletion_stream import AsyncUserDeletionStreamConsumer, StreamConfig
+from db.redis_client import create_redis_client
+from repositories.cart_repository import CartRepository
+from repositories.cart_store_repository import CartStoreRepository
+from repositories.review_cache_repository import ReviewCacheRepository
+from repositories.review_repository import ReviewRepository
+from settings import settings
+
+
+class UserDeletionConsumer(AsyncUserDeletionStreamConsumer):
+    """Removes the carts and anonymizes the reviews of deleted users.
+
+    The blocking Cosmos calls run in worker threads, at most
+    USER_DELETION_CONCURRENCY at a time. Orders are kept as business records.
+    """
+
+    SERVICE = "ecommerce"
+
+    def __init__(self, redis, cart_repository: CartRepository, review_repository: ReviewRepository):
+        super().__init__(redis, user_deletion_stream_config())
+        self.cart_repository = cart_repository
+        self.cart_store = CartStoreRepository(redis)
+        self.review_repository = review_repository
+        self.review_cache = ReviewCacheRepository(redis)
+        self._semaphore = asyncio.Semaphore(settings.USER_DELETION_CONCURRENCY)
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def cleanup(self, user_id: str) -> int:
+        # Drop the Redis copy first so the flusher cannot write the cart back
+        await self.cart_store.delete(user_id)
+        carts = await self._run(self.cart_repository.delete_carts_by_user, user_id)
+        review_ids = await self._run(lambda: list(self.review_repository.get_review_ids_by_user(user_id)))
+
+        processed = carts
+        for start in range(0, len(review_ids), settings.USER_DELETION_BATCH_SIZE):
+            batch = review_ids[start:start + settings.USER_DELETION_BATCH_SIZE]
+            reviews = await asyncio.gather(*(self._run(self.review_repository.anonymize_review, review_id) for review_id in batch))
+            # Cached review pages still show the author's name
+            await self.review_cache.invalidate(*{review["product_id"] for review in reviews if review.get("product_id")})
+            processed += len(batch)
+            await self._progress(user_id, status="processing", processed=processed)
+        return processed
+
+
+def user_deletion_stream_config() -> StreamConfig:
+    return StreamConfig(
+        stream=settings.USER_DELETED_STREAM,
+        dead_letter_stream=settings.USER_DELETED_DLQ_STREAM,
+        batch_size=settings.USER_DELETION_BATCH_SIZE,
+        claim_idle_ms=settings.USER_DELETION_CLAIM_IDLE_MS,
+        max_deliveries=settings.USER_DELETION_MAX_DELIVERIES
+    )
+
+
+def create_user_deletion_consumer() -> UserDeletionConsumer:
+    return UserDeletionConsumer(create_redis_client(), CartRepository(), ReviewRepository())
@@ -1,20 +1,52 @@
 from settings import settings
 from azure.cosmos import CosmosClient
+from db.indexing_policies import (
+    CART_INDEXING_POLICY,
+    INVENTORY_INDEXING_POLICY,
+    ORDER_INDEXING_POLICY,
+    PROMOTION_INDEXING_POLICY,
+    RATING_AGGREGATE_INDEXING_POLICY,
+    REVIEW_INDEXING_POLICY
+)
 
 client = CosmosClient(settings.COSMOS_ENDPOINT, settings.COSMOS_KEY)
 database = client.create_database_if_not_exists(id=settings.COSMOS_DB_NAME)
 cart_container = database.create_container_if_not_exists(
     id=settings.COSMOS_CONTAINER_CARTS,
     partition_key="/id",
+    indexing_policy=CART_INDEXING_POLICY,
     offer_throughput=400
 )
+# Orders and their outbox records share a user's partition so checkout can
+# write both in one transactional batch
 order_container = database.create_container_if_not_exists(
     id=settings.COSMOS_CONTAINER_ORDERS,
-    partition_key="/id",
+    partition_key="/user_id",
+    indexing_policy=ORDER_INDEXING_POLICY,
     offer_throughput=400
 )
 review_container = database.create_container_if_not_exists(
     id=settings.COSMOS_CONTAINER_REVIEWS,
     partition_key="/id",
+    indexing_policy=REVIEW_INDEXING_POLICY,
+    offer_throughput=400
+)
+promotion_container = database.create_container_if_not_exists(
+    id=settings.COSMOS_CONTAINER_PROMOTIONS,
+    partition_key="/app_id",
+    indexing_policy=PROMOTION_INDEXING_POLICY,
     offer_throughput=400
-)
\ No newline at end of file
+)
+inventory_container = database.create_container_if_not_exists(
+    id=settings.COSMOS_CONTAINER_INVENTORY,
+    partition_key="/id",
+    indexing_policy=INVENTORY_INDEXING_POLICY,
+    offer_throughput=400
+)
+# One rating summary document per product, kept up to date by review writes
+rating_aggregate_container = database.create_container_if_not_exists(
+    id=settings.COSMOS_CONTAINER_RATING_AGGREGATES,
+    partition_key="/id",
+    indexing_policy=RATING_AGGREGATE_INDEXING_POLICY,
+    offer_throughput=400
+)
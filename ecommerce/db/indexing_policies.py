@@ -0,0 +1,64 @@
+"""
+Indexing policies of the ecommerce containers.
+
+Every container excludes "/*" and indexes only the paths its queries filter
+or sort on, so large fields (review comments, cart and order line items,
+addresses, outbox payloads) cost nothing to index on writes. Queries that
+filter on one property and sort on another use a composite index; they
+must list the filter property first in ORDER BY (e.g.
+ORDER BY r.product_id, r.created_at DESC) for Cosmos to use it.
+"""
+
+
+def _paths(*paths: str) -> list:
+    return [{"path": path} for path in paths]
+
+
+def _policy(included: tuple = (), composite: tuple = ()) -> dict:
+    policy = {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": _paths(*included),
+        "excludedPaths": _paths("/*")
+    }
+    if composite:
+        policy["compositeIndexes"] = [
+            [{"path": path, "order": order} for path, order in index] for index in composite
+        ]
+    return policy
+
+
+# Point reads by user id; user_id is kept for the legacy lookup and migration
+CART_INDEXING_POLICY = _policy(included=("/user_id/?", "/updated_at/?"))
+
+# A user's orders newest first, due outbox records oldest first, and a
+# tenant's highest order number (seeds the order number counter)
+ORDER_INDEXING_POLICY = _policy(
+    included=("/type/?", "/status/?", "/lease_until/?", "/created_at/?", "/order_number/?", "/app_id/?"),
+    composite=(
+        (("/type", "ascending"), ("/created_at", "descending")),
+        (("/type", "ascending"), ("/created_at", "ascending")),
+    )
+)
+
+# Review pages of a product or a user, newest first (id breaks ties for the
+# keyset cursor), and the rating rebuild
+REVIEW_INDEXING_POLICY = _policy(
+    included=("/product_id/?", "/user_id/?", "/rating/?", "/created_at/?"),
+    composite=(
+        (("/product_id", "ascending"), ("/created_at", "descending"), ("/id", "descending")),
+        (("/user_id", "ascending"), ("/created_at", "descending"), ("/id", "descending")),
+    )
+)
+
+# An app's active promotions, and all of them newest first
+PROMOTION_INDEXING_POLICY = _policy(
+    included=("/app_id/?", "/active/?", "/created_at/?"),
+    composite=(
+        (("/app_id", "ascending"), ("/created_at", "descending")),
+    )
+)
+
+# Only ever point-read (or scanned whole by maintenance scripts)
+INVENTORY_INDEXING_POLICY = _policy()
+RATING_AGGREGATE_INDEXING_POLICY = _policy()
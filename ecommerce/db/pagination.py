@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+
+
+class InvalidContinuationTokenError(ValueError):
+    """A continuation token that was not issued by this service"""
+
+
+def encode_continuation_token(token):
+    """Wrap a Cosmos continuation token so clients treat it as opaque"""
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_continuation_token(token):
+    if not token:
+        return None
+    try:
+        decoded = base64.b64decode(token + "=" * (-len(token) % 4), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidContinuationTokenError("Invalid continuation token") from e
+    if not decoded:
+        raise InvalidContinuationTokenError("Invalid continuation token")
+    return decoded
+
+
+def query_page(container, query: str, parameters: list, limit: int, continuation_token=None, **kwargs):
+    """Run a query for one page of at most `limit` items.
+
+    Returns (items, next continuation token or None). Cosmos resumes the
+    query where the token left off, so later pages cost the same as the
+    first, unlike OFFSET. Only the one page is fetched; whether more exist
+    comes from the token Cosmos returns with it.
+    """
+    pager = container.query_items(
+        query=query, parameters=parameters, max_item_count=limit, **kwargs
+    ).by_page(decode_continuation_token(continuation_token))
+    items = list(next(pager, []))
+    return items, encode_continuation_token(pager.continuation_token)
+
+
+def encode_keyset_cursor(item: dict):
+    """Opaque cursor pointing just past `item` in a (created_at DESC, id DESC) ordering"""
+    position = json.dumps([item["created_at"], item["id"]], separators=(",", ":"))
+    return encode_continuation_token(position)
+
+
+def decode_keyset_cursor(token):
+    if not token:
+        return None
+    try:
+        created_at, item_id = json.loads(decode_continuation_token(token))
+    except (TypeError, ValueError) as e:
+        raise InvalidContinuationTokenError("Invalid continuation token") from e
+    if not isinstance(created_at, str) or not isinstance(item_id, str):
+        raise InvalidContinuationTokenError("Invalid continuation token")
+    return created_at, item_id
+
+
+def query_keyset_page(container, alias: str, where: str, parameters: list, order_prefix: str, limit: int, cursor=None, **kwargs):
+    """Run a query for one page of at most `limit` items, newest first.
+
+    Pages are delimited by the (created_at, id) of the last item rather than
+    a Cosmos continuation token, so they stay correct for cross-partition
+    ORDER BY queries. `order_prefix` is the filtered property, listed first
+    so the composite index is used. Returns (items, next cursor or None);
+    one extra item is read to know whether another page exists.
+    """
+    position = decode_keyset_cursor(cursor)
+    conditions = [where]
+    parameters = list(parameters) + [{"name": "@limit", "value": limit + 1}]
+    if position:
+        conditions.append(
+            f"({alias}.created_at < @cursor_created_at"
+            f" OR ({alias}.created_at = @cursor_created_at AND {alias}.id < @cursor_id))"
+        )
+        parameters += [
+            {"name": "@cursor_created_at", "value": position[0]},
+            {"name": "@cursor_id", "value": position[1]}
+        ]
+    query = (
+        f"SELECT TOP @limit * FROM {alias} WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {order_prefix}, {alias}.created_at DESC, {alias}.id DESC"
+    )
+    items = list(container.query_items(query=query, parameters=parameters, **kwargs))
+    if len(items) > limit:
+        return items[:limit], encode_keyset_cursor(items[limit - 1])
+    return items, None
@@ -0,0 +1,18 @@
+from redis.asyncio import Redis
+from settings import settings
+
+
+def create_redis_client():
+    return Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        password=settings.REDIS_PASSWORD or None,
+        ssl=settings.REDIS_SSL,
+        ssl_cert_reqs=settings.REDIS_SSL_CERT_REQS,
+        db=0,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+        retry_on_timeout=True,
+        health_check_interval=30
+    )
@@ -2,6 +2,20 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.cart_routes import router as cart_router
 from routes.review_routes import router as review_router
+from routes.promotion_routes import router as promotion_router
+from routes.order_routes import router as order_router
+from routes.inventory_routes import router as inventory_router
+from routes.waiting_room_routes import router as waiting_room_router
+from consumers.user_deletion_consumer import create_user_deletion_consumer
+from repositories.cart_repository import CartRepository
+from repositories.cart_store_repository import get_cart_store
+from repositories.inventory_repository import InventoryRepository
+from repositories.inventory_store_repository import get_inventory_store
+from services.cart_flusher import CartFlusher
+from services.inventory_worker import InventoryWorker
+from services.outbox_relay import get_outbox_relay
+from services.waiting_room_service import validate_waiting_room_settings
+from settings import settings
 
 app = FastAPI(
     title="E-commerce API",
@@ -21,6 +35,70 @@ app.add_middleware(
 # Include routers
 app.include_router(cart_router)
 app.include_router(review_router)
+app.include_router(promotion_router)
+app.include_router(order_router)
+app.include_router(inventory_router)
+app.include_router(waiting_room_router)
+
+
+@app.on_event("startup")
+async def check_waiting_room_settings():
+    validate_waiting_room_settings()
+
+
+@app.on_event("startup")
+async def start_cart_flusher():
+    if settings.CART_STORE_ENABLED:
+        app.state.cart_flusher = CartFlusher(get_cart_store(), CartRepository())
+        app.state.cart_flusher.start()
+
+
+@app.on_event("shutdown")
+async def stop_cart_flusher():
+    flusher = getattr(app.state, "cart_flusher", None)
+    if flusher:
+        await flusher.stop()
+
+
+@app.on_event("startup")
+async def start_outbox_relay():
+    if settings.OUTBOX_RELAY_ENABLED:
+        get_outbox_relay().start()
+
+
+@app.on_event("shutdown")
+async def stop_outbox_relay():
+    if settings.OUTBOX_RELAY_ENABLED:
+        await get_outbox_relay().stop()
+
+
+@app.on_event("startup")
+async def start_inventory_worker():
+    if settings.INVENTORY_WORKER_ENABLED:
+        app.state.inventory_worker = InventoryWorker(get_inventory_store(), InventoryRepository())
+        app.state.inventory_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_inventory_worker():
+    worker = getattr(app.state, "inventory_worker", None)
+    if worker:
+        await worker.stop()
+
+
+@app.on_event("startup")
+async def start_user_deletion_consumer():
+    if settings.USER_DELETION_CONSUMER_ENABLED:
+        app.state.user_deletion_consumer = create_user_deletion_consumer()
+        app.state.user_deletion_consumer.start()
+
+
+@app.on_event("shutdown")
+async def stop_user_deletion_consumer():
+    consumer = getattr(app.state, "user_deletion_consumer", None)
+    if consumer:
+        await consumer.stop()
+
 
 @app.get("/")
 async def root():
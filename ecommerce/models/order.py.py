@@ -1,8 +1,12 @@
 from pydantic import BaseModel
+from typing import Optional
 
 
 class Order(BaseModel):
-    id: int
+    id: str
+    order_number: int
+    user_id: str
+    app_id: Optional[str] = None
     items: list[dict]
     total_price: float
     status: str
\ No newline at end of file
@@ -1,41 +1,87 @@
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from db.database import cart_container
 from datetime import datetime
-import uuid
 
 
 class CartRepository:
+    """Carts are stored one per user, with the user id as both document id and
+    partition key, so every lookup is a point read and every write an upsert.
+    """
+
+    def new_cart(self, user_id: str) -> dict:
+        return {
+            "id": user_id,
+            "user_id": user_id,
+            "items": [],
+            "total_price": 0.0,
+        }
+
     async def get_cart(self, user_id: str):
-        """Get cart by user_id, create if not exists"""
+        """Get cart by user_id; a user without a stored cart gets an empty, unsaved one"""
         try:
-            query = f"SELECT * FROM c WHERE c.user_id = '{user_id}'"
-            carts = list(cart_container.query_items(query=query, enable_cross_partition_query=True))
-            
-            if carts:
-                return carts[0]
-            
-            # Create new cart if not exists
-            cart_id = str(uuid.uuid4())
-            cart_data = {
-                "id": cart_id,
-                "user_id": user_id,
-                "items": [],
-                "total_price": 0.0,
-            }
-            return cart_container.create_item(body=cart_data)
+            return cart_container.read_item(item=user_id, partition_key=user_id)
+        except CosmosResourceNotFoundError:
+            return self.new_cart(user_id)
         except Exception as e:
             print(f"Error in get_cart: {e}")
             return None
 
     async def update_cart(self, user_id: str, cart_data: dict):
-        """Update cart data"""
+        """Create or replace the user's cart"""
         try:
-            cart_data["updated_at"] = datetime.utcnow().isoformat()
-            cart_container.replace_item(item=cart_data["id"], body=cart_data)
-            return cart_data
+            return self.upsert_cart(user_id, cart_data)
         except Exception as e:
             print(f"Error updating cart: {e}")
             return None
 
+    def upsert_cart(self, user_id: str, cart_data: dict):
+        now = datetime.utcnow().isoformat()
+        cart_data["id"] = user_id
+        cart_data["user_id"] = user_id
+        cart_data.setdefault("created_at", now)
+        cart_data["updated_at"] = now
+        return cart_container.upsert_item(body=cart_data)
+
+    def save_cart(self, user_id: str, cart_data: dict, etag: str = None):
+        """Write the whole cart if Cosmos still holds the version `etag` refers to.
+
+        Without an ETag the cart must not be stored yet. Raises
+        CosmosAccessConditionFailedError, CosmosResourceExistsError or
+        CosmosResourceNotFoundError when another writer got there first.
+        """
+        now = datetime.utcnow().isoformat()
+        cart_data = {**cart_data, "id": user_id, "user_id": user_id, "updated_at": now}
+        cart_data.setdefault("created_at", now)
+        if etag is None:
+            return cart_container.create_item(body=cart_data)
+        return cart_container.replace_item(
+            item=user_id,
+            body=cart_data,
+            etag=etag,
+            match_condition=MatchConditions.IfNotModified
+        )
+
+    async def patch_cart(self, user_id: str, operations: list, etag: str):
+        """Apply patch operations if the cart is unchanged since it was read.
+
+        Raises CosmosAccessConditionFailedError when the ETag no longer matches.
+        """
+        operations = operations + [{"op": "set", "path": "/updated_at", "value": datetime.utcnow().isoformat()}]
+        return cart_container.patch_item(
+            item=user_id,
+            partition_key=user_id,
+            patch_operations=operations,
+            etag=etag,
+            match_condition=MatchConditions.IfNotModified
+        )
+
+    async def insert_cart(self, user_id: str, cart_data: dict):
+        """Create the user's cart; raises CosmosResourceExistsError if it already exists"""
+        now = datetime.utcnow().isoformat()
+        cart_data.update({"id": user_id, "user_id": user_id, "created_at": now, "updated_at": now})
+        return cart_container.create_item(body=cart_data)
+
     def get_cart_by_id(self, cart_id):
         try:
             cart = cart_container.read_item(item=cart_id, partition_key=cart_id)
@@ -47,4 +93,10 @@ class CartRepository:
     def create_cart(self, cart_data):
         return cart_container.create_item(body=cart_data)
 
-
+    def delete_carts_by_user(self, user_id: str):
+        """Delete the cart owned by a user"""
+        try:
+            cart_container.delete_item(item=user_id, partition_key=user_id)
+            return 1
+        except CosmosResourceNotFoundError:
+            return 0
@@ -0,0 +1,312 @@
+import json
+from datetime import datetime, timedelta
+
+from db.redis_client import create_redis_client
+from settings import settings
+
+# Set of user ids whose Redis cart has changes not yet written to Cosmos
+DIRTY_CARTS_KEY = "carts:dirty"
+
+# Script results: the cart is not in Redis yet, it changed, nothing changed,
+# or (for a replace) it changed since the copy being replaced was read
+NOT_LOADED = 0
+CHANGED = 1
+UNCHANGED = 2
+STALE = 3
+
+# KEYS: qty hash, meta hash, loaded marker, dirty set, sync hash, changed hash
+# ARGV: user_id, ttl seconds, operation arguments...
+_REQUIRE_LOADED = """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    return {0}
+end
+"""
+
+_STATE = "redis.call('HGETALL', KEYS[1]), redis.call('HGETALL', KEYS[2]), redis.call('HGETALL', KEYS[6])"
+
+_UNCHANGED = "return {2, " + _STATE + "}"
+
+_MARK_DIRTY = """
+redis.call('SADD', KEYS[4], ARGV[1])
+redis.call('HINCRBY', KEYS[5], 'version', 1)
+for _, i in ipairs({1, 2, 3, 5, 6}) do
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+end
+return {1, """ + _STATE + """}
+"""
+
+# ARGV[5..]: product_id, quantity, meta, changed_at quadruplets; a quantity
+# of 0 is a removal, which only records its time
+_WRITE_LINES = """
+for i = 5, #ARGV, 4 do
+    if tonumber(ARGV[i + 1]) > 0 then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 2])
+    end
+    redis.call('HSET', KEYS[6], ARGV[i], ARGV[i + 3])
+end
+"""
+
+# ARGV[3..]: created_at, Cosmos ETag ("" if not stored yet), then lines
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[2])
+    redis.call('HSET', KEYS[5], 'etag', ARGV[4], 'version', 0)
+""" + _WRITE_LINES + """
+    for _, i in ipairs({1, 2, 5, 6}) do
+        redis.call('EXPIRE', KEYS[i], ARGV[2])
+    end
+end
+return {1, """ + _STATE + """}
+"""
+
+# ARGV[3..]: changed_at, product_id, quantity to add, meta (kept from the first add)
+ADD_SCRIPT = _REQUIRE_LOADED + """
+redis.call('HINCRBY', KEYS[1], ARGV[4], ARGV[5])
+redis.call('HSETNX', KEYS[2], ARGV[4], ARGV[6])
+redis.call('HSET', KEYS[6], ARGV[4], ARGV[3])
+""" + _MARK_DIRTY
+
+# ARGV[3..]: changed_at, product_id, new quantity (0 removes the item)
+SET_QUANTITY_SCRIPT = _REQUIRE_LOADED + """
+if redis.call('HEXISTS', KEYS[1], ARGV[4]) == 0 then
+""" + _UNCHANGED + """
+end
+if tonumber(ARGV[5]) <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[4])
+    redis.call('HDEL', KEYS[2], ARGV[4])
+else
+    redis.call('HSET', KEYS[1], ARGV[4], ARGV[5])
+end
+redis.call('HSET', KEYS[6], ARGV[4], ARGV[3])
+""" + _MARK_DIRTY
+
+# ARGV[3..]: changed_at, product_id
+REMOVE_SCRIPT = _REQUIRE_LOADED + """
+if redis.call('HDEL', KEYS[1], ARGV[4]) == 0 then
+""" + _UNCHANGED + """
+end
+redis.call('HDEL', KEYS[2], ARGV[4])
+redis.call('HSET', KEYS[6], ARGV[4], ARGV[3])
+""" + _MARK_DIRTY
+
+# ARGV[3]: changed_at
+CLEAR_SCRIPT = _REQUIRE_LOADED + """
+local products = redis.call('HKEYS', KEYS[1])
+if #products == 0 then
+""" + _UNCHANGED + """
+end
+for _, product_id in ipairs(products) do
+    redis.call('HSET', KEYS[6], product_id, ARGV[3])
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+""" + _MARK_DIRTY
+
+# ARGV[3..]: version the replacement was computed from, Cosmos ETag, then
+# lines. Refused with STALE if the cart was mutated since that version.
+REPLACE_SCRIPT = _REQUIRE_LOADED + """
+if (redis.call('HGET', KEYS[5], 'version') or '0') ~= ARGV[3] then
+    return {3}
+end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[6])
+redis.call('HSET', KEYS[5], 'etag', ARGV[4])
+""" + _WRITE_LINES + _MARK_DIRTY
+
+# KEYS: sync hash, loaded marker; ARGV: ETag of the write that just succeeded
+SET_ETAG_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('HSET', KEYS[1], 'etag', ARGV[1])
+end
+"""
+
+
+def _pairs(flat: list) -> dict:
+    return dict(zip(flat[::2], flat[1::2]))
+
+
+class CartStoreRepository:
+    """Hot copy of carts in Redis.
+
+    A cart is two hashes keyed by product id, `cart:{user_id}:qty` for the
+    quantity (updated with HINCRBY) and `cart:{user_id}:meta` for the
+    name/image/category/price snapshot, plus a `cart:{user_id}:loaded`
+    marker holding the cart's created_at. Every mutation is a single Lua call that also
+    adds the user to the dirty set drained by the write-behind flusher.
+    Mutations on a cart that is not loaded report NOT_LOADED so the caller
+    can load it from Cosmos first. `cart:{user_id}:sync` keeps the ETag of
+    the Cosmos version the Redis copy is based on, so the flusher only
+    overwrites the document it last read or wrote, and a version counter
+    bumped by every mutation. `cart:{user_id}:changed` records when each
+    line was last changed, including removed lines, so a copy that diverged
+    from Cosmos can be reconciled line by line.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._load = redis.register_script(LOAD_SCRIPT)
+        self._add = redis.register_script(ADD_SCRIPT)
+        self._set_quantity = redis.register_script(SET_QUANTITY_SCRIPT)
+        self._remove = redis.register_script(REMOVE_SCRIPT)
+        self._clear = redis.register_script(CLEAR_SCRIPT)
+        self._replace = redis.register_script(REPLACE_SCRIPT)
+        self._set_etag = redis.register_script(SET_ETAG_SCRIPT)
+
+    def _keys(self, user_id: str) -> list:
+        return [
+            f"cart:{user_id}:qty",
+            f"cart:{user_id}:meta",
+            f"cart:{user_id}:loaded",
+            DIRTY_CARTS_KEY,
+            f"cart:{user_id}:sync",
+            f"cart:{user_id}:changed"
+        ]
+
+    def _to_cart(self, user_id: str, qty_flat: list, meta_flat: list, changed_flat: list, created_at: str = None) -> dict:
+        quantities = _pairs(qty_flat)
+        metas = _pairs(meta_flat)
+        changed = _pairs(changed_flat)
+        items = []
+        for product_id, quantity in quantities.items():
+            meta = json.loads(metas.get(product_id) or "{}")
+            items.append({
+                "product_id": product_id,
+                "name": meta.get("name"),
+                "image": meta.get("image"),
+                "category": meta.get("category"),
+                "price": meta.get("price", 0.0),
+                "quantity": int(quantity),
+                "added_at": meta.get("added_at"),
+                "updated_at": changed.get(product_id) or meta.get("added_at")
+            })
+        items.sort(key=lambda item: item["added_at"] or "")
+        # Removals older than a cart's lifetime in Redis can no longer conflict
+        cutoff = (datetime.utcnow() - timedelta(seconds=settings.CART_CACHE_TTL)).isoformat()
+        cart = {
+            "id": user_id,
+            "user_id": user_id,
+            "items": items,
+            "removed": {
+                product_id: changed_at for product_id, changed_at in changed.items()
+                if product_id not in quantities and changed_at > cutoff
+            },
+            "total_price": sum(item["price"] * item["quantity"] for item in items)
+        }
+        if created_at:
+            cart["created_at"] = created_at
+        return cart
+
+    def _result(self, user_id: str, result: list):
+        """Return (status, cart); cart is None when the cart is not loaded or the replace was stale"""
+        status = int(result[0])
+        if status in (NOT_LOADED, STALE):
+            return status, None
+        return status, self._to_cart(user_id, result[1], result[2], result[3])
+
+    def _meta(self, item: dict) -> str:
+        return json.dumps({
+            "name": item.get("name"),
+            "image": item.get("image"),
+            "category": item.get("category"),
+            "price": item.get("price", 0.0),
+            "added_at": item.get("added_at") or datetime.utcnow().isoformat()
+        })
+
+    def _lines(self, cart: dict) -> list:
+        """Script arguments for a cart's lines and removals"""
+        args = []
+        for item in cart.get("items", []):
+            args.extend([
+                item["product_id"], item["quantity"], self._meta(item),
+                item.get("updated_at") or item.get("added_at") or ""
+            ])
+        for product_id, removed_at in (cart.get("removed") or {}).items():
+            args.extend([product_id, 0, "", removed_at])
+        return args
+
+    async def get_snapshot(self, user_id: str):
+        """Return (cart, Cosmos ETag or None, version) read atomically, or None if the cart is not loaded"""
+        qty_key, meta_key, loaded_key, _, sync_key, changed_key = self._keys(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(loaded_key)
+            pipe.hgetall(qty_key)
+            pipe.hgetall(meta_key)
+            pipe.hgetall(changed_key)
+            pipe.hmget(sync_key, "etag", "version")
+            created_at, quantities, metas, changed, (etag, version) = await pipe.execute()
+        if created_at is None:
+            return None
+        flat = [
+            [v for pair in fields.items() for v in pair]
+            for fields in (quantities, metas, changed)
+        ]
+        return self._to_cart(user_id, *flat, created_at), etag or None, version or "0"
+
+    async def get_cart(self, user_id: str):
+        """Return the cached cart, or None if it is not loaded"""
+        snapshot = await self.get_snapshot(user_id)
+        return snapshot[0] if snapshot else None
+
+    async def load_cart(self, user_id: str, cart: dict) -> dict:
+        """Seed Redis from a persisted cart unless another request already did"""
+        args = [
+            user_id, settings.CART_CACHE_TTL, cart.get("created_at") or datetime.utcnow().isoformat(),
+            cart.get("_etag") or ""
+        ] + self._lines(cart)
+        _, loaded = self._result(user_id, await self._load(keys=self._keys(user_id), args=args))
+        return loaded
+
+    async def replace_cart(self, user_id: str, cart: dict, etag: str, version: str):
+        """Overwrite the Redis copy with `cart`, based on Cosmos version `etag`, and mark it dirty.
+
+        Returns (STALE, None) if the copy was mutated after `version` was read.
+        """
+        args = [user_id, settings.CART_CACHE_TTL, version, etag or ""] + self._lines(cart)
+        return self._result(user_id, await self._replace(keys=self._keys(user_id), args=args))
+
+    async def set_etag(self, user_id: str, etag: str):
+        """Record the ETag of a successful flush, unless the cart was dropped meanwhile"""
+        _, _, loaded_key, _, sync_key, _ = self._keys(user_id)
+        await self._set_etag(keys=[sync_key, loaded_key], args=[etag])
+
+    async def add_item(self, user_id: str, item: dict, quantity: int):
+        args = [
+            user_id, settings.CART_CACHE_TTL, datetime.utcnow().isoformat(),
+            item["product_id"], quantity, self._meta(item)
+        ]
+        return self._result(user_id, await self._add(keys=self._keys(user_id), args=args))
+
+    async def set_quantity(self, user_id: str, product_id: str, quantity: int):
+        args = [user_id, settings.CART_CACHE_TTL, datetime.utcnow().isoformat(), product_id, quantity]
+        return self._result(user_id, await self._set_quantity(keys=self._keys(user_id), args=args))
+
+    async def remove_item(self, user_id: str, product_id: str):
+        args = [user_id, settings.CART_CACHE_TTL, datetime.utcnow().isoformat(), product_id]
+        return self._result(user_id, await self._remove(keys=self._keys(user_id), args=args))
+
+    async def clear(self, user_id: str):
+        args = [user_id, settings.CART_CACHE_TTL, datetime.utcnow().isoformat()]
+        return self._result(user_id, await self._clear(keys=self._keys(user_id), args=args))
+
+    async def pop_dirty(self, count: int) -> list:
+        return await self.redis.spop(DIRTY_CARTS_KEY, count) or []
+
+    async def mark_dirty(self, *user_ids: str):
+        if user_ids:
+            await self.redis.sadd(DIRTY_CARTS_KEY, *user_ids)
+
+    async def delete(self, user_id: str):
+        qty_key, meta_key, loaded_key, _, sync_key, changed_key = self._keys(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(qty_key, meta_key, loaded_key, sync_key, changed_key)
+            pipe.srem(DIRTY_CARTS_KEY, user_id)
+            await pipe.execute()
+
+
+_cart_store = None
+
+
+def get_cart_store() -> CartStoreRepository:
+    global _cart_store
+    if _cart_store is None:
+        _cart_store = CartStoreRepository(create_redis_client())
+    return _cart_store
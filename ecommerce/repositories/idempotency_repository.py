@@ -0,0 +1,58 @@
+import json
+
+from db.redis_client import create_redis_client
+from settings import settings
+
+# Ownership of a key: taken by this request, already completed, or held by a request still running
+ACQUIRED = "acquired"
+COMPLETED = "completed"
+IN_PROGRESS = "in_progress"
+
+
+class IdempotencyRepository:
+    """Idempotency keys for non-repeatable requests, kept in Redis.
+
+    The first request with a key claims it with SET NX; while it runs the
+    key expires after IDEMPOTENCY_LOCK_TTL so a crashed request does not
+    block retries forever. The completed response is then stored for
+    IDEMPOTENCY_TTL and replayed to retries with the same key.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def _key(self, scope: str, owner: str, key: str) -> str:
+        return f"idempotency:{scope}:{owner}:{key}"
+
+    async def begin(self, scope: str, owner: str, key: str, fingerprint: str):
+        """Return (state, stored record); the record is set for COMPLETED and IN_PROGRESS"""
+        redis_key = self._key(scope, owner, key)
+        record = {"status": "processing", "fingerprint": fingerprint}
+        if await self.redis.set(redis_key, json.dumps(record), nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL):
+            return ACQUIRED, record
+        stored = await self.redis.get(redis_key)
+        if stored is None:
+            # Expired between the two calls; try once more
+            if await self.redis.set(redis_key, json.dumps(record), nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL):
+                return ACQUIRED, record
+            stored = await self.redis.get(redis_key) or json.dumps(record)
+        stored = json.loads(stored)
+        return (COMPLETED if stored.get("status") == "completed" else IN_PROGRESS), stored
+
+    async def complete(self, scope: str, owner: str, key: str, fingerprint: str, response: dict):
+        record = {"status": "completed", "fingerprint": fingerprint, "response": response}
+        await self.redis.set(self._key(scope, owner, key), json.dumps(record, default=str), ex=settings.IDEMPOTENCY_TTL)
+
+    async def release(self, scope: str, owner: str, key: str):
+        """Forget a key whose request failed so the client can retry it"""
+        await self.redis.delete(self._key(scope, owner, key))
+
+
+_idempotency_repository = None
+
+
+def get_idempotency_repository() -> IdempotencyRepository:
+    global _idempotency_repository
+    if _idempotency_repository is None:
+        _idempotency_repository = IdempotencyRepository(create_redis_client())
+    return _idempotency_repository
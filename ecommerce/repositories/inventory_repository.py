@@ -0,0 +1,22 @@
+from db.database import inventory_container
+from datetime import datetime
+
+
+class InventoryRepository:
+    """Durable on-hand stock per SKU (the SKU is the document id).
+
+    Redis holds the live counters; documents here are written by the
+    reconciler and used to seed Redis for SKUs it does not hold.
+    """
+
+    def get_stock_by_skus(self, skus: list):
+        if not skus:
+            return []
+        return list(inventory_container.read_items(items=[(sku, sku) for sku in skus]))
+
+    def save_stock(self, sku: str, on_hand: int):
+        return inventory_container.upsert_item(body={
+            "id": sku,
+            "on_hand": on_hand,
+            "updated_at": datetime.utcnow().isoformat()
+        })
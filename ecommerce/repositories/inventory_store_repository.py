@@ -0,0 +1,208 @@
+from db.redis_client import create_redis_client
+
+# Reservations by expiry time (ms), drained by the sweeper
+RESERVATION_EXPIRY_KEY = "inventory:reservations:expiry"
+# SKU keys whose on-hand stock changed since the last reconciliation
+DIRTY_SKUS_KEY = "inventory:dirty"
+
+SKU_KEY_PREFIX = "inventory:sku:"
+RESERVATION_KEY_PREFIX = "inventory:reservation:"
+
+# KEYS: reservation hash, expiry zset, sku hashes...
+# ARGV: reservation_id, expires_at_ms, quantities... (aligned with the sku keys)
+# Returns {1} when reserved (or already reserved), {-1, i} when the i-th SKU is
+# not loaded, {0, i, available} when the i-th SKU has too little stock.
+RESERVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return {1}
+end
+local count = #KEYS - 2
+for i = 1, count do
+    local stock = redis.call('HMGET', KEYS[i + 2], 'on_hand', 'reserved')
+    if not stock[1] then
+        return {-1, i}
+    end
+    local available = tonumber(stock[1]) - tonumber(stock[2] or 0)
+    if available < tonumber(ARGV[i + 2]) then
+        return {0, i, available}
+    end
+end
+for i = 1, count do
+    redis.call('HINCRBY', KEYS[i + 2], 'reserved', ARGV[i + 2])
+    redis.call('HSET', KEYS[1], KEYS[i + 2], ARGV[i + 2])
+end
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+return {1}
+"""
+
+# KEYS: reservation hash, expiry zset, dirty set, committed marker
+# ARGV: reservation_id, 'commit' or 'release', committed marker ttl seconds
+# The reservation hash holds sku key -> quantity, so the SKU keys are read from it.
+# Returns 1 when applied (or already committed), 0 when the reservation is gone.
+FINISH_SCRIPT = """
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    if ARGV[2] == 'commit' then
+        return 1
+    end
+    return 0
+end
+local lines = redis.call('HGETALL', KEYS[1])
+if #lines == 0 then
+    return 0
+end
+for i = 1, #lines, 2 do
+    local quantity = tonumber(lines[i + 1])
+    redis.call('HINCRBY', lines[i], 'reserved', -quantity)
+    if ARGV[2] == 'commit' then
+        redis.call('HINCRBY', lines[i], 'on_hand', -quantity)
+        redis.call('SADD', KEYS[3], lines[i])
+    end
+end
+if ARGV[2] == 'commit' then
+    redis.call('SET', KEYS[4], '1', 'EX', ARGV[3])
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return 1
+"""
+
+# KEYS: expiry zset; ARGV: now_ms, limit, reservation key prefix
+SWEEP_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, reservation_id in ipairs(expired) do
+    local reservation_key = ARGV[3] .. reservation_id
+    local lines = redis.call('HGETALL', reservation_key)
+    for i = 1, #lines, 2 do
+        redis.call('HINCRBY', lines[i], 'reserved', -tonumber(lines[i + 1]))
+    end
+    redis.call('DEL', reservation_key)
+    redis.call('ZREM', KEYS[1], reservation_id)
+end
+return #expired
+"""
+
+# KEYS: sku hash; ARGV: on_hand from Cosmos
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], 'on_hand', ARGV[1], 'reserved', 0)
+end
+return redis.call('HMGET', KEYS[1], 'on_hand', 'reserved')
+"""
+
+# KEYS: sku hash, dirty set; ARGV: 'set' or 'adjust', amount
+# Returns {on_hand, reserved}, or {} when on_hand would fall below the reserved units
+UPDATE_STOCK_SCRIPT = """
+local stock = redis.call('HMGET', KEYS[1], 'on_hand', 'reserved')
+local reserved = tonumber(stock[2] or 0)
+local on_hand = tonumber(ARGV[2])
+if ARGV[1] == 'adjust' then
+    on_hand = tonumber(stock[1] or 0) + on_hand
+end
+if on_hand < reserved then
+    return {}
+end
+redis.call('HSET', KEYS[1], 'on_hand', on_hand, 'reserved', reserved)
+redis.call('SADD', KEYS[2], KEYS[1])
+return {on_hand, reserved}
+"""
+
+
+def sku_key(sku: str) -> str:
+    return f"{SKU_KEY_PREFIX}{sku}"
+
+
+class InventoryStoreRepository:
+    """Live stock counters in Redis.
+
+    Each SKU is a hash with `on_hand` (units physically available) and
+    `reserved` (units held by open reservations). A reservation hash maps
+    SKU keys to quantities and is indexed by expiry time. Reserve, commit,
+    release and the expiry sweep are each one Lua script, so the check and
+    the update can never interleave with another request and stock cannot
+    be oversold. The scripts derive SKU keys from reservation contents, so
+    this targets a single Redis node, like the rest of the service.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._reserve = redis.register_script(RESERVE_SCRIPT)
+        self._finish = redis.register_script(FINISH_SCRIPT)
+        self._sweep = redis.register_script(SWEEP_SCRIPT)
+        self._load = redis.register_script(LOAD_SCRIPT)
+        self._update_stock = redis.register_script(UPDATE_STOCK_SCRIPT)
+
+    def _reservation_key(self, reservation_id: str) -> str:
+        return f"{RESERVATION_KEY_PREFIX}{reservation_id}"
+
+    async def reserve(self, reservation_id: str, lines: list, expires_at_ms: int) -> list:
+        """`lines` is [(sku, quantity)]; returns the raw script result"""
+        keys = [self._reservation_key(reservation_id), RESERVATION_EXPIRY_KEY] + [sku_key(sku) for sku, _ in lines]
+        args = [reservation_id, expires_at_ms] + [quantity for _, quantity in lines]
+        return [int(value) for value in await self._reserve(keys=keys, args=args)]
+
+    async def finish(self, reservation_id: str, action: str, committed_ttl: int) -> bool:
+        keys = [
+            self._reservation_key(reservation_id),
+            RESERVATION_EXPIRY_KEY,
+            DIRTY_SKUS_KEY,
+            f"inventory:committed:{reservation_id}"
+        ]
+        return bool(await self._finish(keys=keys, args=[reservation_id, action, committed_ttl]))
+
+    async def sweep_expired(self, now_ms: int, limit: int) -> int:
+        return int(await self._sweep(keys=[RESERVATION_EXPIRY_KEY], args=[now_ms, limit, RESERVATION_KEY_PREFIX]))
+
+    async def load(self, sku: str, on_hand: int):
+        on_hand, reserved = await self._load(keys=[sku_key(sku)], args=[on_hand])
+        return {"sku": sku, "on_hand": int(on_hand), "reserved": int(reserved)}
+
+    async def update_stock(self, sku: str, action: str, amount: int):
+        result = await self._update_stock(keys=[sku_key(sku), DIRTY_SKUS_KEY], args=[action, amount])
+        if not result:
+            return None
+        return {"sku": sku, "on_hand": int(result[0]), "reserved": int(result[1])}
+
+    async def get_stock(self, skus: list) -> dict:
+        """Return {sku: {on_hand, reserved}} for the SKUs present in Redis"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sku in skus:
+                pipe.hmget(sku_key(sku), "on_hand", "reserved")
+            results = await pipe.execute()
+        return {
+            sku: {"sku": sku, "on_hand": int(on_hand), "reserved": int(reserved or 0)}
+            for sku, (on_hand, reserved) in zip(skus, results) if on_hand is not None
+        }
+
+    async def is_untracked(self, skus: list) -> dict:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sku in skus:
+                pipe.exists(f"inventory:untracked:{sku}")
+            results = await pipe.execute()
+        return {sku: bool(found) for sku, found in zip(skus, results)}
+
+    async def mark_untracked(self, skus: list, ttl: int):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sku in skus:
+                pipe.set(f"inventory:untracked:{sku}", "1", ex=ttl)
+            await pipe.execute()
+
+    async def clear_untracked(self, sku: str):
+        await self.redis.delete(f"inventory:untracked:{sku}")
+
+    async def pop_dirty(self, count: int) -> list:
+        keys = await self.redis.spop(DIRTY_SKUS_KEY, count) or []
+        return [key[len(SKU_KEY_PREFIX):] for key in keys]
+
+    async def mark_dirty(self, *skus: str):
+        if skus:
+            await self.redis.sadd(DIRTY_SKUS_KEY, *(sku_key(sku) for sku in skus))
+
+
+_inventory_store = None
+
+
+def get_inventory_store() -> InventoryStoreRepository:
+    global _inventory_store
+    if _inventory_store is None:
+        _inventory_store = InventoryStoreRepository(create_redis_client())
+    return _inventory_store
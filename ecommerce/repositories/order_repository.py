@@ -1,20 +1,122 @@
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import CosmosBatchOperationError, CosmosResourceNotFoundError
 from db.database import order_container
+from db.pagination import query_page
+from datetime import datetime, timedelta
+
+ORDER_TYPE = "order"
+OUTBOX_TYPE = "outbox"
+
+
+class OrderAlreadyExistsError(Exception):
+    """An order with this id was already written (a retried checkout)"""
+
 
 class OrderRepository:
+    """Orders and outbox records, both partitioned by user_id.
+
+    An order is written together with its outbox record in a single
+    transactional batch, so either both exist or neither does.
+    """
+
+    def create_order_with_outbox(self, order: dict, outbox: dict):
+        operations = [
+            ("create", (order,), {}),
+            ("create", (outbox,), {}),
+        ]
+        try:
+            results = order_container.execute_item_batch(batch_operations=operations, partition_key=order["user_id"])
+        except CosmosBatchOperationError as e:
+            if any(result.get("statusCode") == 409 for result in e.operation_responses):
+                raise OrderAlreadyExistsError(order["id"]) from e
+            raise
+        return results[0]["resourceBody"]
+
     def create_order(self, order_data):
         return order_container.create_item(body=order_data)
-    
-    def get_order_by_id(self, order_id):
+
+    def get_order(self, user_id: str, order_id: str):
         try:
-            order = order_container.read_item(item=order_id, partition_key=order_id)
-            return order
-        except Exception as e:
-            print(f"Error retrieving order: {e}")
+            order = order_container.read_item(item=order_id, partition_key=user_id)
+        except CosmosResourceNotFoundError:
             return None
+        return order if order.get("type") == ORDER_TYPE else None
+
+    def get_orders_by_user(self, user_id: str, limit: int, continuation_token: str = None):
+        """One page of a user's orders, newest first; returns (orders, next continuation token)"""
+        query = "SELECT * FROM o WHERE o.type = @type ORDER BY o.type, o.created_at DESC"
+        return query_page(
+            order_container,
+            query,
+            [{"name": "@type", "value": ORDER_TYPE}],
+            limit,
+            continuation_token,
+            partition_key=user_id
+        )
+
+    def get_max_order_number(self, app_id: str, include_without_app: bool = False) -> int:
+        """Highest order number stored for a tenant (0 if none); orders without an app_id belong to the default one"""
+        condition = "o.app_id = @app_id"
+        if include_without_app:
+            condition = f"({condition} OR NOT IS_DEFINED(o.app_id) OR IS_NULL(o.app_id))"
+        query = f"SELECT VALUE MAX(o.order_number) FROM o WHERE o.type = @type AND {condition}"
+        result = list(order_container.query_items(
+            query=query,
+            parameters=[
+                {"name": "@type", "value": ORDER_TYPE},
+                {"name": "@app_id", "value": app_id}
+            ],
+            enable_cross_partition_query=True
+        ))
+        return int(result[0] or 0) if result else 0
 
-    def get_orders_by_user(self, user_id):
-        query = f"SELECT * FROM o WHERE o.user_id = '{user_id}'"
-        return list(order_container.query_items(query=query, enable_cross_partition_query=True))
+    def get_due_outbox_records(self, limit: int):
+        """Pending records, plus claimed ones whose lease ran out"""
+        now = datetime.utcnow().isoformat()
+        query = (
+            "SELECT TOP @limit * FROM o WHERE o.type = @type AND "
+            "(o.status = 'pending' OR (o.status = 'processing' AND o.lease_until < @now)) "
+            "ORDER BY o.type, o.created_at"
+        )
+        return list(order_container.query_items(
+            query=query,
+            parameters=[
+                {"name": "@type", "value": OUTBOX_TYPE},
+                {"name": "@now", "value": now},
+                {"name": "@limit", "value": limit}
+            ],
+            enable_cross_partition_query=True
+        ))
 
-        
+    def claim_outbox_record(self, record: dict, lease_seconds: int):
+        """Take a lease on a record; raises CosmosAccessConditionFailedError if another relay got it first"""
+        lease_until = (datetime.utcnow() + timedelta(seconds=lease_seconds)).isoformat()
+        return order_container.patch_item(
+            item=record["id"],
+            partition_key=record["user_id"],
+            patch_operations=[
+                {"op": "set", "path": "/status", "value": "processing"},
+                {"op": "set", "path": "/lease_until", "value": lease_until},
+                {"op": "incr", "path": "/attempts", "value": 1}
+            ],
+            etag=record["_etag"],
+            match_condition=MatchConditions.IfNotModified
+        )
 
+    def update_outbox_record(self, record: dict, status: str, effects: dict, last_error: str = None, retry_in: float = None):
+        """Save relay progress; `retry_in` keeps the record leased until its next attempt is due"""
+        operations = [
+            {"op": "set", "path": "/status", "value": status},
+            {"op": "set", "path": "/effects", "value": effects},
+            {"op": "set", "path": "/updated_at", "value": datetime.utcnow().isoformat()}
+        ]
+        if last_error is not None:
+            operations.append({"op": "set", "path": "/last_error", "value": last_error})
+        if retry_in is not None:
+            lease_until = (datetime.utcnow() + timedelta(seconds=retry_in)).isoformat()
+            operations.append({"op": "set", "path": "/lease_until", "value": lease_until})
+        return order_container.patch_item(
+            item=record["id"],
+            partition_key=record["user_id"],
+            patch_operations=operations
+        )
@@ -0,0 +1,30 @@
+import httpx
+
+from settings import settings
+
+
+class ProductRepository:
+    """Reads authoritative product data from the core item service"""
+
+    def __init__(self, client: httpx.AsyncClient = None):
+        self.client = client or httpx.AsyncClient(
+            base_url=settings.CORE_SERVICE_URL,
+            timeout=settings.PRODUCT_REQUEST_TIMEOUT
+        )
+
+    async def get_products_by_ids(self, product_ids: list) -> dict:
+        """Return {product_id: product} for the ids core knows about"""
+        products = {}
+        for start in range(0, len(product_ids), settings.PRODUCT_BATCH_SIZE):
+            chunk = product_ids[start:start + settings.PRODUCT_BATCH_SIZE]
+            response = await self.client.post("/items/batch", json={"ids": chunk})
+            response.raise_for_status()
+            body = response.json()
+            if body.get("status_code") != 200:
+                raise httpx.HTTPError(f"Core item batch failed: {body.get('message')}")
+            for product in body["data"]["items"]:
+                products[product["id"]] = product
+        return products
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,42 @@
+from db.database import promotion_container
+from datetime import datetime
+import uuid
+
+
+class PromotionRepository:
+    def get_active_promotions(self, app_id: str):
+        """All enabled promotions of an app; time windows are applied when compiling"""
+        query = "SELECT * FROM p WHERE p.app_id = @app_id AND p.active = true"
+        return list(promotion_container.query_items(
+            query=query,
+            parameters=[{"name": "@app_id", "value": app_id}],
+            partition_key=app_id
+        ))
+
+    def get_promotions(self, app_id: str):
+        query = "SELECT * FROM p WHERE p.app_id = @app_id ORDER BY p.app_id, p.created_at DESC"
+        return list(promotion_container.query_items(
+            query=query,
+            parameters=[{"name": "@app_id", "value": app_id}],
+            partition_key=app_id
+        ))
+
+    def create_promotion(self, promotion_data: dict):
+        now = datetime.utcnow().isoformat()
+        promotion_data.update({
+            "id": str(uuid.uuid4()),
+            "active": True,
+            "created_at": now,
+            "updated_at": now
+        })
+        return promotion_container.create_item(body=promotion_data)
+
+    def deactivate_promotion(self, app_id: str, promotion_id: str):
+        return promotion_container.patch_item(
+            item=promotion_id,
+            partition_key=app_id,
+            patch_operations=[
+                {"op": "set", "path": "/active", "value": False},
+                {"op": "set", "path": "/updated_at", "value": datetime.utcnow().isoformat()}
+            ]
+        )
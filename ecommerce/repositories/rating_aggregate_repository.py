@@ -0,0 +1,131 @@
+import asyncio
+
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError
+)
+from db.database import rating_aggregate_container
+from datetime import datetime
+
+RATINGS = ("1", "2", "3", "4", "5")
+
+
+class RatingAggregatesUnavailableError(Exception):
+    """The aggregates could not be read from Cosmos"""
+
+
+def empty_aggregate(product_id: str, seeded_through: str = None) -> dict:
+    """`seeded_through` is when counting of the product's reviews started (now by default)"""
+    now = datetime.utcnow().isoformat()
+    return {
+        "id": product_id,
+        "product_id": product_id,
+        "total_reviews": 0,
+        "rating_sum": 0,
+        "histogram": {rating: 0 for rating in RATINGS},
+        "seeded_through": seeded_through or now,
+        "updated_at": now
+    }
+
+
+class RatingAggregateRepository:
+    """Per-product review count, rating sum and star histogram.
+
+    Review writes apply their change as one patch of `incr` operations, which
+    Cosmos applies atomically, so concurrent reviews of a product never lose
+    an update. The document id is the product id.
+
+    An aggregate computed from the reviews themselves records in
+    `seeded_through` when that computation started. Reviews written before
+    then are already in its totals, so their deltas are skipped.
+    """
+
+    async def get_aggregate(self, product_id: str):
+        try:
+            return await asyncio.to_thread(rating_aggregate_container.read_item, item=product_id, partition_key=product_id)
+        except CosmosResourceNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error retrieving rating aggregate: {e}")
+            return None
+
+    async def get_aggregates(self, product_ids: list) -> list:
+        """Point-read many aggregates in one request; products without one are left out.
+
+        Raises RatingAggregatesUnavailableError if Cosmos cannot be read.
+        """
+        if not product_ids:
+            return []
+        try:
+            return await asyncio.to_thread(
+                rating_aggregate_container.read_items, items=[(product_id, product_id) for product_id in product_ids]
+            )
+        except Exception as e:
+            # Not an empty result: every product would look unreviewed and be recomputed
+            print(f"Error retrieving rating aggregates: {e}")
+            raise RatingAggregatesUnavailableError(str(e)) from e
+
+    async def _patch(self, product_id: str, operations: list, written_at: str):
+        # Conditional patch: fails with 412 when the aggregate was seeded after the review write
+        return await asyncio.to_thread(
+            rating_aggregate_container.patch_item,
+            item=product_id, partition_key=product_id, patch_operations=operations,
+            filter_predicate=f"FROM c WHERE NOT IS_DEFINED(c.seeded_through) OR c.seeded_through < '{written_at}'"
+        )
+
+    async def apply_delta(self, product_id: str, count_delta: int, rating_deltas: dict, written_at: str, seed=None):
+        """Add `count_delta` reviews and {rating: delta} stars to a product's aggregate.
+
+        `written_at` is when the review write that caused the delta started.
+        A product without an aggregate yet is created from `seed()` (the
+        product's current totals) rather than from the delta alone, so
+        products reviewed before aggregates existed start out complete.
+        A delta at or before the aggregate's `seeded_through` is not applied:
+        the seed already counted that review. Returns None when skipped.
+        """
+        sum_delta = sum(int(rating) * delta for rating, delta in rating_deltas.items())
+        operations = [
+            {"op": "incr", "path": "/total_reviews", "value": count_delta},
+            {"op": "incr", "path": "/rating_sum", "value": sum_delta},
+            {"op": "set", "path": "/updated_at", "value": datetime.utcnow().isoformat()}
+        ] + [
+            {"op": "incr", "path": f"/histogram/{rating}", "value": delta}
+            for rating, delta in rating_deltas.items() if delta
+        ]
+        try:
+            return await self._patch(product_id, operations, written_at)
+        except CosmosResourceNotFoundError:
+            pass
+        except CosmosAccessConditionFailedError:
+            return None
+
+        aggregate = await seed() if seed else None
+        if aggregate is None:
+            aggregate = empty_aggregate(product_id, written_at)
+            aggregate["total_reviews"] = count_delta
+            aggregate["rating_sum"] = sum_delta
+            for rating, delta in rating_deltas.items():
+                aggregate["histogram"][str(rating)] += delta
+        try:
+            return await asyncio.to_thread(rating_aggregate_container.create_item, body=aggregate)
+        except CosmosResourceExistsError:
+            # Created concurrently by another review of the same product
+            try:
+                return await self._patch(product_id, operations, written_at)
+            except CosmosAccessConditionFailedError:
+                return None
+
+    def create_aggregate(self, aggregate: dict):
+        return rating_aggregate_container.create_item(body=aggregate)
+
+    def save_aggregate(self, aggregate: dict):
+        return rating_aggregate_container.upsert_item(body=aggregate)
+
+    def delete_aggregate(self, product_id: str):
+        rating_aggregate_container.delete_item(item=product_id, partition_key=product_id)
+
+    def get_aggregate_ids(self):
+        return rating_aggregate_container.query_items(
+            query="SELECT VALUE a.id FROM a", enable_cross_partition_query=True
+        )
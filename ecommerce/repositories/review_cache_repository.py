@@ -0,0 +1,83 @@
+import json
+
+from db.redis_client import create_redis_client
+from settings import settings
+
+
+class ReviewCacheRepository:
+    """Cached review page data per product, in Redis.
+
+    Every entry records the product's cache version from before the data
+    was read, and invalidation bumps the version. A read that raced with a
+    review write therefore caches data that is already outdated, and it is
+    ignored, instead of serving it until the TTL runs out. Entries of an old
+    version are never read again and simply expire; the version counters
+    themselves are kept (one small key per reviewed product).
+    """
+
+    FIRST_PAGE = "first_page"
+    SUMMARY = "summary"
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def _key(self, kind: str, product_id: str) -> str:
+        return f"reviews:{kind}:{product_id}"
+
+    def _version_key(self, product_id: str) -> str:
+        return f"reviews:version:{product_id}"
+
+    async def get(self, kind: str, product_id: str):
+        """Return (cached value or None, current version)"""
+        cached, version = await self.redis.mget(self._key(kind, product_id), self._version_key(product_id))
+        version = int(version or 0)
+        if cached:
+            entry = json.loads(cached)
+            if entry.get("version") == version:
+                return entry["value"], version
+        return None, version
+
+    async def set(self, kind: str, product_id: str, value, version: int):
+        entry = json.dumps({"version": version, "value": value}, default=str)
+        await self.redis.set(self._key(kind, product_id), entry, ex=settings.REVIEW_CACHE_TTL)
+
+    async def get_many(self, kind: str, product_ids: list):
+        """Return ({product_id: cached value} for valid entries, {product_id: current version})"""
+        keys = [self._key(kind, product_id) for product_id in product_ids]
+        keys += [self._version_key(product_id) for product_id in product_ids]
+        results = await self.redis.mget(keys)
+        values, versions = {}, {}
+        for product_id, cached, version in zip(product_ids, results, results[len(product_ids):]):
+            versions[product_id] = int(version or 0)
+            if cached:
+                entry = json.loads(cached)
+                if entry.get("version") == versions[product_id]:
+                    values[product_id] = entry["value"]
+        return values, versions
+
+    async def set_many(self, kind: str, entries: dict):
+        """`entries` maps product_id to (value, version)"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for product_id, (value, version) in entries.items():
+                entry = json.dumps({"version": version, "value": value}, default=str)
+                pipe.set(self._key(kind, product_id), entry, ex=settings.REVIEW_CACHE_TTL)
+            await pipe.execute()
+
+    async def invalidate(self, *product_ids: str):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for product_id in product_ids:
+                # Never expires: a version that reset to 0 would make entries
+                # cached by reads that raced with earlier writes valid again
+                pipe.incr(self._version_key(product_id))
+                pipe.delete(self._key(self.SUMMARY, product_id))
+            await pipe.execute()
+
+
+_review_cache = None
+
+
+def get_review_cache() -> ReviewCacheRepository:
+    global _review_cache
+    if _review_cache is None:
+        _review_cache = ReviewCacheRepository(create_redis_client())
+    return _review_cache
@@ -1,19 +1,45 @@
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError
+)
 from db.database import review_container
+from db.pagination import decode_keyset_cursor, query_keyset_page
 from datetime import datetime
-import uuid
+import asyncio
+import hashlib
+import json
+
+# Placeholder author for reviews whose user was deleted
+DELETED_USER_ID = "deleted-user"
+
+
+class ReviewAlreadyExistsError(Exception):
+    """The user already has a review of this product"""
+
+
+def review_id_for(user_id: str, product_id: str) -> str:
+    """A user's review of a product always has this id, so there can only be one.
+
+    The pair is JSON-encoded before hashing so ids containing the separator
+    cannot collide (e.g. "a:b" + "c" and "a" + "b:c").
+    """
+    return hashlib.sha256(json.dumps([user_id, product_id], separators=(",", ":")).encode()).hexdigest()
 
 
 class ReviewRepository:
     async def create_review(self, review_data: dict):
-        """Create a new review"""
+        """Create a new review; raises ReviewAlreadyExistsError for a second review of the same product"""
         try:
-            review_id = str(uuid.uuid4())
             review_data.update({
-                "id": review_id,
+                "id": review_id_for(review_data["user_id"], review_data["product_id"]),
                 "created_at": datetime.utcnow().isoformat(),
                 "updated_at": datetime.utcnow().isoformat()
             })
-            return review_container.create_item(body=review_data)
+            return await asyncio.to_thread(review_container.create_item, body=review_data)
+        except CosmosResourceExistsError as e:
+            raise ReviewAlreadyExistsError(review_data["id"]) from e
         except Exception as e:
             print(f"Error creating review: {e}")
             return None
@@ -21,41 +47,47 @@ class ReviewRepository:
     async def get_review_by_id(self, review_id: str):
         """Get review by ID"""
         try:
-            review = review_container.read_item(item=review_id, partition_key=review_id)
+            review = await asyncio.to_thread(review_container.read_item, item=review_id, partition_key=review_id)
             return review
         except Exception as e:
             print(f"Error retrieving review: {e}")
             return None
 
-    async def get_reviews_by_product(self, product_id: str, limit: int = 50, offset: int = 0):
-        """Get all reviews for a specific product with pagination"""
-        try:
-            query = f"SELECT * FROM r WHERE r.product_id = '{product_id}' ORDER BY r.created_at DESC OFFSET {offset} LIMIT {limit}"
-            return list(review_container.query_items(query=query, enable_cross_partition_query=True))
-        except Exception as e:
-            print(f"Error retrieving reviews by product: {e}")
-            return []
+    async def get_reviews_by_product(self, product_id: str, limit: int = 50, continuation_token: str = None):
+        """Get one page of a product's reviews, newest first; returns (reviews, next continuation token)"""
+        decode_keyset_cursor(continuation_token)
+        return await asyncio.to_thread(
+            query_keyset_page, review_container, "r", "r.product_id = @product_id",
+            [{"name": "@product_id", "value": product_id}], "r.product_id", limit, continuation_token,
+            enable_cross_partition_query=True
+        )
 
-    async def get_reviews_by_user(self, user_id: str, limit: int = 50, offset: int = 0):
-        """Get all reviews by a specific user with pagination"""
-        try:
-            query = f"SELECT * FROM r WHERE r.user_id = '{user_id}' ORDER BY r.created_at DESC OFFSET {offset} LIMIT {limit}"
-            return list(review_container.query_items(query=query, enable_cross_partition_query=True))
-        except Exception as e:
-            print(f"Error retrieving reviews by user: {e}")
-            return []
+    async def get_reviews_by_user(self, user_id: str, limit: int = 50, continuation_token: str = None):
+        """Get one page of a user's reviews, newest first; returns (reviews, next continuation token)"""
+        decode_keyset_cursor(continuation_token)
+        return await asyncio.to_thread(
+            query_keyset_page, review_container, "r", "r.user_id = @user_id",
+            [{"name": "@user_id", "value": user_id}], "r.user_id", limit, continuation_token,
+            enable_cross_partition_query=True
+        )
 
-    async def update_review(self, review_id: str, updated_data: dict):
-        """Update an existing review"""
+    async def update_review(self, review: dict, updated_data: dict):
+        """Update a review read earlier.
+
+        The replace is guarded by the review's ETag and raises
+        CosmosAccessConditionFailedError if it changed since it was read.
+        """
         try:
-            review = await self.get_review_by_id(review_id)
-            if review:
-                updated_data["updated_at"] = datetime.utcnow().isoformat()
-                for key, value in updated_data.items():
-                    review[key] = value
-                review_container.replace_item(item=review, body=review)
-                return review
-            return None
+            updated = {**review, **updated_data, "updated_at": datetime.utcnow().isoformat()}
+            return await asyncio.to_thread(
+                review_container.replace_item,
+                item=review["id"],
+                body=updated,
+                etag=review["_etag"],
+                match_condition=MatchConditions.IfNotModified
+            )
+        except CosmosAccessConditionFailedError:
+            raise
         except Exception as e:
             print(f"Error updating review: {e}")
             return None
@@ -63,39 +95,59 @@ class ReviewRepository:
     async def delete_review(self, review_id: str):
         """Delete a review"""
         try:
-            review_container.delete_item(item=review_id, partition_key=review_id)
+            await asyncio.to_thread(review_container.delete_item, item=review_id, partition_key=review_id)
             return True
         except Exception as e:
             print(f"Error deleting review: {e}")
             return False
 
     async def get_product_rating_stats(self, product_id: str):
-        """Get rating statistics for a product"""
-        try:
-            query = f"""
-            SELECT 
-                COUNT(1) as total_reviews,
-                AVG(r.rating) as average_rating,
-                SUM(CASE WHEN r.rating = 5 THEN 1 ELSE 0 END) as five_stars,
-                SUM(CASE WHEN r.rating = 4 THEN 1 ELSE 0 END) as four_stars,
-                SUM(CASE WHEN r.rating = 3 THEN 1 ELSE 0 END) as three_stars,
-                SUM(CASE WHEN r.rating = 2 THEN 1 ELSE 0 END) as two_stars,
-                SUM(CASE WHEN r.rating = 1 THEN 1 ELSE 0 END) as one_star
-            FROM r 
-            WHERE r.product_id = '{product_id}'
-            """
-            result = list(review_container.query_items(query=query, enable_cross_partition_query=True))
-            return result[0] if result else None
-        except Exception as e:
-            print(f"Error getting rating stats: {e}")
-            return None
+        """Get rating statistics for a product; query errors propagate so they are never mistaken for no reviews"""
+        query = """
+        SELECT 
+            COUNT(1) as total_reviews,
+            AVG(r.rating) as average_rating,
+            SUM(CASE WHEN r.rating = 5 THEN 1 ELSE 0 END) as five_stars,
+            SUM(CASE WHEN r.rating = 4 THEN 1 ELSE 0 END) as four_stars,
+            SUM(CASE WHEN r.rating = 3 THEN 1 ELSE 0 END) as three_stars,
+            SUM(CASE WHEN r.rating = 2 THEN 1 ELSE 0 END) as two_stars,
+            SUM(CASE WHEN r.rating = 1 THEN 1 ELSE 0 END) as one_star
+        FROM r 
+        WHERE r.product_id = @product_id
+        """
+        parameters = [{"name": "@product_id", "value": product_id}]
+        result = await asyncio.to_thread(lambda: list(
+            review_container.query_items(query=query, parameters=parameters, enable_cross_partition_query=True)
+        ))
+        return result[0] if result else None
 
     async def check_user_review_exists(self, user_id: str, product_id: str):
         """Check if user has already reviewed this product"""
+        review_id = review_id_for(user_id, product_id)
         try:
-            query = f"SELECT * FROM r WHERE r.user_id = '{user_id}' AND r.product_id = '{product_id}'"
-            reviews = list(review_container.query_items(query=query, enable_cross_partition_query=True))
-            return reviews[0] if reviews else None
+            return await asyncio.to_thread(review_container.read_item, item=review_id, partition_key=review_id)
+        except CosmosResourceNotFoundError:
+            return None
         except Exception as e:
             print(f"Error checking user review: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_review_ids_by_user(self, user_id: str):
+        query = "SELECT VALUE r.id FROM r WHERE r.user_id = @user_id"
+        return review_container.query_items(
+            query=query,
+            parameters=[{"name": "@user_id", "value": user_id}],
+            enable_cross_partition_query=True
+        )
+
+    def anonymize_review(self, review_id: str):
+        """Detach a review from its author while keeping the rating; returns the patched review"""
+        return review_container.patch_item(
+            item=review_id,
+            partition_key=review_id,
+            patch_operations=[
+                {"op": "set", "path": "/user_id", "value": DELETED_USER_ID},
+                {"op": "set", "path": "/user_name", "value": None},
+                {"op": "set", "path": "/updated_at", "value": datetime.utcnow().isoformat()}
+            ]
+        )
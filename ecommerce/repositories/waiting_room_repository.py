@@ -0,0 +1,123 @@
+from db.redis_client import create_redis_client
+
+QUEUE_KEY = "waiting_room:queue"
+SEQUENCE_KEY = "waiting_room:sequence"
+# Token bucket of the admission rate: allowance and the time it was last topped up
+ADMISSION_STATE_KEY = "waiting_room:admission"
+TICKET_KEY_PREFIX = "waiting_room:ticket:"
+
+# KEYS: queue, sequence, ticket hash, user's ticket pointer
+# ARGV: ticket_id, user_id, ticket ttl seconds, ticket key prefix
+# A user who is already queued (or admitted) gets their existing ticket back.
+JOIN_SCRIPT = """
+local existing = redis.call('GET', KEYS[4])
+if existing and redis.call('EXISTS', ARGV[4] .. existing) == 1 then
+    return existing
+end
+local sequence = redis.call('INCR', KEYS[2])
+redis.call('HSET', KEYS[3], 'user_id', ARGV[2], 'status', 'waiting')
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+redis.call('SET', KEYS[4], ARGV[1], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[1], sequence, ARGV[1])
+return ARGV[1]
+"""
+
+# KEYS: queue, admission state
+# ARGV: admits per second, burst, ticket key prefix, max tickets to scan, admitted ticket ttl
+# Tops up the allowance for the time since the last call and admits that many
+# tickets from the head of the queue. Tickets whose hash expired (the holder
+# stopped polling) are dropped without using up the allowance.
+ADMIT_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local state = redis.call('HMGET', KEYS[2], 'allowance', 'last_ms')
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local allowance = tonumber(state[1] or burst)
+local last_ms = tonumber(state[2] or now_ms)
+allowance = math.min(burst, allowance + math.max(now_ms - last_ms, 0) * rate / 1000)
+local admitted = 0
+local scanned = 0
+while allowance >= 1 and scanned < tonumber(ARGV[4]) do
+    local head = redis.call('ZPOPMIN', KEYS[1])
+    if #head == 0 then
+        break
+    end
+    scanned = scanned + 1
+    local ticket_key = ARGV[3] .. head[1]
+    if redis.call('EXISTS', ticket_key) == 1 then
+        redis.call('HSET', ticket_key, 'status', 'admitted', 'admitted_at', now_ms)
+        redis.call('EXPIRE', ticket_key, ARGV[5])
+        allowance = allowance - 1
+        admitted = admitted + 1
+    end
+end
+redis.call('HSET', KEYS[2], 'allowance', tostring(allowance), 'last_ms', now_ms)
+return admitted
+"""
+
+
+class WaitingRoomRepository:
+    """Checkout admission queue in Redis.
+
+    Tickets are ordered in a sorted set by a global sequence number, so the
+    queue is first come, first served and a ticket's rank is its position.
+    Admission is a token bucket evaluated inside Lua on every join and poll,
+    so no background process is needed and replicas share one rate.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._join = redis.register_script(JOIN_SCRIPT)
+        self._admit = redis.register_script(ADMIT_SCRIPT)
+
+    def _ticket_key(self, ticket_id: str) -> str:
+        return f"{TICKET_KEY_PREFIX}{ticket_id}"
+
+    def _user_key(self, user_id: str) -> str:
+        return f"waiting_room:user:{user_id}"
+
+    async def join(self, ticket_id: str, user_id: str, ticket_ttl: int) -> str:
+        """Queue a new ticket; returns the ticket id actually holding the user's place"""
+        keys = [QUEUE_KEY, SEQUENCE_KEY, self._ticket_key(ticket_id), self._user_key(user_id)]
+        return await self._join(keys=keys, args=[ticket_id, user_id, ticket_ttl, TICKET_KEY_PREFIX])
+
+    async def admit(self, rate: float, burst: int, max_scan: int, admitted_ttl: int) -> int:
+        keys = [QUEUE_KEY, ADMISSION_STATE_KEY]
+        return int(await self._admit(keys=keys, args=[rate, burst, TICKET_KEY_PREFIX, max_scan, admitted_ttl]))
+
+    async def get_ticket(self, ticket_id: str, ticket_ttl: int):
+        """Return the ticket with its queue position, extending a waiting ticket's TTL.
+
+        The user's pointer to the ticket is extended with it; otherwise it
+        expires first and a rejoin would queue the user a second time.
+        """
+        ticket_key = self._ticket_key(ticket_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(ticket_key)
+            pipe.zrank(QUEUE_KEY, ticket_id)
+            ticket, rank = await pipe.execute()
+        if not ticket:
+            return None
+        if ticket.get("status") == "waiting":
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.expire(ticket_key, ticket_ttl)
+                if ticket.get("user_id"):
+                    pipe.expire(self._user_key(ticket["user_id"]), ticket_ttl)
+                await pipe.execute()
+        ticket["ticket_id"] = ticket_id
+        ticket["position"] = rank + 1 if rank is not None else 0
+        return ticket
+
+    async def queue_length(self) -> int:
+        return await self.redis.zcard(QUEUE_KEY)
+
+
+_waiting_room_repository = None
+
+
+def get_waiting_room_repository() -> WaitingRoomRepository:
+    global _waiting_room_repository
+    if _waiting_room_repository is None:
+        _waiting_room_repository = WaitingRoomRepository(create_redis_client())
+    return _waiting_room_repository
@@ -20,11 +20,11 @@ Body:
 GET /reviews/{review_id}
 
 ### 3. Get Product Reviews with Summary
-GET /reviews/product/{product_id}?limit=50&offset=0
+GET /reviews/product/{product_id}?limit=50&continuation_token=...
 - Returns reviews with rating summary and pagination
 
 ### 4. Get User Reviews
-GET /reviews/user/{user_id}?limit=50&offset=0
+GET /reviews/user/{user_id}?limit=50&continuation_token=...
 
 ### 5. Get Product Rating Summary
 GET /reviews/product/{product_id}/summary
@@ -99,7 +99,7 @@ async def example_review_usage():
         print("Updated review:", updated_review)
     
     # Get user's reviews
-    user_reviews = await review_service.get_user_reviews(user_id)
+    user_reviews, _ = await review_service.get_user_reviews(user_id)
     print("User reviews:", user_reviews)
     
     # Delete review
@@ -230,7 +230,7 @@ async def test_review_functionality():
         
         # Test 7: Get user reviews
         print("=== Test 7: Get user reviews ===")
-        user_reviews = await review_service.get_user_reviews(user_id)
+        user_reviews, _ = await review_service.get_user_reviews(user_id)
         print(f"User reviews: {user_reviews}\n")
         
         # Test 8: Try unauthorized update (should fail)
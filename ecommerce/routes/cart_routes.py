@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
 from schemas.cart_schema import (
     AddToCartRequest, 
@@ -7,21 +7,26 @@ from schemas.cart_schema import (
     CartResponse,
     CartSummaryResponse
 )
-from services.cart_service import CartService
-from repositories.cart_repository import CartRepository
+from services.cart_service import CartService, create_cart_service
+from services.product_service import CatalogUnavailableError, ProductUnavailableError
+from typing import Optional
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
 # Dependency injection
 def get_cart_service():
-    cart_repository = CartRepository()
-    return CartService(cart_repository)
+    return create_cart_service()
 
 
 @router.get("/{user_id}", response_model=CartResponse)
-async def get_cart(user_id: str, cart_service: CartService = Depends(get_cart_service)):
+async def get_cart(
+    user_id: str,
+    app_id: Optional[str] = Query(None, description="App whose promotions apply"),
+    coupon: Optional[str] = Query(None, description="Coupon code"),
+    cart_service: CartService = Depends(get_cart_service)
+):
     try:
-        cart = await cart_service.get_cart(user_id)
+        cart = await cart_service.get_priced_cart(user_id, app_id, coupon)
         if not cart:
             raise HTTPException(status_code=404, detail="Cart not found")
         
@@ -40,6 +45,8 @@ async def add_to_cart(
         product = {
             "product_id": request.product_id,
             "name": request.name,
+            "image": request.image,
+            "category": request.category,
             "price": request.price
         }
         
@@ -54,6 +61,12 @@ async def add_to_cart(
                 "cart": cart_service.map_to_cart_detail_dto(cart)
             }
         )
+    except ProductUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except CatalogUnavailableError:
+        raise HTTPException(status_code=503, detail="Product catalog unavailable, try again later")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -127,15 +140,20 @@ async def clear_cart(
 @router.get("/{user_id}/summary", response_model=CartSummaryResponse)
 async def get_cart_summary(
     user_id: str,
+    app_id: Optional[str] = Query(None, description="App whose promotions apply"),
+    coupon: Optional[str] = Query(None, description="Coupon code"),
     cart_service: CartService = Depends(get_cart_service)
 ):
     try:
-        cart = await cart_service.get_cart(user_id)
+        cart = await cart_service.get_priced_cart(user_id, app_id, coupon)
         if not cart:
             raise HTTPException(status_code=404, detail="Cart not found")
         
         return CartSummaryResponse(
             items_count=len(cart["items"]),
+            subtotal=cart.get("subtotal"),
+            discount_total=cart.get("discount_total", 0.0),
+            discounts=cart.get("discounts", []),
             total_price=cart["total_price"],
             items=cart["items"]
         )
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Depends
+from schemas.inventory_schema import AdjustStockRequest, SetStockRequest, StockResponse
+from services.inventory_service import InsufficientStockError, InventoryService, get_inventory_service
+
+router = APIRouter(prefix="/inventory", tags=["Inventory"])
+
+
+@router.get("/{sku}", response_model=StockResponse)
+async def get_stock(
+    sku: str,
+    inventory_service: InventoryService = Depends(get_inventory_service)
+):
+    try:
+        stock = await inventory_service.get_stock(sku)
+        if not stock:
+            raise HTTPException(status_code=404, detail="SKU is not stock-tracked")
+        return StockResponse(**stock)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.put("/{sku}", response_model=StockResponse)
+async def set_stock(
+    sku: str,
+    request: SetStockRequest,
+    inventory_service: InventoryService = Depends(get_inventory_service)
+):
+    """Set the on-hand stock of a SKU (starts tracking it if it was not tracked)"""
+    try:
+        stock = await inventory_service.set_stock(sku, request.on_hand)
+        return StockResponse(**stock)
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/{sku}/adjust", response_model=StockResponse)
+async def adjust_stock(
+    sku: str,
+    request: AdjustStockRequest,
+    inventory_service: InventoryService = Depends(get_inventory_service)
+):
+    try:
+        stock = await inventory_service.adjust_stock(sku, request.delta)
+        return StockResponse(**stock)
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import JSONResponse
+from db.pagination import InvalidContinuationTokenError
+from schemas.order_schema import CheckoutRequest, OrderListResponse, OrderResponse
+from services.order_service import CheckoutError, OrderService, create_order_service
+from services.product_service import CatalogUnavailableError
+from settings import settings
+from typing import Optional
+from utils import verify_admission_token
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+# Dependency injection
+def get_order_service():
+    return create_order_service()
+
+
+def require_admission(
+    user_id: str,
+    admission_token: Optional[str] = Header(None, alias="X-Admission-Token")
+):
+    """Let checkout through only with a waiting room token issued to this user"""
+    if not settings.WAITING_ROOM_ENABLED:
+        return
+    if not admission_token or not verify_admission_token(admission_token, user_id):
+        raise HTTPException(
+            status_code=403,
+            detail=f"Checkout requires a valid admission token; join the waiting room at /waiting-room/{user_id}/join"
+        )
+
+
+@router.post(
+    "/{user_id}/checkout",
+    response_model=OrderResponse,
+    status_code=201,
+    dependencies=[Depends(require_admission)]
+)
+async def checkout(
+    user_id: str,
+    request: CheckoutRequest,
+    idempotency_key: str = Header(..., alias="Idempotency-Key", min_length=8, max_length=128),
+    order_service: OrderService = Depends(get_order_service)
+):
+    """Place an order from the user's cart; retries with the same Idempotency-Key return the same order"""
+    try:
+        order = await order_service.checkout(user_id, idempotency_key, request.model_dump(mode="json"))
+        return OrderResponse(**order)
+    except CheckoutError as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message, "errors": e.details})
+    except CatalogUnavailableError:
+        raise HTTPException(status_code=503, detail="Product catalog unavailable, try again later")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/{user_id}", response_model=OrderListResponse)
+async def get_orders(
+    user_id: str,
+    limit: int = Query(default=settings.ORDER_PAGE_SIZE, ge=1, le=100, description="Number of orders per page"),
+    continuation_token: Optional[str] = Query(None, description="Token from the previous page"),
+    order_service: OrderService = Depends(get_order_service)
+):
+    """Get the user's orders newest first, one page at a time"""
+    try:
+        orders, next_token = await order_service.get_orders(user_id, limit, continuation_token)
+        return OrderListResponse(
+            orders=[OrderResponse(**order) for order in orders],
+            pagination={"limit": limit, "continuation_token": next_token, "has_more": next_token is not None}
+        )
+    except InvalidContinuationTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/{user_id}/{order_id}", response_model=OrderResponse)
+async def get_order(
+    user_id: str,
+    order_id: str,
+    order_service: OrderService = Depends(get_order_service)
+):
+    try:
+        order = await order_service.get_order(user_id, order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return OrderResponse(**order)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Depends
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from schemas.promotion_schema import CreatePromotionRequest, PromotionResponse
+from services.promotion_service import PromotionService, get_promotion_service
+from typing import List
+
+router = APIRouter(prefix="/promotions", tags=["Promotions"])
+
+
+@router.post("/{app_id}", response_model=PromotionResponse)
+async def create_promotion(
+    app_id: str,
+    request: CreatePromotionRequest,
+    promotion_service: PromotionService = Depends(get_promotion_service)
+):
+    """Create a promotion; carts of the app see it within the version check interval"""
+    try:
+        data = request.model_dump(mode="json")
+        if data.get("code"):
+            data["code"] = data["code"].upper()
+        promotion = await promotion_service.create_promotion(app_id, data)
+        return PromotionResponse(**promotion)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/{app_id}", response_model=List[PromotionResponse])
+async def get_promotions(
+    app_id: str,
+    promotion_service: PromotionService = Depends(get_promotion_service)
+):
+    try:
+        promotions = await promotion_service.get_promotions(app_id)
+        return [PromotionResponse(**promotion) for promotion in promotions]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.delete("/{app_id}/{promotion_id}", response_model=PromotionResponse)
+async def deactivate_promotion(
+    app_id: str,
+    promotion_id: str,
+    promotion_service: PromotionService = Depends(get_promotion_service)
+):
+    try:
+        promotion = await promotion_service.deactivate_promotion(app_id, promotion_id)
+        return PromotionResponse(**promotion)
+    except CosmosResourceNotFoundError:
+        raise HTTPException(status_code=404, detail="Promotion not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
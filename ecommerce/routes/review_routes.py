@@ -1,23 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from fastapi.responses import JSONResponse
 from schemas.review_schema import (
     CreateReviewRequest,
     UpdateReviewRequest,
     ReviewResponse,
     ReviewsWithSummaryResponse,
-    RatingSummary
+    RatingSummary,
+    RatingSummariesRequest,
+    RatingSummariesResponse
 ) 
 
+from db.pagination import InvalidContinuationTokenError
 from services.review_service import ReviewService
 from repositories.review_repository import ReviewRepository
-from typing import List
+from repositories.rating_aggregate_repository import RatingAggregateRepository, RatingAggregatesUnavailableError
+from repositories.review_cache_repository import get_review_cache
+from typing import List, Optional
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 # Dependency injection
 def get_review_service():
     review_repository = ReviewRepository()
-    return ReviewService(review_repository)
+    return ReviewService(review_repository, RatingAggregateRepository(), get_review_cache())
 
 
 @router.post("/", response_model=ReviewResponse)
@@ -70,7 +75,7 @@ async def get_review(
 async def get_product_reviews(
     product_id: str,
     limit: int = Query(default=50, ge=1, le=100, description="Number of reviews per page"),
-    offset: int = Query(default=0, ge=0, description="Number of reviews to skip"),
+    continuation_token: Optional[str] = Query(None, description="Token from the previous page's pagination"),
     review_service: ReviewService = Depends(get_review_service)
 ):
     """Get all reviews for a specific product with rating summary and pagination"""
@@ -78,7 +83,7 @@ async def get_product_reviews(
         result = await review_service.get_reviews_with_rating_summary(
             product_id=product_id,
             limit=limit,
-            offset=offset
+            continuation_token=continuation_token
         )
         
         reviews = [ReviewResponse(**review) for review in result["reviews"]]
@@ -88,6 +93,8 @@ async def get_product_reviews(
             rating_summary=result["rating_summary"],
             pagination=result["pagination"]
         )
+    except InvalidContinuationTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -95,14 +102,24 @@ async def get_product_reviews(
 @router.get("/user/{user_id}", response_model=List[ReviewResponse])
 async def get_user_reviews(
     user_id: str,
+    response: Response,
     limit: int = Query(default=50, ge=1, le=100, description="Number of reviews per page"),
-    offset: int = Query(default=0, ge=0, description="Number of reviews to skip"),
+    continuation_token: Optional[str] = Query(None, description="X-Continuation-Token of the previous page"),
     review_service: ReviewService = Depends(get_review_service)
 ):
-    """Get all reviews by a specific user with pagination"""
+    """Get all reviews by a specific user with pagination.
+
+    The token for the next page is returned in the X-Continuation-Token
+    header, and X-Has-More tells whether there is one.
+    """
     try:
-        reviews = await review_service.get_user_reviews(user_id, limit, offset)
+        reviews, next_token = await review_service.get_user_reviews(user_id, limit, continuation_token)
+        if next_token:
+            response.headers["X-Continuation-Token"] = next_token
+        response.headers["X-Has-More"] = "true" if next_token else "false"
         return [ReviewResponse(**review) for review in reviews]
+    except InvalidContinuationTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -120,6 +137,21 @@ async def get_product_rating_summary(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/summaries", response_model=RatingSummariesResponse)
+async def get_rating_summaries(
+    request: RatingSummariesRequest,
+    review_service: ReviewService = Depends(get_review_service)
+):
+    """Get rating summaries of many products (e.g. a listing page) in one call"""
+    try:
+        summaries = await review_service.get_rating_summaries(request.product_ids)
+        return RatingSummariesResponse(summaries=summaries)
+    except RatingAggregatesUnavailableError:
+        raise HTTPException(status_code=503, detail="Rating summaries unavailable, try again later")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.put("/{review_id}", response_model=ReviewResponse)
 async def update_review(
     review_id: str,
@@ -141,6 +173,8 @@ async def update_review(
                 raise HTTPException(status_code=404, detail=result["error"])
             elif "Unauthorized" in result["error"]:
                 raise HTTPException(status_code=403, detail=result["error"])
+            elif "conflict" in result["error"]:
+                raise HTTPException(status_code=409, detail=result["error"])
             raise HTTPException(status_code=400, detail=result["error"])
         
         return ReviewResponse(**result)
@@ -187,18 +221,14 @@ async def get_product_review_stats(
 ):
     """Get detailed review statistics for a product"""
     try:
-        summary = await review_service.get_product_rating_summary(product_id)
-        recent_reviews = await review_service.get_product_reviews(product_id, limit=5, offset=0)
-        
+        result = await review_service.get_reviews_with_rating_summary(product_id, limit=5)
+
         return JSONResponse(
             status_code=200,
             content={
                 "product_id": product_id,
-                "rating_summary": summary,
-                "recent_reviews": [
-                    review_service.map_to_review_dto(review) 
-                    for review in recent_reviews
-                ]
+                "rating_summary": result["rating_summary"],
+                "recent_reviews": result["reviews"]
             }
         )
     except Exception as e:
@@ -0,0 +1,66 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from schemas.waiting_room_schema import WaitingRoomStatusResponse
+from services.waiting_room_service import WaitingRoomService, get_waiting_room_service
+from settings import settings
+
+router = APIRouter(prefix="/waiting-room", tags=["Waiting Room"])
+
+
+@router.post("/{user_id}/join", response_model=WaitingRoomStatusResponse)
+async def join_waiting_room(
+    user_id: str,
+    waiting_room_service: WaitingRoomService = Depends(get_waiting_room_service)
+):
+    """Take a place in the checkout queue (joining again returns the same ticket)"""
+    try:
+        status = await waiting_room_service.join(user_id)
+        return WaitingRoomStatusResponse(**status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/tickets/{ticket_id}", response_model=WaitingRoomStatusResponse)
+async def get_ticket_status(
+    ticket_id: str,
+    waiting_room_service: WaitingRoomService = Depends(get_waiting_room_service)
+):
+    """Poll a ticket; once admitted the response carries the checkout admission token"""
+    try:
+        status = await waiting_room_service.get_status(ticket_id)
+        if not status:
+            raise HTTPException(status_code=404, detail="Ticket not found or expired")
+        return WaitingRoomStatusResponse(**status)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/tickets/{ticket_id}/events")
+async def stream_ticket_status(
+    ticket_id: str,
+    request: Request,
+    waiting_room_service: WaitingRoomService = Depends(get_waiting_room_service)
+):
+    """Server-sent events with the ticket's position, ending with an `admitted` event"""
+
+    async def events():
+        while not await request.is_disconnected():
+            status = await waiting_room_service.get_status(ticket_id)
+            if not status:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            data = WaitingRoomStatusResponse(**status).model_dump_json()
+            yield f"event: {status['status']}\ndata: {data}\n\n"
+            if status["status"] == "admitted":
+                return
+            await asyncio.sleep(settings.WAITING_ROOM_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,22 +1,29 @@
-from email.mime import image
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+from schemas.promotion_schema import CartDiscount
 
 
 class CartItemSchema(BaseModel):
     product_id: str = Field(..., description="Product ID")
     name: str = Field(..., description="Product name")
-    image: str = Field( description="Product image URL")
+    image: Optional[str] = Field(None, description="Product image URL")
+    category: Optional[str] = Field(None, description="Product category")
     price: float = Field(..., gt=0, description="Product price")
     quantity: int = Field(..., gt=0, description="Item quantity")
+    current_price: Optional[float] = Field(None, description="Price in the catalog now")
+    price_changed: bool = Field(False, description="The catalog price differs from the cart price")
+    available: bool = Field(True, description="The product can still be bought")
 
 
 class AddToCartRequest(BaseModel):
     product_id: str = Field(..., description="Product ID to add")
-    name: str = Field(..., description="Product name")
-    image: str = Field( description="Product image URL")
-    price: float = Field(..., gt=0, description="Product price")
+    # Name, image, category and price are resolved from the catalog; the
+    # values below are only used when no catalog is configured
+    name: Optional[str] = Field(None, description="Product name")
+    image: Optional[str] = Field(None, description="Product image URL")
+    category: Optional[str] = Field(None, description="Product category")
+    price: Optional[float] = Field(None, gt=0, description="Product price")
     quantity: int = Field(1, gt=0, description="Quantity to add")
 
 
@@ -33,11 +40,18 @@ class CartResponse(BaseModel):
     id: str
     user_id: str
     items: List[CartItemSchema] = []
+    subtotal: Optional[float] = None
+    discount_total: float = 0.0
+    discounts: List[CartDiscount] = []
+    coupon_applied: bool = False
     total_price: float = 0.0
 
 
 
 class CartSummaryResponse(BaseModel):
     items_count: int
+    subtotal: Optional[float] = None
+    discount_total: float = 0.0
+    discounts: List[CartDiscount] = []
     total_price: float
     items: List[CartItemSchema] = []
\ No newline at end of file
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+
+class SetStockRequest(BaseModel):
+    on_hand: int = Field(..., ge=0, description="Units physically in stock")
+
+
+class AdjustStockRequest(BaseModel):
+    delta: int = Field(..., description="Units received (positive) or written off (negative)")
+
+
+class StockResponse(BaseModel):
+    sku: str
+    on_hand: int
+    reserved: int
+    available: int
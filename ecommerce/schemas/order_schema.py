@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from schemas.promotion_schema import CartDiscount
+
+
+class CheckoutRequest(BaseModel):
+    app_id: Optional[str] = Field(None, description="App whose promotions apply")
+    coupon: Optional[str] = Field(None, description="Coupon code")
+    shipping_address: Optional[dict] = Field(None, description="Where to deliver the order")
+
+
+class OrderItemSchema(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    image: Optional[str] = None
+    category: Optional[str] = None
+    price: float
+    quantity: int
+
+
+class OrderResponse(BaseModel):
+    id: str
+    order_number: Optional[int] = None
+    user_id: str
+    app_id: Optional[str] = None
+    items: List[OrderItemSchema] = []
+    subtotal: float = 0.0
+    discounts: List[CartDiscount] = []
+    discount_total: float = 0.0
+    total_price: float = 0.0
+    coupon: Optional[str] = None
+    shipping_address: Optional[dict] = None
+    status: str
+    created_at: Optional[datetime] = None
+
+
+class OrderPagination(BaseModel):
+    limit: int
+    continuation_token: Optional[str] = None
+    has_more: bool = False
+
+
+class OrderListResponse(BaseModel):
+    orders: List[OrderResponse] = []
+    pagination: OrderPagination
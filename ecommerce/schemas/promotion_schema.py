@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from datetime import datetime
+
+
+class PromotionTier(BaseModel):
+    min_quantity: int = Field(..., gt=0, description="Line quantity at which the tier starts")
+    percent: float = Field(..., gt=0, le=100, description="Discount percentage for the tier")
+
+
+class CreatePromotionRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200, description="Promotion name shown on the cart")
+    type: Literal["percent", "bogo", "tiered", "coupon"] = Field(..., description="Promotion type")
+    product_ids: List[str] = Field(default_factory=list, description="Products it applies to")
+    categories: List[str] = Field(default_factory=list, description="Categories it applies to (none of either = all products)")
+    percent: Optional[float] = Field(None, gt=0, le=100, description="Discount percentage (percent, coupon)")
+    buy_quantity: Optional[int] = Field(None, gt=0, description="Units to buy (bogo)")
+    get_quantity: Optional[int] = Field(None, gt=0, description="Units given free (bogo)")
+    tiers: List[PromotionTier] = Field(default_factory=list, description="Quantity tiers (tiered)")
+    code: Optional[str] = Field(None, min_length=1, max_length=50, description="Coupon code (coupon)")
+    amount_off: Optional[float] = Field(None, gt=0, description="Fixed amount off (coupon)")
+    min_subtotal: Optional[float] = Field(None, ge=0, description="Minimum cart subtotal (coupon)")
+    priority: int = Field(0, description="Wins ties between equal discounts")
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_type_fields(self):
+        if self.type == "percent" and not self.percent:
+            raise ValueError("percent promotions need a percent")
+        if self.type == "bogo" and not (self.buy_quantity and self.get_quantity):
+            raise ValueError("bogo promotions need buy_quantity and get_quantity")
+        if self.type == "tiered" and not self.tiers:
+            raise ValueError("tiered promotions need at least one tier")
+        if self.type == "coupon" and not (self.code and (self.percent or self.amount_off)):
+            raise ValueError("coupon promotions need a code and a percent or amount_off")
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValueError("ends_at must be after starts_at")
+        return self
+
+
+class PromotionResponse(CreatePromotionRequest):
+    id: str
+    app_id: str
+    active: bool = True
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class CartDiscount(BaseModel):
+    promotion_id: str
+    name: str
+    type: str
+    product_id: Optional[str] = None
+    amount: float
@@ -45,6 +45,14 @@ class RatingSummary(BaseModel):
     }
 
 
+class RatingSummariesRequest(BaseModel):
+    product_ids: List[str] = Field(..., min_length=1, max_length=100, description="Products to summarize")
+
+
+class RatingSummariesResponse(BaseModel):
+    summaries: Dict[str, RatingSummary]
+
+
 class ReviewsWithSummaryResponse(BaseModel):
     reviews: List[ReviewResponse]
     rating_summary: RatingSummary
@@ -53,7 +61,7 @@ class ReviewsWithSummaryResponse(BaseModel):
 
 class PaginationQuery(BaseModel):
     limit: int = Field(default=50, ge=1, le=100, description="Number of reviews per page")
-    offset: int = Field(default=0, ge=0, description="Number of reviews to skip")
+    continuation_token: Optional[str] = Field(None, description="Token from the previous page")
 
 
 class DeleteReviewResponse(BaseModel):
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+
+
+class WaitingRoomStatusResponse(BaseModel):
+    ticket_id: str
+    user_id: str
+    status: Literal["waiting", "admitted"]
+    position: int = 0
+    estimated_wait_seconds: int = 0
+    admission_token: Optional[str] = None
+    token_expires_at: Optional[datetime] = None
@@ -0,0 +1,92 @@
+"""
+Apply the indexing policies in db/indexing_policies.py to existing containers.
+
+create_container_if_not_exists only sets a policy on new containers, so
+containers created before the policies were introduced keep indexing
+every path, and queries that sort on two properties fail against them
+until this has run. Cosmos re-indexes in the background without downtime;
+--wait polls until every transformation has finished. Run from the
+ecommerce service directory:
+
+    python -m scripts.apply_indexing_policies --dry-run
+    python -m scripts.apply_indexing_policies --wait
+"""
+
+import argparse
+import json
+import time
+
+from azure.cosmos import PartitionKey
+
+from db import database
+from db.indexing_policies import (
+    CART_INDEXING_POLICY,
+    INVENTORY_INDEXING_POLICY,
+    ORDER_INDEXING_POLICY,
+    PROMOTION_INDEXING_POLICY,
+    RATING_AGGREGATE_INDEXING_POLICY,
+    REVIEW_INDEXING_POLICY
+)
+
+POLICIES = [
+    (database.cart_container, CART_INDEXING_POLICY),
+    (database.order_container, ORDER_INDEXING_POLICY),
+    (database.review_container, REVIEW_INDEXING_POLICY),
+    (database.promotion_container, PROMOTION_INDEXING_POLICY),
+    (database.inventory_container, INVENTORY_INDEXING_POLICY),
+    (database.rating_aggregate_container, RATING_AGGREGATE_INDEXING_POLICY),
+]
+
+
+def _normalized(policy: dict) -> dict:
+    """The parts of a policy this script manages, in a comparable form"""
+    return {
+        "included": sorted(path["path"] for path in policy.get("includedPaths", [])),
+        "excluded": sorted(path["path"] for path in policy.get("excludedPaths", []) if path["path"] != '/"_etag"/?'),
+        "composite": sorted(
+            json.dumps([(path["path"], path.get("order", "ascending")) for path in index])
+            for index in policy.get("compositeIndexes", [])
+        )
+    }
+
+
+def _transformation_progress(container) -> int:
+    container.read(populate_quota_info=True)
+    headers = container.client_connection.last_response_headers or {}
+    return int(headers.get("x-ms-documentdb-collection-index-transformation-progress", 100))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply container indexing policies")
+    parser.add_argument("--dry-run", action="store_true", help="Report which containers differ without changing them")
+    parser.add_argument("--wait", action="store_true", help="Wait until re-indexing has finished")
+    args = parser.parse_args()
+
+    changed = []
+    for container, policy in POLICIES:
+        properties = container.read()
+        if _normalized(properties.get("indexingPolicy", {})) == _normalized(policy):
+            print(f"{container.id}: up to date")
+            continue
+        print(f"{container.id}: policy differs")
+        if args.dry_run:
+            continue
+        database.database.replace_container(
+            container,
+            partition_key=PartitionKey(path=properties["partitionKey"]["paths"][0]),
+            indexing_policy=policy
+        )
+        changed.append(container)
+        print(f"{container.id}: policy replaced")
+
+    while args.wait and changed:
+        progress = {container.id: _transformation_progress(container) for container in changed}
+        print("  " + ", ".join(f"{name} {percent}%" for name, percent in progress.items()))
+        changed = [container for container in changed if progress[container.id] < 100]
+        if changed:
+            time.sleep(10)
+    print("Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measure request units and latency of each cart operation against Cosmos DB.
+
+Runs every cart operation through CartService for a set of throwaway users
+and reports the RU charge and wall time per call. The legacy cross-partition
+lookup (SELECT ... WHERE c.user_id = ...) is measured alongside for
+comparison. With --store the service runs on the Redis cart store, so only
+cold loads touch Cosmos; the flusher is not running, so writes stay in
+Redis. The benchmark users' carts are deleted afterwards. Run from the
+ecommerce service directory:
+
+    python -m scripts.benchmark_cart_operations --users 50
+    python -m scripts.benchmark_cart_operations --users 50 --store
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import defaultdict
+
+from db.database import cart_container
+from repositories.cart_repository import CartRepository
+from repositories.cart_store_repository import get_cart_store
+from services.cart_service import CartService
+
+
+def _request_charge() -> float:
+    headers = cart_container.client_connection.last_response_headers or {}
+    return float(headers.get("x-ms-request-charge", 0.0))
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _measure(results: dict, name: str, operation):
+    # Operations served from Redis leave no Cosmos response behind
+    cart_container.client_connection.last_response_headers = {}
+    start = time.perf_counter()
+    await operation()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    results[name].append((_request_charge(), elapsed_ms))
+
+
+def _legacy_lookup(user_id: str):
+    query = "SELECT * FROM c WHERE c.user_id = @user_id"
+    return list(cart_container.query_items(
+        query=query,
+        parameters=[{"name": "@user_id", "value": user_id}],
+        enable_cross_partition_query=True
+    ))
+
+
+async def _run(users: int, use_store: bool):
+    store = get_cart_store() if use_store else None
+    service = CartService(CartRepository(), store)
+    results = defaultdict(list)
+    run_id = uuid.uuid4().hex[:8]
+    user_ids = [f"bench-{run_id}-{i}" for i in range(users)]
+    product = {"product_id": "bench-product", "name": "Benchmark product", "image": None, "price": 9.99}
+    other = {**product, "product_id": "bench-product-2"}
+
+    try:
+        for user_id in user_ids:
+            await _measure(results, "get (empty)", lambda: service.get_cart(user_id))
+            await _measure(results, "add", lambda: service.add_to_cart(user_id, product, 1))
+            await _measure(results, "add (second item)", lambda: service.add_to_cart(user_id, other, 2))
+            await _measure(results, "get", lambda: service.get_cart(user_id))
+            await _measure(results, "legacy query lookup", lambda: asyncio.to_thread(_legacy_lookup, user_id))
+            await _measure(results, "update quantity", lambda: service.update_quantity(user_id, "bench-product", 3))
+            await _measure(results, "remove", lambda: service.remove_from_cart(user_id, "bench-product-2"))
+            await _measure(results, "clear", lambda: service.clear_cart(user_id))
+    finally:
+        for user_id in user_ids:
+            if store:
+                await store.delete(user_id)
+            CartRepository().delete_carts_by_user(user_id)
+
+    # The charge is that of the last request in each operation: the write for mutations
+    print(f"{'operation':<22} {'RU mean':>8} {'RU max':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, samples in results.items():
+        charges = [charge for charge, _ in samples]
+        latencies = [elapsed for _, elapsed in samples]
+        print(
+            f"{name:<22} {statistics.mean(charges):8.2f} {max(charges):8.2f} "
+            f"{_percentile(latencies, 0.50):8.1f} {_percentile(latencies, 0.99):8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cart operations (RU and latency)")
+    parser.add_argument("--users", type=int, default=20, help="Throwaway users to run the operation mix for")
+    parser.add_argument("--store", action="store_true", help="Serve carts from the Redis cart store")
+    args = parser.parse_args()
+    asyncio.run(_run(args.users, args.store))
+
+
+if __name__ == "__main__":
+    main()
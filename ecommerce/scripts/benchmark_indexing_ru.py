@@ -0,0 +1,158 @@
+"""
+Compare request units of the tuned indexing policies with index-everything.
+
+Creates throwaway review and order containers twice in the configured
+database - once with the default policy and once with the policy from
+db/indexing_policies.py - writes the same synthetic documents to both and
+runs the service's query shapes against each. Reported are mean RUs per
+write and per query. Point COSMOS_ENDPOINT at the Cosmos DB emulator (the
+default) or a scratch account; the containers are deleted afterwards. Run
+from the ecommerce service directory:
+
+    python -m scripts.benchmark_indexing_ru --documents 500
+"""
+
+import argparse
+import random
+import statistics
+import uuid
+from datetime import datetime, timedelta
+
+from azure.cosmos import PartitionKey
+
+from db.database import database
+from db.indexing_policies import ORDER_INDEXING_POLICY, REVIEW_INDEXING_POLICY
+
+WORDS = "great poor fast slow quality price shipping battery screen fit color size works broke love".split()
+
+
+def _charge(container) -> float:
+    headers = container.client_connection.last_response_headers or {}
+    return float(headers.get("x-ms-request-charge", 0.0))
+
+
+def _reviews(count: int, products: int, users: int, rng: random.Random) -> list:
+    start = datetime.utcnow() - timedelta(days=365)
+    return [
+        {
+            "id": uuid.uuid4().hex,
+            "product_id": f"p{rng.randrange(products)}",
+            "user_id": f"u{rng.randrange(users)}",
+            "user_name": f"User {i}",
+            "rating": rng.randint(1, 5),
+            "comment": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 150))),
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "updated_at": (start + timedelta(minutes=i)).isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+def _orders(count: int, users: int, rng: random.Random) -> list:
+    start = datetime.utcnow() - timedelta(days=365)
+    orders = []
+    for i in range(count):
+        items = [
+            {"product_id": f"p{rng.randrange(1000)}", "name": f"Product {j}", "image": f"https://img/{j}.png",
+             "category": "c1", "price": round(rng.uniform(1, 100), 2), "quantity": rng.randint(1, 5)}
+            for j in range(rng.randint(1, 15))
+        ]
+        orders.append({
+            "id": uuid.uuid4().hex,
+            "type": "order",
+            "user_id": f"u{rng.randrange(users)}",
+            "order_number": i + 1,
+            "items": items,
+            "total_price": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "shipping_address": {"line1": "1 Main St", "city": "Springfield", "postcode": "12345"},
+            "status": "placed",
+            "created_at": (start + timedelta(minutes=i)).isoformat()
+        })
+    return orders
+
+
+def _write(container, documents: list) -> list:
+    charges = []
+    for document in documents:
+        container.create_item(body=document)
+        charges.append(_charge(container))
+    return charges
+
+
+def _query(container, query: str, parameters: list, partition_key=None) -> float:
+    kwargs = {"partition_key": partition_key} if partition_key else {"enable_cross_partition_query": True}
+    total = 0.0
+    for page in container.query_items(query=query, parameters=parameters, max_item_count=50, **kwargs).by_page():
+        list(page)
+        total += _charge(container)
+        break  # the first page is what a request serves
+    return total
+
+
+def _run_case(name: str, partition_key: str, policy, documents: list, queries: list) -> dict:
+    container_id = f"bench-{name}-{uuid.uuid4().hex[:8]}"
+    kwargs = {"indexing_policy": policy} if policy else {}
+    container = database.create_container(id=container_id, partition_key=PartitionKey(path=partition_key), **kwargs)
+    try:
+        writes = _write(container, documents)
+        results = {"write": statistics.mean(writes)}
+        for label, query, parameters, scoped in queries:
+            results[label] = statistics.mean(
+                _query(container, query, [parameter], parameter["value"] if scoped else None)
+                for parameter in parameters
+            )
+        return results
+    finally:
+        database.delete_container(container_id)
+
+
+def _report(title: str, default: dict, tuned: dict):
+    print(f"\n{title}")
+    print(f"  {'operation':<28}{'default RU':>12}{'tuned RU':>12}{'change':>10}")
+    for label in default:
+        change = (tuned[label] - default[label]) / default[label] * 100 if default[label] else 0.0
+        print(f"  {label:<28}{default[label]:>12.2f}{tuned[label]:>12.2f}{change:>9.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare RU cost of indexing policies")
+    parser.add_argument("--documents", type=int, default=500, help="Documents written per container")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reviews = _reviews(args.documents, products=20, users=50, rng=rng)
+    orders = _orders(args.documents, users=20, rng=rng)
+    product_ids = [{"name": "@product_id", "value": f"p{i}"} for i in range(5)]
+    user_ids = [{"name": "@user_id", "value": f"u{i}"} for i in range(5)]
+
+    def review_queries(composite: bool) -> list:
+        # The default policy has no composite index, so it can only serve the single-property sort
+        by = "r.product_id, " if composite else ""
+        by_user = "r.user_id, " if composite else ""
+        tie = ", r.id DESC" if composite else ""
+        return [
+            ("reviews of a product", f"SELECT * FROM r WHERE r.product_id = @product_id ORDER BY {by}r.created_at DESC{tie}", product_ids, False),
+            ("reviews by a user", f"SELECT * FROM r WHERE r.user_id = @user_id ORDER BY {by_user}r.created_at DESC{tie}", user_ids, False),
+        ]
+
+    def order_queries(composite: bool) -> list:
+        by = "o.type, " if composite else ""
+        return [
+            ("orders of a user", f"SELECT * FROM o WHERE o.user_id = @user_id AND o.type = 'order' ORDER BY {by}o.created_at DESC", user_ids, True),
+        ]
+
+    _report(
+        "Reviews",
+        _run_case("reviews-default", "/id", None, reviews, review_queries(False)),
+        _run_case("reviews-tuned", "/id", REVIEW_INDEXING_POLICY, reviews, review_queries(True))
+    )
+    _report(
+        "Orders",
+        _run_case("orders-default", "/user_id", None, orders, order_queries(False)),
+        _run_case("orders-tuned", "/user_id", ORDER_INDEXING_POLICY, orders, order_queries(True))
+    )
+
+
+if __name__ == "__main__":
+    main()
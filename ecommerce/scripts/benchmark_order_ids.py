@@ -0,0 +1,90 @@
+"""
+Benchmark order number allocation across processes.
+
+Each of --processes worker processes runs --concurrency async tasks that
+allocate order numbers for one throwaway tenant until --per-process numbers
+have been handed out. The run checks that no number was handed out twice
+and that each process saw strictly increasing numbers, and reports
+allocations per second and Redis round trips. Compare --block-size 1 (a
+round trip per order) with the default. Only Redis is needed; the tenant's
+counter is deleted afterwards. Run from the ecommerce service directory:
+
+    python -m scripts.benchmark_order_ids --processes 4 --per-process 200000
+    python -m scripts.benchmark_order_ids --processes 4 --per-process 20000 --block-size 1
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+import uuid
+
+from db.redis_client import create_redis_client
+from services.order_id_allocator import ORDER_NUMBER_KEY_PREFIX, OrderIdAllocator
+
+
+async def _allocate(tenant: str, count: int, concurrency: int, block_size: int) -> tuple:
+    allocator = OrderIdAllocator(create_redis_client(), block_size)
+    numbers = []
+    remaining = iter(range(count))
+
+    async def run():
+        for _ in remaining:
+            numbers.append(await allocator.next_id(tenant))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await allocator.redis.close()
+    return numbers, elapsed, allocator.blocks_reserved
+
+
+def _worker(args: tuple) -> tuple:
+    return asyncio.run(_allocate(*args))
+
+
+async def _cleanup(tenant: str):
+    redis = create_redis_client()
+    await redis.delete(f"{ORDER_NUMBER_KEY_PREFIX}{tenant}")
+    await redis.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hi/lo order number allocation")
+    parser.add_argument("--processes", type=int, default=4, help="Worker processes")
+    parser.add_argument("--per-process", type=int, default=100000, help="Numbers allocated by each process")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent tasks per process")
+    parser.add_argument("--block-size", type=int, default=100, help="Numbers reserved per Redis round trip")
+    args = parser.parse_args()
+
+    tenant = f"benchmark-{uuid.uuid4().hex[:8]}"
+    jobs = [(tenant, args.per_process, args.concurrency, args.block_size)] * args.processes
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.map(_worker, jobs)
+    wall = time.perf_counter() - start
+    asyncio.run(_cleanup(tenant))
+
+    total = args.processes * args.per_process
+    all_numbers = [number for numbers, _, _ in results for number in numbers]
+    round_trips = sum(blocks for _, _, blocks in results)
+    duplicates = total - len(set(all_numbers))
+    unordered = sum(
+        1 for numbers, _, _ in results
+        for previous, current in zip(numbers, numbers[1:]) if current <= previous
+    )
+
+    for worker, (_, elapsed, blocks) in enumerate(results):
+        print(f"process {worker}: {args.per_process / elapsed:,.0f} ids/s, {blocks} round trips")
+    print(f"total: {total:,} ids in {wall:.2f} s ({total / wall:,.0f} ids/s across processes), "
+          f"{round_trips} Redis round trips, highest number {max(all_numbers)}")
+    if duplicates or unordered:
+        print(f"FAIL: {duplicates} duplicate(s), {unordered} out-of-order number(s) within a process")
+        sys.exit(1)
+    print("PASS: every number unique and increasing within each process")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Microbenchmark of the promotion engine: compile time and cart evaluation.
+
+Generates a synthetic ruleset (percent, BOGO, tiered and coupon rules over
+a product and category space) and prices large carts against it with the
+compiled index. A naive evaluator that checks every rule against every line
+is timed on the same data for comparison. No Cosmos or Redis is needed.
+Run from the ecommerce service directory:
+
+    python -m scripts.benchmark_promotions --rules 10000 --lines 1000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from services.promotion_engine import CompiledPromotions, CompiledRule
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _rules(count: int, products: int, categories: int, rng: random.Random) -> list:
+    rules = []
+    for i in range(count):
+        kind = rng.choices(["percent", "bogo", "tiered", "coupon"], weights=[50, 20, 20, 10])[0]
+        rule = {"id": f"rule-{i}", "name": f"Rule {i}", "type": kind, "active": True}
+        if rng.random() < 0.7:
+            rule["product_ids"] = [f"p{rng.randrange(products)}" for _ in range(rng.randint(1, 5))]
+        elif rng.random() < 0.95:
+            rule["categories"] = [f"c{rng.randrange(categories)}"]
+        if kind in ("percent", "coupon"):
+            rule["percent"] = rng.choice([5, 10, 15, 20, 30])
+        if kind == "bogo":
+            rule["buy_quantity"], rule["get_quantity"] = rng.choice([(1, 1), (2, 1), (3, 1)])
+        if kind == "tiered":
+            rule["tiers"] = [{"min_quantity": 3, "percent": 5}, {"min_quantity": 10, "percent": 12}]
+        if kind == "coupon":
+            rule["code"] = f"CODE{i}"
+        rules.append(rule)
+    return rules
+
+
+def _cart(lines: int, products: int, categories: int, rng: random.Random) -> list:
+    return [
+        {
+            "product_id": f"p{rng.randrange(products)}",
+            "category": f"c{rng.randrange(categories)}",
+            "price": round(rng.uniform(1, 200), 2),
+            "quantity": rng.randint(1, 12)
+        }
+        for _ in range(lines)
+    ]
+
+
+def _naive_discount(rules: list, items: list) -> float:
+    total = 0.0
+    for item in items:
+        best = 0.0
+        for rule in rules:
+            if rule.line_discount is not None and rule.applies_to(item["product_id"], item["category"]):
+                best = max(best, rule.line_discount(item["price"], item["quantity"]))
+        total += best
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark promotion evaluation")
+    parser.add_argument("--rules", type=int, default=10000, help="Rules in the ruleset")
+    parser.add_argument("--lines", type=int, default=1000, help="Lines per cart")
+    parser.add_argument("--products", type=int, default=50000, help="Distinct product ids")
+    parser.add_argument("--categories", type=int, default=200, help="Distinct categories")
+    parser.add_argument("--iterations", type=int, default=200, help="Evaluations to time")
+    parser.add_argument("--naive-iterations", type=int, default=3, help="Naive evaluations to time (0 to skip)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = _rules(args.rules, args.products, args.categories, rng)
+    carts = [_cart(args.lines, args.products, args.categories, rng) for _ in range(10)]
+
+    start = time.perf_counter()
+    compiled = CompiledPromotions(rules)
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"compile: {args.rules} rules in {compile_ms:.1f} ms "
+          f"({len(compiled.by_product)} products, {len(compiled.by_category)} categories, "
+          f"{len(compiled.everywhere)} cart-wide, {len(compiled.coupons)} coupons)")
+
+    samples = []
+    for i in range(args.iterations):
+        start = time.perf_counter()
+        result = compiled.evaluate(carts[i % len(carts)], coupon_code="CODE9")
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"indexed: {args.lines}-line cart  p50={_percentile(samples, 0.5):.3f} ms  "
+          f"p99={_percentile(samples, 0.99):.3f} ms  mean={statistics.mean(samples):.3f} ms  "
+          f"discounts={len(result['discounts'])}")
+
+    if args.naive_iterations:
+        flat = [CompiledRule(rule) for rule in rules]
+        samples = []
+        for i in range(args.naive_iterations):
+            start = time.perf_counter()
+            _naive_discount(flat, carts[i % len(carts)])
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"naive:   {args.lines}-line cart  mean={statistics.mean(samples):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Concurrency check of stock reservations against a live Redis.
+
+Seeds one hot SKU with --stock units, then has --processes worker
+processes, each running --concurrency async tasks, reserve one unit at a
+time until --attempts reservations have been tried in total. Afterwards it
+verifies that exactly --stock reservations succeeded and that the SKU's
+counters agree, commits every reservation and checks that on-hand stock is
+zero. Throughput of the reserve script is reported. Only Redis is needed;
+the SKU and its reservations are deleted afterwards. Run from the ecommerce
+service directory:
+
+    python -m scripts.inventory_oversell_check --stock 1000 --attempts 20000 --processes 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+import uuid
+
+from db.redis_client import create_redis_client
+from repositories.inventory_store_repository import (
+    DIRTY_SKUS_KEY,
+    InventoryStoreRepository,
+    sku_key
+)
+
+
+async def _hammer(sku: str, run_id: str, worker: int, attempts: int, concurrency: int) -> tuple:
+    store = InventoryStoreRepository(create_redis_client())
+    expires_at_ms = int((time.time() + 3600) * 1000)
+    reserved = []
+    rejected = 0
+    counter = iter(range(attempts))
+
+    async def run():
+        nonlocal rejected
+        for i in counter:
+            reservation_id = f"{run_id}-{worker}-{i}"
+            result = await store.reserve(reservation_id, [(sku, 1)], expires_at_ms)
+            if result[0] == 1:
+                reserved.append(reservation_id)
+            elif result[0] == 0:
+                rejected += 1
+            else:
+                raise RuntimeError(f"SKU {sku} vanished from Redis during the run")
+
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+    await store.redis.close()
+    return reserved, rejected
+
+
+def _worker(args: tuple) -> tuple:
+    return asyncio.run(_hammer(*args))
+
+
+async def _verify(sku: str, stock: int, reserved: list) -> bool:
+    store = InventoryStoreRepository(create_redis_client())
+    ok = True
+    counters = (await store.get_stock([sku]))[sku]
+    print(f"after reserving: on_hand={counters['on_hand']} reserved={counters['reserved']}")
+    if len(reserved) != stock or counters["reserved"] != stock:
+        print(f"FAIL: expected {stock} reserved units, got {len(reserved)} reservations "
+              f"and a counter of {counters['reserved']}")
+        ok = False
+
+    results = await asyncio.gather(*(store.finish(rid, "commit", 60) for rid in reserved))
+    counters = (await store.get_stock([sku]))[sku]
+    print(f"after committing: on_hand={counters['on_hand']} reserved={counters['reserved']}")
+    if not all(results) or counters["on_hand"] != 0 or counters["reserved"] != 0:
+        print("FAIL: committed stock does not add up")
+        ok = False
+
+    async with store.redis.pipeline(transaction=False) as pipe:
+        pipe.delete(sku_key(sku))
+        pipe.srem(DIRTY_SKUS_KEY, sku_key(sku))
+        for rid in reserved:
+            pipe.delete(f"inventory:committed:{rid}")
+        await pipe.execute()
+    await store.redis.close()
+    return ok
+
+
+async def _seed(sku: str, stock: int):
+    store = InventoryStoreRepository(create_redis_client())
+    await store.update_stock(sku, "set", stock)
+    await store.redis.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that concurrent reservations never oversell")
+    parser.add_argument("--stock", type=int, default=1000, help="Units of the hot SKU")
+    parser.add_argument("--attempts", type=int, default=20000, help="Reservations to try in total")
+    parser.add_argument("--processes", type=int, default=4, help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent tasks per process")
+    args = parser.parse_args()
+    if args.attempts < args.stock:
+        parser.error("--attempts must be at least --stock so the SKU sells out")
+
+    run_id = uuid.uuid4().hex[:8]
+    sku = f"oversell-check-{run_id}"
+    asyncio.run(_seed(sku, args.stock))
+
+    per_process = [args.attempts // args.processes] * args.processes
+    per_process[0] += args.attempts % args.processes
+    jobs = [(sku, run_id, worker, count, args.concurrency) for worker, count in enumerate(per_process)]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.map(_worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    reserved = [rid for ids, _ in results for rid in ids]
+    rejected = sum(count for _, count in results)
+    print(f"{args.attempts} reservations in {elapsed:.2f} s ({args.attempts / elapsed:.0f}/s): "
+          f"{len(reserved)} reserved, {rejected} out of stock")
+
+    ok = asyncio.run(_verify(sku, args.stock, reserved))
+    print("PASS: no overselling" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
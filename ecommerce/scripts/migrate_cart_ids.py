@@ -0,0 +1,90 @@
+"""
+Re-key carts created before carts were addressed by user id.
+
+Legacy carts carry a random uuid as their id, and some users ended up with
+more than one. For every user this merges all legacy carts (quantities are
+summed per product, name/image/price come from the most recently updated
+cart) into the document whose id is the user id, then deletes the legacy
+documents. Merged ids are recorded on the cart, so a re-run after an
+interrupted migration only finishes the deletes. Run from the ecommerce
+service directory:
+
+    python -m scripts.migrate_cart_ids --dry-run
+    python -m scripts.migrate_cart_ids
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+from db.database import cart_container
+
+
+def _legacy_carts() -> dict:
+    query = "SELECT * FROM c WHERE c.id != c.user_id"
+    by_user = defaultdict(list)
+    for cart in cart_container.query_items(query=query, enable_cross_partition_query=True):
+        if cart.get("user_id"):
+            by_user[cart["user_id"]].append(cart)
+    return by_user
+
+
+def _merge(user_id: str, carts: list) -> dict:
+    carts = sorted(carts, key=lambda c: c.get("updated_at") or c.get("created_at") or "")
+    items = {}
+    for cart in carts:
+        for item in cart.get("items", []):
+            merged = items.get(item["product_id"])
+            quantity = item.get("quantity", 0) + (merged["quantity"] if merged else 0)
+            items[item["product_id"]] = {**item, "quantity": quantity}
+
+    created = [c.get("created_at") for c in carts if c.get("created_at")]
+    merged_items = list(items.values())
+    return {
+        "id": user_id,
+        "user_id": user_id,
+        "items": merged_items,
+        "total_price": sum(item["price"] * item["quantity"] for item in merged_items),
+        "created_at": min(created) if created else datetime.utcnow().isoformat(),
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-key carts by user id")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    legacy = _legacy_carts()
+    migrated = removed = 0
+    for user_id, carts in legacy.items():
+        try:
+            current = cart_container.read_item(item=user_id, partition_key=user_id)
+        except CosmosResourceNotFoundError:
+            current = None
+
+        already_merged = set(current.get("migrated_from", [])) if current else set()
+        pending = [c for c in carts if c["id"] not in already_merged]
+        cart = _merge(user_id, ([current] if current else []) + pending)
+        cart["migrated_from"] = sorted(already_merged | {c["id"] for c in carts})
+        print(f"{user_id}: {len(carts)} legacy cart(s) -> {len(cart['items'])} item(s)")
+        if args.dry_run:
+            continue
+
+        # Write the merged cart before deleting anything so a crash never loses items
+        cart_container.upsert_item(body=cart)
+        migrated += 1
+        for legacy_cart in carts:
+            try:
+                cart_container.delete_item(item=legacy_cart["id"], partition_key=legacy_cart["id"])
+                removed += 1
+            except CosmosResourceNotFoundError:
+                pass
+
+    print(f"Users: {len(legacy)}  migrated: {migrated}  legacy carts removed: {removed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Re-key reviews created before review ids were derived from the author and product.
+
+Legacy reviews carry a random uuid, or a hash of "user_id:product_id" from
+before the pair was JSON-encoded, as their id. For every (user, product)
+pair this copies the most recently updated review to the id returned by
+review_id_for() and deletes the legacy documents, including any duplicate
+reviews the old check-then-insert let through. Reviews of deleted users
+(anonymized to DELETED_USER_ID) keep their ids. A re-run after an
+interrupted migration finds the copies already in place and only finishes
+the deletes. If duplicates were removed, run
+scripts.rebuild_rating_aggregates afterwards. Run from the ecommerce
+service directory:
+
+    python -m scripts.migrate_review_ids --dry-run
+    python -m scripts.migrate_review_ids
+"""
+
+import argparse
+from collections import defaultdict
+
+from azure.cosmos.exceptions import CosmosResourceExistsError, CosmosResourceNotFoundError
+
+from db.database import review_container
+from repositories.review_repository import DELETED_USER_ID, review_id_for
+
+# Fields Cosmos adds to stored documents; they must not be copied into a new one
+SYSTEM_FIELDS = ("_rid", "_self", "_etag", "_attachments", "_ts")
+
+
+def _reviews_to_migrate() -> dict:
+    by_pair = defaultdict(list)
+    for review in review_container.query_items(query="SELECT * FROM r", enable_cross_partition_query=True):
+        user_id = review.get("user_id")
+        if not user_id or user_id == DELETED_USER_ID or not review.get("product_id"):
+            continue
+        by_pair[(user_id, review["product_id"])].append(review)
+    return {
+        pair: reviews for pair, reviews in by_pair.items()
+        if any(review["id"] != review_id_for(*pair) for review in reviews)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-key reviews by user and product")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    pairs = _reviews_to_migrate()
+    duplicates = sum(len(reviews) - 1 for reviews in pairs.values())
+    print(f"{len(pairs)} review(s) to re-key, {duplicates} duplicate(s) to remove")
+    if args.dry_run:
+        return
+
+    for (user_id, product_id), reviews in pairs.items():
+        review_id = review_id_for(user_id, product_id)
+        if not any(review["id"] == review_id for review in reviews):
+            latest = max(reviews, key=lambda r: r.get("updated_at") or r.get("created_at") or "")
+            copy = {key: value for key, value in latest.items() if key not in SYSTEM_FIELDS}
+            copy["id"] = review_id
+            try:
+                review_container.create_item(body=copy)
+            except CosmosResourceExistsError:
+                pass
+
+        for review in reviews:
+            if review["id"] == review_id:
+                continue
+            try:
+                review_container.delete_item(item=review["id"], partition_key=review["id"])
+            except CosmosResourceNotFoundError:
+                pass
+
+    print("Done")
+    if duplicates:
+        print("Duplicates were removed; run python -m scripts.rebuild_rating_aggregates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Rebuild the per-product rating aggregates from the reviews themselves.
+
+Aggregates are maintained incrementally by review writes; this recomputes
+them from scratch, e.g. after the initial rollout or when an aggregate
+update failed after its review was saved. Every review is read once with a
+cross-partition query, so run it off-peak. Aggregates of products that no
+longer have reviews are reset to zero. A review written while the rebuild
+runs can be missed by the product's recomputed total; re-run the rebuild
+for that product (--product-id) if that matters. Run from the ecommerce
+service directory:
+
+    python -m scripts.rebuild_rating_aggregates --dry-run
+    python -m scripts.rebuild_rating_aggregates
+    python -m scripts.rebuild_rating_aggregates --product-id <product_id>
+"""
+
+import argparse
+from datetime import datetime
+
+from db.database import review_container
+from repositories.rating_aggregate_repository import RatingAggregateRepository, empty_aggregate
+
+
+def _compute(started_at: str, product_id: str = None) -> dict:
+    query = "SELECT r.product_id, r.rating FROM r"
+    parameters = []
+    if product_id:
+        query += " WHERE r.product_id = @product_id"
+        parameters.append({"name": "@product_id", "value": product_id})
+
+    aggregates = {}
+    for review in review_container.query_items(query=query, parameters=parameters, enable_cross_partition_query=True):
+        rating = review.get("rating")
+        if not review.get("product_id") or rating not in (1, 2, 3, 4, 5):
+            continue
+        aggregate = aggregates.get(review["product_id"])
+        if aggregate is None:
+            aggregate = aggregates[review["product_id"]] = empty_aggregate(review["product_id"], started_at)
+        aggregate["total_reviews"] += 1
+        aggregate["rating_sum"] += rating
+        aggregate["histogram"][str(rating)] += 1
+    return aggregates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild product rating aggregates from reviews")
+    parser.add_argument("--product-id", help="Only rebuild this product")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    repository = RatingAggregateRepository()
+    # Reviews written before the scan starts are counted; later deltas still apply
+    started_at = datetime.utcnow().isoformat()
+    aggregates = _compute(started_at, args.product_id)
+    if args.product_id:
+        stale = [] if args.product_id in aggregates else [args.product_id]
+    else:
+        stale = [product_id for product_id in repository.get_aggregate_ids() if product_id not in aggregates]
+
+    print(f"{len(aggregates)} product(s) with reviews, {len(stale)} aggregate(s) to reset")
+    if args.dry_run:
+        return
+
+    for count, aggregate in enumerate(aggregates.values(), start=1):
+        repository.save_aggregate(aggregate)
+        if count % 500 == 0:
+            print(f"  saved {count} aggregates")
+    for product_id in stale:
+        repository.save_aggregate(empty_aggregate(product_id, started_at))
+    print("Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import asyncio
+
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError
+)
+
+from repositories.cart_repository import CartRepository
+from repositories.cart_store_repository import CartStoreRepository
+from settings import settings
+
+
+def _line_changes(cart: dict) -> dict:
+    """{product_id: (changed_at, line or None for a removal)}"""
+    changes = {
+        product_id: (removed_at or "", None)
+        for product_id, removed_at in (cart.get("removed") or {}).items()
+    }
+    for item in cart.get("items", []):
+        changed_at = item.get("updated_at") or item.get("added_at") or ""
+        if changed_at >= changes.get(item["product_id"], ("", None))[0]:
+            changes[item["product_id"]] = (changed_at, item)
+    return changes
+
+
+def reconcile_carts(local: dict, stored: dict) -> dict:
+    """Merge two diverged copies of a cart, keeping the latest change to each line.
+
+    A line present in only one copy is kept unless the other copy removed it
+    later, and a quantity set in either copy wins over an older one; ties go
+    to the stored (Cosmos) copy.
+    """
+    local_changes = _line_changes(local)
+    stored_changes = _line_changes(stored)
+    items = []
+    removed = {}
+    for product_id in local_changes.keys() | stored_changes.keys():
+        local_change = local_changes.get(product_id)
+        stored_change = stored_changes.get(product_id)
+        if stored_change is None or (local_change is not None and local_change[0] > stored_change[0]):
+            changed_at, line = local_change
+        else:
+            changed_at, line = stored_change
+        if line is None:
+            removed[product_id] = changed_at
+        else:
+            items.append({**line, "updated_at": changed_at})
+    items.sort(key=lambda item: item.get("added_at") or "")
+    return {"items": items, "removed": removed}
+
+
+class CartFlusher:
+    """Write-behind persistence of Redis carts to Cosmos.
+
+    Every CART_FLUSH_INTERVAL seconds it pops up to CART_FLUSH_BATCH_SIZE user
+    ids from the dirty set and writes their current Redis snapshot. A cart
+    changed while it is being flushed is marked dirty again by the mutation
+    itself, and ids whose write fails are put back, so no change is lost to
+    the race between popping and reading.
+
+    Writes are conditional on the ETag of the Cosmos version the snapshot
+    is based on. If the document changed underneath (e.g. a direct Cosmos
+    write while Redis was unreachable), the two copies are reconciled line
+    by line, the most recent change to a line winning, whether it set a
+    quantity or removed the line. The result replaces the Redis copy, which
+    is marked dirty and written on the next pass.
+    """
+
+    def __init__(self, store: CartStoreRepository, cart_repository: CartRepository):
+        self.store = store
+        self.cart_repository = cart_repository
+        self._semaphore = asyncio.Semaphore(settings.CART_FLUSH_CONCURRENCY)
+        self._task = None
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        # Drain what is left so a deploy does not delay persistence
+        try:
+            while await self.flush_once():
+                pass
+        except Exception as e:
+            print(f"Cart flush on shutdown failed: {e}")
+
+    async def run_forever(self):
+        while True:
+            try:
+                flushed = await self.flush_once()
+                if flushed < settings.CART_FLUSH_BATCH_SIZE:
+                    await asyncio.sleep(settings.CART_FLUSH_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cart flusher error (retrying): {e}")
+                await asyncio.sleep(settings.CART_FLUSH_INTERVAL)
+
+    async def flush_once(self) -> int:
+        """Persist one batch of dirty carts; returns how many were written"""
+        user_ids = await self.store.pop_dirty(settings.CART_FLUSH_BATCH_SIZE)
+        if not user_ids:
+            return 0
+        results = await asyncio.gather(*(self._flush(user_id) for user_id in user_ids), return_exceptions=True)
+        errors = {user_id: result for user_id, result in zip(user_ids, results) if isinstance(result, Exception)}
+        if errors:
+            failed = list(errors)
+            print(f"Failed to persist {len(failed)} cart(s), retrying later: {errors[failed[0]]}")
+            await self.store.mark_dirty(*failed)
+        return len(user_ids) - len(errors)
+
+    async def _flush(self, user_id: str):
+        snapshot = await self.store.get_snapshot(user_id)
+        if snapshot is None:
+            # Dirty ids are removed when a cart is deleted on purpose, so this
+            # copy was evicted by Redis before its changes reached Cosmos
+            print(f"Cart of {user_id} was evicted from Redis before it was persisted; its unsaved changes are lost")
+            return
+        cart, etag, version = snapshot
+        async with self._semaphore:
+            try:
+                saved = await asyncio.to_thread(self.cart_repository.save_cart, user_id, cart, etag)
+            except (CosmosAccessConditionFailedError, CosmosResourceExistsError, CosmosResourceNotFoundError):
+                await self._merge(user_id, cart, version)
+                return
+        await self.store.set_etag(user_id, saved["_etag"])
+
+    async def _merge(self, user_id: str, cart: dict, version: str):
+        """Re-read the Cosmos cart and reconcile it with the Redis copy, which is then flushed again"""
+        stored = await self.cart_repository.get_cart(user_id)
+        if stored is None:
+            raise RuntimeError(f"Could not re-read the cart of {user_id} after a conflicting write")
+        # STALE if the copy changed while reconciling; that mutation marked
+        # the cart dirty, so the next pass conflicts and reconciles again
+        await self.store.replace_cart(user_id, reconcile_carts(cart, stored), stored.get("_etag"), version)
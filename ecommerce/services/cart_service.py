@@ -1,75 +1,251 @@
+import asyncio
+import random
+from datetime import datetime
+
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError
+)
+from redis.exceptions import RedisError
+
 from repositories.cart_repository import CartRepository
+from repositories.cart_store_repository import CartStoreRepository, NOT_LOADED, get_cart_store
+from services.product_service import ProductService, ProductUnavailableError, get_product_service
+from services.promotion_service import PromotionService, get_promotion_service
+from settings import settings
 
 
 class CartService:
-    def __init__(self, cart_repository: CartRepository):
+    """Cart operations served from the Redis cart store when one is given.
+
+    Cold carts are loaded from Cosmos on first use; changes reach Cosmos
+    through the CartFlusher. If Redis is unavailable, operations fall back
+    to patching the Cosmos document directly.
+    """
+
+    def __init__(
+        self,
+        cart_repository: CartRepository,
+        cart_store: CartStoreRepository = None,
+        promotion_service: PromotionService = None,
+        product_service: ProductService = None
+    ):
         self.cart_repository = cart_repository
+        self.cart_store = cart_store
+        self.promotion_service = promotion_service
+        self.product_service = product_service
+
+    async def _load_into_store(self, user_id: str):
+        cart = await self.cart_repository.get_cart(user_id)
+        if cart is None:
+            return None
+        return await self.cart_store.load_cart(user_id, cart)
+
+    async def _store_mutation(self, user_id: str, mutate):
+        """Run a store mutation, loading the cart from Cosmos if it is cold"""
+        status, cart = await mutate()
+        if status == NOT_LOADED:
+            if await self._load_into_store(user_id) is None:
+                return None
+            status, cart = await mutate()
+        return self.map_to_cart_detail_dto(cart)
+
+    async def _with_store(self, store_operation, fallback):
+        if self.cart_store is not None:
+            try:
+                return await store_operation()
+            except RedisError as e:
+                print(f"Redis cart store error (falling back to Cosmos): {e}")
+        return await fallback()
+
+    async def _load_cart(self, user_id: str):
+        return await self.cart_repository.get_cart(user_id)
+
+    def _total_delta(self, cart: dict, delta: float) -> dict:
+        delta = round(delta, 2)
+        cart["total_price"] = round(cart.get("total_price", 0.0) + delta, 2)
+        return {"op": "incr", "path": "/total_price", "value": delta}
+
+    def _removal(self, cart: dict, product_ids: list) -> dict:
+        """Record when lines were removed, so reconciling with Redis does not bring them back"""
+        now = datetime.utcnow().isoformat()
+        cart["removed"] = {**(cart.get("removed") or {}), **{product_id: now for product_id in product_ids}}
+        return {"op": "set", "path": "/removed", "value": cart["removed"]}
+
+    async def _mutate_in_cosmos(self, user_id: str, plan):
+        """Apply a cart change as ETag-guarded patch operations.
+
+        `plan(cart)` applies the change to the local copy and returns the
+        matching patch operations, or an empty list when nothing changes.
+        A conflicting concurrent write makes the patch fail with 412, in
+        which case the cart is re-read and the change re-planned.
+        """
+        for attempt in range(settings.CART_PATCH_MAX_RETRIES):
+            cart = await self._load_cart(user_id)
+            if not cart:
+                return None
+            operations = plan(cart)
+            if not operations:
+                return self.map_to_cart_detail_dto(cart)
+            try:
+                if "_etag" not in cart:
+                    # First write for this user: create the document instead of patching
+                    return self.map_to_cart_detail_dto(await self.cart_repository.insert_cart(user_id, cart))
+                return self.map_to_cart_detail_dto(
+                    await self.cart_repository.patch_cart(user_id, operations, cart["_etag"])
+                )
+            except (CosmosAccessConditionFailedError, CosmosResourceExistsError, CosmosResourceNotFoundError):
+                await asyncio.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+        print(f"Giving up on cart update for {user_id} after {settings.CART_PATCH_MAX_RETRIES} conflicting attempts")
+        return None
 
     async def get_cart(self, user_id: str):
-        return await self.map_to_cart_detail_dto(self.cart_repository.get_cart(user_id))
+        async def from_store():
+            cart = await self.cart_store.get_cart(user_id)
+            if cart is None:
+                cart = await self._load_into_store(user_id)
+            return self.map_to_cart_detail_dto(cart)
 
-    async def add_to_cart(self, user_id: str, product: dict, quantity: int):
+        async def from_cosmos():
+            return self.map_to_cart_detail_dto(await self._load_cart(user_id))
+
+        return await self._with_store(from_store, from_cosmos)
+
+    async def get_priced_cart(self, user_id: str, app_id: str = None, coupon_code: str = None, strict: bool = False):
+        """Cart with price checks and promotions applied; total_price becomes the discounted total.
+
+        With `strict` the price checks are mandatory and CatalogUnavailableError propagates.
+        """
         cart = await self.get_cart(user_id)
-        if not cart:
+        if cart is None:
             return None
+        if self.product_service is not None:
+            cart = await self.product_service.annotate_cart(cart, strict=strict)
+        if self.promotion_service is not None:
+            cart = await self.promotion_service.price_cart(cart, app_id, coupon_code)
+        return cart
+
+    async def add_to_cart(self, user_id: str, product: dict, quantity: int):
+        """Add a product; with a catalog, its current name and price replace the client's"""
+        if self.product_service is not None:
+            product = await self.product_service.get_product(product["product_id"])
+        elif product.get("price") is None or not product.get("name"):
+            raise ProductUnavailableError("Product name and price are required")
+        item = {
+            "product_id": product["product_id"],
+            "name": product["name"],
+            "image": product.get("image"),
+            "category": product.get("category"),
+            "price": product["price"],
+            "added_at": datetime.utcnow().isoformat()
+        }
 
-        found = False
-        for item in cart["items"]:
-            if item["product_id"] == product["product_id"]:
-                item["quantity"] += quantity
-                found = True
-                break
+        async def from_store():
+            return await self._store_mutation(user_id, lambda: self.cart_store.add_item(user_id, item, quantity))
 
-        if not found:
-            cart["items"].append({
-                "product_id": product["product_id"],
-                "name": product["name"],
-                "price": product["price"],
-                "quantity": quantity
-            })
+        def plan(cart):
+            now = datetime.utcnow().isoformat()
+            for index, line in enumerate(cart["items"]):
+                if line["product_id"] == item["product_id"]:
+                    line["quantity"] += quantity
+                    line["updated_at"] = now
+                    return [
+                        {"op": "incr", "path": f"/items/{index}/quantity", "value": quantity},
+                        {"op": "set", "path": f"/items/{index}/updated_at", "value": now},
+                        self._total_delta(cart, line["price"] * quantity)
+                    ]
+            line = {**item, "quantity": quantity, "updated_at": now}
+            cart["items"].append(line)
+            return [
+                {"op": "add", "path": "/items/-", "value": line},
+                self._total_delta(cart, line["price"] * quantity)
+            ]
 
-        cart["total_price"] = sum(item["price"] * item["quantity"] for item in cart["items"])
+        async def from_cosmos():
+            return await self._mutate_in_cosmos(user_id, plan)
 
-        return await self.map_to_cart_detail_dto(self.cart_repository.update_cart(user_id, cart))
+        return await self._with_store(from_store, from_cosmos)
 
     async def update_quantity(self, user_id: str, product_id: str, quantity: int):
-        cart = await self.get_cart(user_id)
-        if not cart:
-            return None
+        async def from_store():
+            return await self._store_mutation(user_id, lambda: self.cart_store.set_quantity(user_id, product_id, quantity))
 
-        for item in cart["items"]:
-            if item["product_id"] == product_id:
-                if quantity <= 0:
-                    cart["items"] = [i for i in cart["items"] if i["product_id"] != product_id]
-                else:
-                    item["quantity"] = quantity
-                break
+        def plan(cart):
+            for index, line in enumerate(cart["items"]):
+                if line["product_id"] == product_id:
+                    if quantity <= 0:
+                        cart["items"].pop(index)
+                        return [
+                            {"op": "remove", "path": f"/items/{index}"},
+                            self._removal(cart, [product_id]),
+                            self._total_delta(cart, -line["price"] * line["quantity"])
+                        ]
+                    if quantity == line["quantity"]:
+                        return []
+                    delta = line["price"] * (quantity - line["quantity"])
+                    line["quantity"] = quantity
+                    line["updated_at"] = datetime.utcnow().isoformat()
+                    return [
+                        {"op": "set", "path": f"/items/{index}/quantity", "value": quantity},
+                        {"op": "set", "path": f"/items/{index}/updated_at", "value": line["updated_at"]},
+                        self._total_delta(cart, delta)
+                    ]
+            return []
 
-        cart["total_price"] = sum(item["price"] * item["quantity"] for item in cart["items"])
+        async def from_cosmos():
+            return await self._mutate_in_cosmos(user_id, plan)
 
-        return await self.map_to_cart_detail_dto(self.cart_repository.update_cart(user_id, cart))
+        return await self._with_store(from_store, from_cosmos)
 
     async def remove_from_cart(self, user_id: str, product_id: str):
-        cart = await self.get_cart(user_id)
-        if not cart:
-            return None
+        async def from_store():
+            return await self._store_mutation(user_id, lambda: self.cart_store.remove_item(user_id, product_id))
 
-        cart["items"] = [item for item in cart["items"] if item["product_id"] != product_id]
+        def plan(cart):
+            for index, line in enumerate(cart["items"]):
+                if line["product_id"] == product_id:
+                    cart["items"].pop(index)
+                    return [
+                        {"op": "remove", "path": f"/items/{index}"},
+                        self._removal(cart, [product_id]),
+                        self._total_delta(cart, -line["price"] * line["quantity"])
+                    ]
+            return []
 
-        cart["total_price"] = sum(item["price"] * item["quantity"] for item in cart["items"])
+        async def from_cosmos():
+            return await self._mutate_in_cosmos(user_id, plan)
 
-        return await self.map_to_cart_detail_dto(self.cart_repository.update_cart(user_id, cart))
+        return await self._with_store(from_store, from_cosmos)
 
     async def clear_cart(self, user_id: str):
-        cart = await self.get_cart(user_id)
-        if not cart:
-            return None
+        async def from_store():
+            return await self._store_mutation(user_id, lambda: self.cart_store.clear(user_id))
+
+        def plan(cart):
+            if not cart["items"]:
+                return []
+            removal = self._removal(cart, [line["product_id"] for line in cart["items"]])
+            cart["items"] = []
+            cart["total_price"] = 0.0
+            return [
+                {"op": "set", "path": "/items", "value": []},
+                removal,
+                {"op": "set", "path": "/total_price", "value": 0.0}
+            ]
+
+        async def from_cosmos():
+            return await self._mutate_in_cosmos(user_id, plan)
 
-        cart["items"] = []
-        cart["total_price"] = 0.0
+        return await self._with_store(from_store, from_cosmos)
+
+    async def remove_items(self, user_id: str, product_ids: list):
+        """Remove several products, e.g. the ones that were just ordered"""
+        cart = None
+        for product_id in product_ids:
+            cart = await self.remove_from_cart(user_id, product_id)
+        return cart
 
-        return await self.map_to_cart_detail_dto(self.cart_repository.update_cart(user_id, cart))
-    
     def map_to_cart_detail_dto(self, cart) -> dict:
         if cart:
             return {
@@ -79,4 +255,9 @@ class CartService:
                 "total_price": cart.get("total_price", 0.0),
 
             }
-        return None
\ No newline at end of file
+        return None
+
+
+def create_cart_service() -> CartService:
+    cart_store = get_cart_store() if settings.CART_STORE_ENABLED else None
+    return CartService(CartRepository(), cart_store, get_promotion_service(), get_product_service())
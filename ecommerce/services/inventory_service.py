@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from repositories.inventory_repository import InventoryRepository
+from repositories.inventory_store_repository import InventoryStoreRepository, get_inventory_store
+from settings import settings
+
+
+class OutOfStockError(Exception):
+    def __init__(self, sku: str, available: int):
+        super().__init__(f"Not enough stock for {sku} ({available} available)")
+        self.sku = sku
+        self.available = available
+
+
+class InsufficientStockError(Exception):
+    """A stock update would leave fewer units than are currently reserved"""
+
+
+class InventoryService:
+    """Reservations against live stock counters.
+
+    SKUs missing from Redis are seeded from Cosmos on first use. SKUs that
+    Cosmos does not know are not stock-tracked: they are remembered as such
+    for INVENTORY_UNTRACKED_TTL seconds and never block a reservation.
+    """
+
+    def __init__(self, store: InventoryStoreRepository, inventory_repository: InventoryRepository):
+        self.store = store
+        self.inventory_repository = inventory_repository
+
+    async def _ensure_loaded(self, skus: list) -> set:
+        """Return the subset of `skus` that is stock-tracked, loading it into Redis"""
+        stock = await self.store.get_stock(skus)
+        missing = [sku for sku in skus if sku not in stock]
+        tracked = set(stock)
+        if not missing:
+            return tracked
+
+        untracked = await self.store.is_untracked(missing)
+        to_load = [sku for sku in missing if not untracked[sku]]
+        if to_load:
+            documents = await asyncio.to_thread(lambda: list(self.inventory_repository.get_stock_by_skus(to_load)))
+            found = {document["id"]: document for document in documents}
+            for sku in to_load:
+                if sku in found:
+                    await self.store.load(sku, int(found[sku].get("on_hand", 0)))
+                    tracked.add(sku)
+            unknown = [sku for sku in to_load if sku not in found]
+            if unknown:
+                await self.store.mark_untracked(unknown, settings.INVENTORY_UNTRACKED_TTL)
+        return tracked
+
+    async def reserve(self, reservation_id: str, items: list) -> list:
+        """Hold stock for [(sku, quantity)]; all-or-nothing, and idempotent per reservation id.
+
+        Returns the lines actually reserved (untracked SKUs are left out) and
+        raises OutOfStockError naming the first SKU that is short.
+        """
+        quantities = {}
+        for sku, quantity in items:
+            quantities[sku] = quantities.get(sku, 0) + quantity
+
+        tracked = await self._ensure_loaded(list(quantities))
+        lines = [(sku, quantity) for sku, quantity in quantities.items() if sku in tracked]
+        if not lines:
+            return []
+
+        expires_at_ms = int((time.time() + settings.INVENTORY_RESERVATION_TTL) * 1000)
+        for _ in range(2):
+            result = await self.store.reserve(reservation_id, lines, expires_at_ms)
+            if result[0] == 1:
+                return lines
+            sku = lines[result[1] - 1][0]
+            if result[0] == 0:
+                raise OutOfStockError(sku, result[2])
+            # Evicted from Redis after it was loaded; load it again
+            await self._ensure_loaded([sku])
+        raise RuntimeError(f"Could not load stock for reservation {reservation_id}")
+
+    async def commit(self, reservation_id: str) -> bool:
+        """Turn a reservation into a sale; False if it no longer exists"""
+        return await self.store.finish(reservation_id, "commit", settings.INVENTORY_COMMITTED_MARKER_TTL)
+
+    async def release(self, reservation_id: str) -> bool:
+        """Give reserved units back; False if there was nothing to release"""
+        return await self.store.finish(reservation_id, "release", settings.INVENTORY_COMMITTED_MARKER_TTL)
+
+    async def get_stock(self, sku: str):
+        if sku not in await self._ensure_loaded([sku]):
+            return None
+        stock = (await self.store.get_stock([sku])).get(sku)
+        if stock:
+            stock["available"] = stock["on_hand"] - stock["reserved"]
+        return stock
+
+    async def _update_stock(self, sku: str, action: str, amount: int):
+        await self._ensure_loaded([sku])
+        await self.store.clear_untracked(sku)
+        stock = await self.store.update_stock(sku, action, amount)
+        if stock is None:
+            raise InsufficientStockError(f"Stock for {sku} cannot go below the reserved units")
+        stock["available"] = stock["on_hand"] - stock["reserved"]
+        return stock
+
+    async def set_stock(self, sku: str, on_hand: int):
+        return await self._update_stock(sku, "set", on_hand)
+
+    async def adjust_stock(self, sku: str, delta: int):
+        return await self._update_stock(sku, "adjust", delta)
+
+
+_inventory_service = None
+
+
+def get_inventory_service() -> InventoryService:
+    global _inventory_service
+    if _inventory_service is None:
+        _inventory_service = InventoryService(get_inventory_store(), InventoryRepository())
+    return _inventory_service
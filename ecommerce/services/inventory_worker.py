@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from repositories.inventory_repository import InventoryRepository
+from repositories.inventory_store_repository import InventoryStoreRepository
+from settings import settings
+
+
+class InventoryWorker:
+    """Background upkeep of the Redis stock counters.
+
+    Every INVENTORY_WORKER_INTERVAL seconds it releases reservations whose
+    TTL ran out and writes the on-hand stock of SKUs changed since the last
+    pass to Cosmos. SKUs whose write fails are marked dirty again.
+    """
+
+    def __init__(self, store: InventoryStoreRepository, inventory_repository: InventoryRepository):
+        self.store = store
+        self.inventory_repository = inventory_repository
+        self._semaphore = asyncio.Semaphore(settings.INVENTORY_RECONCILE_CONCURRENCY)
+        self._task = None
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            while await self.reconcile_once():
+                pass
+        except Exception as e:
+            print(f"Inventory reconciliation on shutdown failed: {e}")
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.sweep_once()
+                await self.reconcile_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Inventory worker error (retrying): {e}")
+            await asyncio.sleep(settings.INVENTORY_WORKER_INTERVAL)
+
+    async def sweep_once(self) -> int:
+        released = 0
+        while True:
+            count = await self.store.sweep_expired(int(time.time() * 1000), settings.INVENTORY_SWEEP_BATCH_SIZE)
+            released += count
+            if count < settings.INVENTORY_SWEEP_BATCH_SIZE:
+                return released
+
+    async def reconcile_once(self) -> int:
+        """Persist one batch of changed SKUs; returns how many were written"""
+        skus = await self.store.pop_dirty(settings.INVENTORY_RECONCILE_BATCH_SIZE)
+        if not skus:
+            return 0
+        stock = await self.store.get_stock(skus)
+
+        async def save(sku: str):
+            async with self._semaphore:
+                await asyncio.to_thread(self.inventory_repository.save_stock, sku, stock[sku]["on_hand"])
+
+        present = [sku for sku in skus if sku in stock]
+        results = await asyncio.gather(*(save(sku) for sku in present), return_exceptions=True)
+        failed = [sku for sku, result in zip(present, results) if isinstance(result, Exception)]
+        if failed:
+            print(f"Failed to reconcile {len(failed)} SKU(s), retrying later")
+            await self.store.mark_dirty(*failed)
+        return len(present) - len(failed)
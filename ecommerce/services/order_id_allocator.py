@@ -0,0 +1,80 @@
+import asyncio
+
+from db.redis_client import create_redis_client
+from repositories.order_repository import OrderRepository
+from settings import settings
+
+ORDER_NUMBER_KEY_PREFIX = "order_numbers:"
+
+
+class OrderIdAllocator:
+    """Sequential order numbers per tenant, allocated hi/lo.
+
+    Each process reserves a block of ORDER_ID_BLOCK_SIZE numbers with one
+    Redis INCRBY and hands them out from memory, so checkouts do not wait on
+    a shared counter. Numbers are unique per tenant and increase within a
+    process; blocks held by different replicas interleave, and numbers left
+    in a block when a process stops are skipped.
+
+    The Redis counter is not the source of truth: when its key is missing
+    (a flushed or replaced Redis) it is seeded with SET NX from the highest
+    order number stored in Cosmos, plus ORDER_ID_SEED_GAP_BLOCKS blocks for
+    numbers other replicas may still hand out, so numbers are never reused.
+    """
+
+    def __init__(self, redis, block_size: int, order_repository: OrderRepository = None, seed_gap_blocks: int = 0):
+        self.redis = redis
+        self.block_size = block_size
+        self.order_repository = order_repository
+        self.seed_gap_blocks = seed_gap_blocks
+        # tenant -> [next number, end of block (exclusive)]
+        self._blocks = {}
+        self._locks = {}
+        self.blocks_reserved = 0
+
+    def _take(self, tenant: str):
+        block = self._blocks.get(tenant)
+        if block and block[0] < block[1]:
+            value = block[0]
+            block[0] += 1
+            return value
+        return None
+
+    async def next_id(self, tenant: str) -> int:
+        value = self._take(tenant)
+        if value is not None:
+            return value
+        lock = self._locks.setdefault(tenant, asyncio.Lock())
+        async with lock:
+            # Another task may have refilled the block while this one waited
+            value = self._take(tenant)
+            if value is not None:
+                return value
+            key = f"{ORDER_NUMBER_KEY_PREFIX}{tenant}"
+            if self.order_repository is not None and not await self.redis.exists(key):
+                await self._seed(key, tenant)
+            end = await self.redis.incrby(key, self.block_size)
+            self.blocks_reserved += 1
+            self._blocks[tenant] = [end - self.block_size + 2, end + 1]
+            return end - self.block_size + 1
+
+    async def _seed(self, key: str, tenant: str):
+        highest = await asyncio.to_thread(
+            self.order_repository.get_max_order_number, tenant, tenant == settings.DEFAULT_APP_ID
+        )
+        start = highest + self.seed_gap_blocks * self.block_size if highest else 0
+        # Another replica may have seeded (and started using) the counter meanwhile
+        if await self.redis.set(key, start, nx=True):
+            print(f"Seeded order numbers of {tenant} at {start} (highest stored: {highest})")
+
+
+_order_id_allocator = None
+
+
+def get_order_id_allocator() -> OrderIdAllocator:
+    global _order_id_allocator
+    if _order_id_allocator is None:
+        _order_id_allocator = OrderIdAllocator(
+            create_redis_client(), settings.ORDER_ID_BLOCK_SIZE, OrderRepository(), settings.ORDER_ID_SEED_GAP_BLOCKS
+        )
+    return _order_id_allocator
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from repositories.idempotency_repository import (
+    ACQUIRED,
+    COMPLETED,
+    IdempotencyRepository,
+    get_idempotency_repository
+)
+from repositories.order_repository import ORDER_TYPE, OUTBOX_TYPE, OrderAlreadyExistsError, OrderRepository
+from services.cart_service import CartService, create_cart_service
+from services.inventory_service import InventoryService, OutOfStockError, get_inventory_service
+from services.order_id_allocator import OrderIdAllocator, get_order_id_allocator
+from services.outbox_relay import OutboxRelay, get_outbox_relay
+from settings import settings
+
+CHECKOUT_SCOPE = "checkout"
+
+# Downstream effects of a placed order, carried out by the outbox relay
+ORDER_EFFECTS = ("clear_cart", "commit_inventory", "notify")
+
+
+class CheckoutError(Exception):
+    def __init__(self, status_code: int, message: str, details: dict = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.details = details
+
+
+class OrderService:
+    """Turns carts into orders.
+
+    Checkout prices the cart, reserves its stock and writes the order plus
+    its outbox record in one transactional batch; clearing the cart,
+    committing the reservation and notifications run afterwards in the
+    outbox relay. The reservation is keyed by the order id. The Idempotency-Key
+    makes retries replay the first response, and the order id is derived
+    from it so a retry can never create a second order even if Redis lost
+    the key.
+    """
+
+    def __init__(
+        self,
+        order_repository: OrderRepository,
+        cart_service: CartService,
+        idempotency_repository: IdempotencyRepository,
+        inventory_service: InventoryService,
+        order_id_allocator: OrderIdAllocator,
+        outbox_relay: OutboxRelay = None
+    ):
+        self.order_repository = order_repository
+        self.cart_service = cart_service
+        self.idempotency_repository = idempotency_repository
+        self.inventory_service = inventory_service
+        self.order_id_allocator = order_id_allocator
+        self.outbox_relay = outbox_relay
+
+    def _fingerprint(self, request: dict) -> str:
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _order_id(self, user_id: str, idempotency_key: str) -> str:
+        return uuid.uuid5(uuid.NAMESPACE_URL, f"order:{user_id}:{idempotency_key}").hex
+
+    async def checkout(self, user_id: str, idempotency_key: str, request: dict):
+        fingerprint = self._fingerprint(request)
+        try:
+            state, record = await self.idempotency_repository.begin(CHECKOUT_SCOPE, user_id, idempotency_key, fingerprint)
+        except RedisError as e:
+            # The derived order id still prevents duplicate orders
+            print(f"Redis idempotency check failed (continuing without it): {e}")
+            state, record = ACQUIRED, {"fingerprint": fingerprint}
+
+        if record.get("fingerprint") != fingerprint:
+            raise CheckoutError(422, "Idempotency-Key was already used for a different checkout request")
+        if state == COMPLETED:
+            return record["response"]
+        if state != ACQUIRED:
+            raise CheckoutError(409, "A checkout with this Idempotency-Key is still in progress")
+
+        try:
+            order = self.map_to_order_dto(await self._place_order(user_id, idempotency_key, request))
+        except Exception:
+            try:
+                await self.idempotency_repository.release(CHECKOUT_SCOPE, user_id, idempotency_key)
+            except RedisError as e:
+                print(f"Failed to release idempotency key (it expires on its own): {e}")
+            raise
+
+        try:
+            await self.idempotency_repository.complete(CHECKOUT_SCOPE, user_id, idempotency_key, fingerprint, order)
+        except RedisError as e:
+            print(f"Failed to store checkout response (retries resolve the order by id): {e}")
+        return order
+
+    async def _place_order(self, user_id: str, idempotency_key: str, request: dict) -> dict:
+        order_id = self._order_id(user_id, idempotency_key)
+        existing = await asyncio.to_thread(self.order_repository.get_order, user_id, order_id)
+        if existing:
+            return existing
+
+        # Never place an order at prices that could not be checked against the catalog
+        cart = await self.cart_service.get_priced_cart(user_id, request.get("app_id"), request.get("coupon"), strict=True)
+        if not cart or not cart.get("items"):
+            raise CheckoutError(400, "Cart is empty")
+
+        unavailable = [item["product_id"] for item in cart["items"] if not item.get("available", True)]
+        if unavailable:
+            raise CheckoutError(409, "Some products can no longer be bought", {"product_ids": unavailable})
+        changed = [
+            {"product_id": item["product_id"], "cart_price": item["price"], "current_price": item.get("current_price")}
+            for item in cart["items"] if item.get("price_changed")
+        ]
+        if changed:
+            raise CheckoutError(409, "Prices changed since the products were added to the cart", {"items": changed})
+        if request.get("coupon") and not cart.get("coupon_applied"):
+            raise CheckoutError(400, "Coupon is not valid for this cart")
+
+        now = datetime.utcnow().isoformat()
+        items = [
+            {key: item.get(key) for key in ("product_id", "name", "image", "category", "price", "quantity")}
+            for item in cart["items"]
+        ]
+        order = {
+            "id": order_id,
+            "order_number": None,
+            "type": ORDER_TYPE,
+            "user_id": user_id,
+            "app_id": request.get("app_id"),
+            "items": items,
+            "subtotal": cart.get("subtotal", cart["total_price"]),
+            "discounts": cart.get("discounts", []),
+            "discount_total": cart.get("discount_total", 0.0),
+            "total_price": cart["total_price"],
+            "coupon": request.get("coupon"),
+            "shipping_address": request.get("shipping_address"),
+            "status": "placed",
+            "idempotency_key": idempotency_key,
+            "created_at": now,
+            "updated_at": now
+        }
+        outbox = {
+            "id": f"outbox-{order_id}",
+            "type": OUTBOX_TYPE,
+            "user_id": user_id,
+            "order_id": order_id,
+            "status": "pending",
+            "effects": {effect: "pending" for effect in ORDER_EFFECTS},
+            "payload": {
+                "app_id": order["app_id"],
+                "items": [{"product_id": item["product_id"], "quantity": item["quantity"]} for item in items],
+                "total_price": order["total_price"]
+            },
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        try:
+            await self.inventory_service.reserve(order_id, [(item["product_id"], item["quantity"]) for item in items])
+        except OutOfStockError as e:
+            raise CheckoutError(409, "Not enough stock", {"product_id": e.sku, "available": max(e.available, 0)})
+
+        try:
+            order["order_number"] = await self.order_id_allocator.next_id(order["app_id"] or settings.DEFAULT_APP_ID)
+            outbox["payload"]["order_number"] = order["order_number"]
+            created = await asyncio.to_thread(self.order_repository.create_order_with_outbox, order, outbox)
+        except OrderAlreadyExistsError:
+            # A concurrent retry placed it; its reservation is the same one
+            return await asyncio.to_thread(self.order_repository.get_order, user_id, order_id)
+        except Exception:
+            try:
+                await self.inventory_service.release(order_id)
+            except RedisError as e:
+                print(f"Failed to release reservation {order_id} (it expires on its own): {e}")
+            raise
+
+        if self.outbox_relay is not None:
+            self.outbox_relay.wake()
+        return created
+
+    async def get_order(self, user_id: str, order_id: str):
+        order = await asyncio.to_thread(self.order_repository.get_order, user_id, order_id)
+        return self.map_to_order_dto(order)
+
+    async def get_orders(self, user_id: str, limit: int, continuation_token: str = None):
+        """One page of the user's orders, newest first; returns (orders, next continuation token)"""
+        orders, next_token = await asyncio.to_thread(
+            self.order_repository.get_orders_by_user, user_id, limit, continuation_token
+        )
+        return [self.map_to_order_dto(order) for order in orders], next_token
+
+    def map_to_order_dto(self, order) -> dict:
+        if order:
+            return {
+                "id": order.get("id"),
+                "order_number": order.get("order_number"),
+                "user_id": order.get("user_id"),
+                "app_id": order.get("app_id"),
+                "items": order.get("items", []),
+                "subtotal": order.get("subtotal", 0.0),
+                "discounts": order.get("discounts", []),
+                "discount_total": order.get("discount_total", 0.0),
+                "total_price": order.get("total_price", 0.0),
+                "coupon": order.get("coupon"),
+                "shipping_address": order.get("shipping_address"),
+                "status": order.get("status"),
+                "created_at": order.get("created_at")
+            }
+        return None
+
+
+def create_order_service() -> OrderService:
+    return OrderService(
+        OrderRepository(),
+        create_cart_service(),
+        get_idempotency_repository(),
+        get_inventory_service(),
+        get_order_id_allocator(),
+        get_outbox_relay()
+    )
@@ -0,0 +1,158 @@
+import asyncio
+import json
+
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError
+
+from db.redis_client import create_redis_client
+from repositories.order_repository import OrderRepository
+from services.cart_service import create_cart_service
+from services.inventory_service import get_inventory_service
+from settings import settings
+
+
+class OutboxRelay:
+    """Carries out the downstream effects of placed orders.
+
+    Outbox records are written in the same transactional batch as their
+    order. The relay wakes up when checkout signals a new order, and polls
+    every OUTBOX_POLL_INTERVAL seconds as a backstop. It leases each record
+    with an ETag-guarded patch, so several replicas can relay in parallel,
+    and records every effect that completes. Failed effects are retried with
+    exponential backoff up to OUTBOX_MAX_ATTEMPTS. Delivery is at least once,
+    so every effect must tolerate being repeated.
+    """
+
+    def __init__(self, order_repository: OrderRepository, cart_service, inventory_service, redis):
+        self.order_repository = order_repository
+        self.cart_service = cart_service
+        self.inventory_service = inventory_service
+        self.redis = redis
+        self.handlers = {
+            "clear_cart": self._clear_cart,
+            "commit_inventory": self._commit_inventory,
+            # Records written before checkout reserved stock itself
+            "reserve_inventory": self._commit_inventory,
+            "notify": self._notify
+        }
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def run_forever(self):
+        while True:
+            try:
+                relayed = await self.relay_once()
+                if relayed < settings.OUTBOX_BATCH_SIZE:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=settings.OUTBOX_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Outbox relay error (retrying): {e}")
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    async def relay_once(self) -> int:
+        records = await asyncio.to_thread(self.order_repository.get_due_outbox_records, settings.OUTBOX_BATCH_SIZE)
+        if records:
+            await asyncio.gather(*(self._process(record) for record in records))
+        return len(records)
+
+    async def _process(self, record: dict):
+        try:
+            record = await asyncio.to_thread(
+                self.order_repository.claim_outbox_record, record, settings.OUTBOX_LEASE_SECONDS
+            )
+        except CosmosAccessConditionFailedError:
+            # Another relay claimed it first
+            return
+
+        effects = dict(record.get("effects") or {})
+        errors = []
+        for effect, state in effects.items():
+            if state == "done":
+                continue
+            handler = self.handlers.get(effect)
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for effect {effect}")
+                await handler(record)
+                effects[effect] = "done"
+            except Exception as e:
+                errors.append(f"{effect}: {e}")
+
+        try:
+            if not errors:
+                await asyncio.to_thread(self.order_repository.update_outbox_record, record, "done", effects)
+            elif record.get("attempts", 0) >= settings.OUTBOX_MAX_ATTEMPTS:
+                print(f"Outbox record {record['id']} failed permanently: {errors}")
+                await asyncio.to_thread(self.order_repository.update_outbox_record, record, "failed", effects, "; ".join(errors))
+            else:
+                retry_in = min(2 ** record.get("attempts", 1), settings.OUTBOX_MAX_BACKOFF_SECONDS)
+                await asyncio.to_thread(
+                    self.order_repository.update_outbox_record, record, "processing", effects, "; ".join(errors), retry_in
+                )
+        except Exception as e:
+            # The lease runs out and the record is picked up again
+            print(f"Failed to save outbox progress for {record['id']}: {e}")
+
+    async def _clear_cart(self, record: dict):
+        product_ids = [item["product_id"] for item in record["payload"]["items"]]
+        await self.cart_service.remove_items(record["user_id"], product_ids)
+
+    async def _publish(self, event_type: str, record: dict):
+        await self.redis.xadd(
+            settings.ORDER_EVENTS_STREAM,
+            {
+                "event_id": f"{record['id']}:{event_type}",
+                "type": event_type,
+                "order_id": record["order_id"],
+                "user_id": record["user_id"],
+                "payload": json.dumps(record["payload"])
+            },
+            maxlen=settings.ORDER_EVENTS_STREAM_MAXLEN,
+            approximate=True
+        )
+
+    async def _commit_inventory(self, record: dict):
+        order_id = record["order_id"]
+        if await self.inventory_service.commit(order_id):
+            return
+        # The reservation expired before the relay got to it; take the stock
+        # again now, or fail so the effect is retried
+        items = [(item["product_id"], item["quantity"]) for item in record["payload"]["items"]]
+        if await self.inventory_service.reserve(order_id, items):
+            if not await self.inventory_service.commit(order_id):
+                raise RuntimeError(f"Reservation {order_id} disappeared before it was committed")
+
+    async def _notify(self, record: dict):
+        await self._publish("order.placed", record)
+
+
+_outbox_relay = None
+
+
+def get_outbox_relay() -> OutboxRelay:
+    global _outbox_relay
+    if _outbox_relay is None:
+        _outbox_relay = OutboxRelay(
+            OrderRepository(), create_cart_service(), get_inventory_service(), create_redis_client()
+        )
+    return _outbox_relay
@@ -0,0 +1,110 @@
+import time
+
+import httpx
+
+from repositories.product_repository import ProductRepository
+from settings import settings
+
+
+class ProductUnavailableError(Exception):
+    """The product does not exist or cannot be sold right now"""
+
+
+class CatalogUnavailableError(Exception):
+    """The core item service could not be reached"""
+
+
+class ProductService:
+    """Authoritative product price and availability for cart lines.
+
+    Lookups for a whole cart go through a process-local TTL cache and every
+    miss is resolved in a single batch request to core. Unknown ids are
+    cached too, so a cart holding a removed product does not trigger a
+    request on every read.
+    """
+
+    def __init__(self, product_repository: ProductRepository):
+        self.product_repository = product_repository
+        # product_id -> (expires_at, product or None)
+        self._cache = {}
+
+    def _store(self, product_id: str, product):
+        self._cache.pop(product_id, None)
+        if len(self._cache) >= settings.PRODUCT_CACHE_MAX_ENTRIES:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[product_id] = (time.monotonic() + settings.PRODUCT_CACHE_TTL, product)
+
+    async def get_products(self, product_ids: list) -> dict:
+        """Return {product_id: product or None} for the given ids"""
+        now = time.monotonic()
+        result = {}
+        missing = []
+        for product_id in dict.fromkeys(product_ids):
+            entry = self._cache.get(product_id)
+            if entry and entry[0] > now:
+                result[product_id] = entry[1]
+            else:
+                missing.append(product_id)
+
+        if missing:
+            try:
+                fetched = await self.product_repository.get_products_by_ids(missing)
+            except httpx.HTTPError as e:
+                raise CatalogUnavailableError(str(e)) from e
+            for product_id in missing:
+                product = fetched.get(product_id)
+                self._store(product_id, product)
+                result[product_id] = product
+        return result
+
+    async def get_product(self, product_id: str) -> dict:
+        """Resolve one product for a cart line, rejecting ones that cannot be sold"""
+        product = (await self.get_products([product_id])).get(product_id)
+        if not product or not product.get("available") or product.get("price") is None:
+            raise ProductUnavailableError(f"Product {product_id} is not available")
+        return {
+            "product_id": product["id"],
+            "name": product["title"],
+            "image": (product.get("images") or [None])[0],
+            "category": (product.get("category") or [None])[0],
+            "price": product["price"]
+        }
+
+    async def annotate_cart(self, cart: dict, strict: bool = False) -> dict:
+        """Flag lines whose stored price differs from the current one or that can no longer be bought.
+
+        Cart views are served unchecked when the catalog is down; with
+        `strict` (checkout) CatalogUnavailableError is raised instead.
+        """
+        if not cart or not cart.get("items"):
+            return cart
+        try:
+            products = await self.get_products([item["product_id"] for item in cart["items"]])
+        except CatalogUnavailableError as e:
+            if strict:
+                raise
+            print(f"Product catalog unavailable (cart served without price checks): {e}")
+            return cart
+
+        items = []
+        for item in cart["items"]:
+            product = products.get(item["product_id"])
+            current_price = product.get("price") if product else None
+            items.append({
+                **item,
+                "current_price": current_price,
+                "price_changed": current_price is not None and round(current_price, 2) != round(item["price"], 2),
+                "available": bool(product and product.get("available"))
+            })
+        return {**cart, "items": items}
+
+
+_product_service = None
+
+
+def get_product_service() -> ProductService:
+    global _product_service
+    if _product_service is None:
+        _product_service = ProductService(ProductRepository())
+    return _product_service
@@ -0,0 +1,227 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+PERCENT = "percent"
+BOGO = "bogo"
+TIERED = "tiered"
+COUPON = "coupon"
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """Naive UTC, to compare with datetime.utcnow(); offsets are converted, not dropped"""
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class CompiledRule:
+    """A promotion reduced to what evaluation needs.
+
+    `line_discount(price, quantity)` returns the amount taken off one cart
+    line; coupons are applied to the cart as a whole instead.
+    """
+
+    __slots__ = (
+        "id", "name", "type", "priority", "line_discount", "signature",
+        "code", "percent", "amount_off", "min_subtotal", "product_ids", "categories"
+    )
+
+    def __init__(self, rule: dict):
+        self.id = rule["id"]
+        self.name = rule.get("name") or rule["id"]
+        self.type = rule["type"]
+        self.priority = int(rule.get("priority", 0))
+        self.product_ids = frozenset(rule.get("product_ids") or ())
+        self.categories = frozenset(rule.get("categories") or ())
+        self.code = (rule.get("code") or "").upper() or None
+        self.percent = float(rule.get("percent") or 0.0)
+        self.amount_off = float(rule.get("amount_off") or 0.0)
+        self.min_subtotal = float(rule.get("min_subtotal") or 0.0)
+        self.signature = None
+        self.line_discount = self._compile_line_discount(rule)
+
+    def _compile_line_discount(self, rule: dict):
+        if self.type == PERCENT:
+            rate = self.percent / 100.0
+            return lambda price, quantity: price * quantity * rate
+
+        if self.type == BOGO:
+            buy = max(int(rule.get("buy_quantity") or 1), 1)
+            free = max(int(rule.get("get_quantity") or 1), 1)
+            group = buy + free
+            self.signature = (BOGO, buy, free)
+            return lambda price, quantity: (quantity // group) * free * price
+
+        if self.type == TIERED:
+            # Highest threshold first so the first match is the best tier
+            tiers = sorted(
+                ((int(t["min_quantity"]), float(t["percent"]) / 100.0) for t in rule.get("tiers") or ()),
+                reverse=True
+            )
+            self.signature = (TIERED, tuple(tiers))
+
+            def tiered(price, quantity):
+                for min_quantity, rate in tiers:
+                    if quantity >= min_quantity:
+                        return price * quantity * rate
+                return 0.0
+            return tiered
+
+        return None
+
+    def applies_to(self, product_id: str, category: Optional[str]) -> bool:
+        if not self.product_ids and not self.categories:
+            return True
+        return product_id in self.product_ids or (category is not None and category in self.categories)
+
+
+def _prune(rules: list) -> list:
+    """Drop rules that can never win within one index bucket.
+
+    Only the largest percentage can win among percent rules, and rules with
+    identical BOGO or tier parameters always tie, so one of each is kept
+    (the highest priority, which also wins ties at evaluation time).
+    """
+    best_percent = None
+    seen = set()
+    kept = []
+    for rule in sorted(rules, key=lambda r: -r.priority):
+        if rule.type == PERCENT:
+            if best_percent is None or rule.percent > best_percent.percent:
+                best_percent = rule
+            continue
+        if rule.signature in seen:
+            continue
+        seen.add(rule.signature)
+        kept.append(rule)
+    if best_percent is not None:
+        kept.insert(0, best_percent)
+    return kept
+
+
+class CompiledPromotions:
+    """Active promotions of one app, indexed for single-pass evaluation.
+
+    Line rules are bucketed by product id and by category, with rules that
+    target neither kept apart as cart-wide; coupons are keyed by code. The
+    ruleset is only valid until `valid_until`, the next moment a rule starts
+    or ends.
+    """
+
+    def __init__(self, rules: list, now: datetime = None):
+        now = now or datetime.utcnow()
+        self.by_product = {}
+        self.by_category = {}
+        self.everywhere = []
+        self.coupons = {}
+        self.valid_until = None
+        self.rule_count = 0
+
+        for rule in rules:
+            if not rule.get("active", True):
+                continue
+            starts_at = _parse_time(rule.get("starts_at"))
+            ends_at = _parse_time(rule.get("ends_at"))
+            if starts_at and starts_at > now:
+                self._expire_at(starts_at)
+                continue
+            if ends_at:
+                if ends_at <= now:
+                    continue
+                self._expire_at(ends_at)
+
+            compiled = CompiledRule(rule)
+            self.rule_count += 1
+            if compiled.type == COUPON:
+                if compiled.code:
+                    self.coupons[compiled.code] = compiled
+                continue
+            if compiled.line_discount is None:
+                continue
+            if not compiled.product_ids and not compiled.categories:
+                self.everywhere.append(compiled)
+            for product_id in compiled.product_ids:
+                self.by_product.setdefault(product_id, []).append(compiled)
+            for category in compiled.categories:
+                self.by_category.setdefault(category, []).append(compiled)
+
+        self.everywhere = _prune(self.everywhere)
+        self.by_product = {key: _prune(group) for key, group in self.by_product.items()}
+        self.by_category = {key: _prune(group) for key, group in self.by_category.items()}
+
+    def _expire_at(self, moment: datetime):
+        if self.valid_until is None or moment < self.valid_until:
+            self.valid_until = moment
+
+    def is_current(self, now: datetime = None) -> bool:
+        return self.valid_until is None or (now or datetime.utcnow()) < self.valid_until
+
+    def evaluate(self, items: list, coupon_code: Optional[str] = None) -> dict:
+        """Price a cart in one pass over its lines.
+
+        Each line gets the single best line discount among the rules that
+        target its product, its category or every product (promotions do
+        not stack on a line). A coupon then applies to the discounted
+        subtotal of the lines it targets.
+        """
+        subtotal = 0.0
+        line_discount_total = 0.0
+        discounts = []
+        discounted_lines = []
+        everywhere = self.everywhere
+
+        for item in items:
+            price = item["price"]
+            quantity = item["quantity"]
+            line_total = price * quantity
+            subtotal += line_total
+
+            best_amount = 0.0
+            best_rule = None
+            candidates = self.by_product.get(item["product_id"], ())
+            category = item.get("category")
+            for group in (candidates, self.by_category.get(category, ()) if category else (), everywhere):
+                for rule in group:
+                    amount = rule.line_discount(price, quantity)
+                    if amount > best_amount or (amount == best_amount and best_rule and rule.priority > best_rule.priority):
+                        best_amount = amount
+                        best_rule = rule
+
+            best_amount = min(best_amount, line_total)
+            if best_rule is not None and best_amount > 0:
+                line_discount_total += best_amount
+                discounts.append({
+                    "promotion_id": best_rule.id,
+                    "name": best_rule.name,
+                    "type": best_rule.type,
+                    "product_id": item["product_id"],
+                    "amount": round(best_amount, 2)
+                })
+            discounted_lines.append((item["product_id"], category, line_total - best_amount))
+
+        coupon_discount = 0.0
+        coupon = self.coupons.get(coupon_code.upper()) if coupon_code else None
+        if coupon is not None:
+            eligible = sum(total for product_id, category, total in discounted_lines if coupon.applies_to(product_id, category))
+            if eligible > 0 and subtotal - line_discount_total >= coupon.min_subtotal:
+                coupon_discount = min(eligible, eligible * coupon.percent / 100.0 + coupon.amount_off)
+                discounts.append({
+                    "promotion_id": coupon.id,
+                    "name": coupon.name,
+                    "type": COUPON,
+                    "product_id": None,
+                    "amount": round(coupon_discount, 2)
+                })
+
+        discount_total = line_discount_total + coupon_discount
+        return {
+            "subtotal": round(subtotal, 2),
+            "discount_total": round(discount_total, 2),
+            "total_price": round(max(subtotal - discount_total, 0.0), 2),
+            "discounts": discounts,
+            "coupon_applied": coupon_discount > 0
+        }
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from redis.exceptions import RedisError
+
+from db.redis_client import create_redis_client
+from repositories.promotion_repository import PromotionRepository
+from services.promotion_engine import CompiledPromotions
+from settings import settings
+
+
+class PromotionService:
+    """Prices carts against the compiled promotions of their app.
+
+    Each app's active rules are compiled once and reused until either the
+    app's version counter in Redis moves (every promotion write bumps it) or
+    a rule's time window opens or closes. The counter is read at most once
+    per PROMOTION_VERSION_CHECK_INTERVAL, so a cart read normally costs no
+    I/O for pricing. If Redis is unreachable the last compiled ruleset keeps
+    being used.
+    """
+
+    def __init__(self, promotion_repository: PromotionRepository, redis):
+        self.promotion_repository = promotion_repository
+        self.redis = redis
+        # app_id -> [compiled, version, checked_at]
+        self._rulesets = {}
+        self._compile_locks = {}
+
+    def _version_key(self, app_id: str) -> str:
+        return f"promotions:version:{app_id}"
+
+    async def _current_version(self, app_id: str, fallback):
+        try:
+            return await self.redis.get(self._version_key(app_id))
+        except RedisError as e:
+            print(f"Redis promotion version check failed (using cached rules): {e}")
+            return fallback
+
+    async def get_ruleset(self, app_id: str) -> CompiledPromotions:
+        entry = self._rulesets.get(app_id)
+        now = time.monotonic()
+        if entry and entry[0].is_current() and now - entry[2] < settings.PROMOTION_VERSION_CHECK_INTERVAL:
+            return entry[0]
+
+        version = await self._current_version(app_id, entry[1] if entry else None)
+        if entry and entry[1] == version and entry[0].is_current():
+            entry[2] = now
+            return entry[0]
+
+        lock = self._compile_locks.setdefault(app_id, asyncio.Lock())
+        async with lock:
+            entry = self._rulesets.get(app_id)
+            if entry and entry[1] == version and entry[0].is_current():
+                return entry[0]
+            rules = await asyncio.to_thread(self.promotion_repository.get_active_promotions, app_id)
+            compiled = await asyncio.to_thread(CompiledPromotions, rules)
+            self._rulesets[app_id] = [compiled, version, time.monotonic()]
+            return compiled
+
+    async def price_cart(self, cart: dict, app_id: str = None, coupon_code: str = None) -> dict:
+        """Return the cart with subtotal, discounts and the discounted total"""
+        if not cart:
+            return cart
+        ruleset = await self.get_ruleset(app_id or settings.DEFAULT_APP_ID)
+        return {**cart, **ruleset.evaluate(cart.get("items", []), coupon_code)}
+
+    async def _bump_version(self, app_id: str):
+        self._rulesets.pop(app_id, None)
+        try:
+            await self.redis.incr(self._version_key(app_id))
+        except RedisError as e:
+            print(f"Redis promotion version bump failed (continuing anyway): {e}")
+
+    async def create_promotion(self, app_id: str, promotion_data: dict):
+        promotion_data["app_id"] = app_id
+        promotion = await asyncio.to_thread(self.promotion_repository.create_promotion, promotion_data)
+        await self._bump_version(app_id)
+        return promotion
+
+    async def get_promotions(self, app_id: str):
+        return await asyncio.to_thread(self.promotion_repository.get_promotions, app_id)
+
+    async def deactivate_promotion(self, app_id: str, promotion_id: str):
+        promotion = await asyncio.to_thread(self.promotion_repository.deactivate_promotion, app_id, promotion_id)
+        await self._bump_version(app_id)
+        return promotion
+
+
+_promotion_service = None
+
+
+def get_promotion_service() -> PromotionService:
+    global _promotion_service
+    if _promotion_service is None:
+        _promotion_service = PromotionService(PromotionRepository(), create_redis_client())
+    return _promotion_service
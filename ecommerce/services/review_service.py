@@ -1,10 +1,85 @@
-from repositories.review_repository import ReviewRepository
+import asyncio
+import random
+
+from azure.cosmos.exceptions import CosmosAccessConditionFailedError, CosmosResourceExistsError
+from datetime import datetime
+from redis.exceptions import RedisError
+from repositories.rating_aggregate_repository import RATINGS, RatingAggregateRepository, empty_aggregate
+from repositories.review_cache_repository import ReviewCacheRepository
+from repositories.review_repository import ReviewAlreadyExistsError, ReviewRepository
+from settings import settings
 from typing import Optional, List, Dict
 
 
 class ReviewService:
-    def __init__(self, review_repository: ReviewRepository):
+    def __init__(
+        self,
+        review_repository: ReviewRepository,
+        rating_aggregate_repository: RatingAggregateRepository = None,
+        review_cache: ReviewCacheRepository = None
+    ):
         self.review_repository = review_repository
+        self.rating_aggregate_repository = rating_aggregate_repository or RatingAggregateRepository()
+        # Without a cache every read goes to Cosmos
+        self.review_cache = review_cache
+
+    async def _cached(self, kind: str, product_id: str, load):
+        """Serve `kind` for a product from the cache, or call `load()` and cache the result"""
+        if self.review_cache is None:
+            return await load()
+        try:
+            value, version = await self.review_cache.get(kind, product_id)
+        except RedisError as e:
+            print(f"Review cache read failed (reading from Cosmos): {e}")
+            return await load()
+        if value is not None:
+            return value
+
+        value = await load()
+        try:
+            await self.review_cache.set(kind, product_id, value, version)
+        except RedisError as e:
+            print(f"Review cache write failed: {e}")
+        return value
+
+    async def _invalidate(self, product_id: str):
+        if self.review_cache is None:
+            return
+        try:
+            await self.review_cache.invalidate(product_id)
+        except RedisError as e:
+            # Cached pages of this product stay stale until REVIEW_CACHE_TTL
+            print(f"Review cache invalidation failed for {product_id}: {e}")
+
+    async def _compute_aggregate(self, product_id: str):
+        """Build a product's aggregate from its reviews (the slow cross-partition query).
+
+        Raises if the query fails, so a failed read is never stored as a zero aggregate.
+        """
+        # Taken before the query: reviews written earlier are in the stats
+        seeded_through = datetime.utcnow().isoformat()
+        stats = await self.review_repository.get_product_rating_stats(product_id) or {}
+        aggregate = empty_aggregate(product_id, seeded_through)
+        aggregate["histogram"] = {
+            "5": stats.get("five_stars", 0),
+            "4": stats.get("four_stars", 0),
+            "3": stats.get("three_stars", 0),
+            "2": stats.get("two_stars", 0),
+            "1": stats.get("one_star", 0)
+        }
+        aggregate["total_reviews"] = stats.get("total_reviews", 0)
+        aggregate["rating_sum"] = sum(int(rating) * count for rating, count in aggregate["histogram"].items())
+        return aggregate
+
+    async def _apply_rating_change(self, product_id: str, count_delta: int, rating_deltas: dict, written_at: str):
+        """Keep the product's aggregate in step with a review write that already succeeded"""
+        try:
+            await self.rating_aggregate_repository.apply_delta(
+                product_id, count_delta, rating_deltas, written_at, seed=lambda: self._compute_aggregate(product_id)
+            )
+        except Exception as e:
+            # The review is saved; scripts/rebuild_rating_aggregates.py repairs the drift
+            print(f"Error updating rating aggregate for {product_id}: {e}")
 
     async def create_review(self, user_id: str, product_id: str, rating: int, comment: str, user_name: Optional[str] = None):
         """Create a new review"""
@@ -21,42 +96,67 @@ class ReviewService:
             "user_name": user_name
         }
 
-        return await self.review_repository.create_review(review_data)
+        try:
+            review = await self.review_repository.create_review(review_data)
+        except ReviewAlreadyExistsError:
+            # A concurrent submission won the insert
+            existing_review = await self.review_repository.check_user_review_exists(user_id, product_id)
+            return {"error": "User has already reviewed this product", "existing_review": existing_review}
+        if review:
+            await self._apply_rating_change(product_id, 1, {str(rating): 1}, review["updated_at"])
+            await self._invalidate(product_id)
+        return review
 
     async def get_review_by_id(self, review_id: str):
         """Get review by ID"""
         return await self.review_repository.get_review_by_id(review_id)
 
-    async def get_product_reviews(self, product_id: str, limit: int = 50, offset: int = 0):
-        """Get all reviews for a product with pagination"""
-        reviews = await self.review_repository.get_reviews_by_product(product_id, limit, offset)
-        return reviews
+    async def get_product_reviews(self, product_id: str, limit: int = 50, continuation_token: Optional[str] = None):
+        """Get one page of a product's reviews; returns (reviews, next continuation token)"""
+        return await self.review_repository.get_reviews_by_product(product_id, limit, continuation_token)
 
-    async def get_user_reviews(self, user_id: str, limit: int = 50, offset: int = 0):
-        """Get all reviews by a user with pagination"""
-        reviews = await self.review_repository.get_reviews_by_user(user_id, limit, offset)
-        return reviews
+    async def get_user_reviews(self, user_id: str, limit: int = 50, continuation_token: Optional[str] = None):
+        """Get one page of a user's reviews; returns (reviews, next continuation token)"""
+        return await self.review_repository.get_reviews_by_user(user_id, limit, continuation_token)
 
     async def update_review(self, review_id: str, user_id: str, rating: Optional[int] = None, comment: Optional[str] = None):
-        """Update an existing review (only by the review owner)"""
-        # Check if review exists and belongs to user
-        review = await self.review_repository.get_review_by_id(review_id)
-        if not review:
-            return {"error": "Review not found"}
-        
-        if review["user_id"] != user_id:
-            return {"error": "Unauthorized: You can only update your own reviews"}
+        """Update an existing review (only by the review owner).
 
+        The write is ETag-guarded, so the rating delta applied to the
+        aggregate is always computed from the rating it actually replaced.
+        A concurrent edit makes the review be re-read and the update retried.
+        """
         update_data = {}
         if rating is not None:
             update_data["rating"] = rating
         if comment is not None:
             update_data["comment"] = comment.strip()
 
-        if not update_data:
-            return {"error": "No data to update"}
+        for attempt in range(settings.REVIEW_UPDATE_MAX_RETRIES):
+            # Check if review exists and belongs to user
+            review = await self.review_repository.get_review_by_id(review_id)
+            if not review:
+                return {"error": "Review not found"}
+
+            if review["user_id"] != user_id:
+                return {"error": "Unauthorized: You can only update your own reviews"}
+
+            if not update_data:
+                return {"error": "No data to update"}
 
-        return await self.review_repository.update_review(review_id, update_data)
+            try:
+                updated = await self.review_repository.update_review(review, update_data)
+            except CosmosAccessConditionFailedError:
+                await asyncio.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+                continue
+            if updated and rating is not None and rating != review.get("rating"):
+                await self._apply_rating_change(
+                    review["product_id"], 0, {str(review["rating"]): -1, str(rating): 1}, updated["updated_at"]
+                )
+            if updated:
+                await self._invalidate(review["product_id"])
+            return updated
+        return {"error": "Review update conflict: the review was modified concurrently, please retry"}
 
     async def delete_review(self, review_id: str, user_id: str):
         """Delete a review (only by the review owner)"""
@@ -68,46 +168,120 @@ class ReviewService:
         if review["user_id"] != user_id:
             return {"error": "Unauthorized: You can only delete your own reviews"}
 
+        deleted_at = datetime.utcnow().isoformat()
         success = await self.review_repository.delete_review(review_id)
+        if success:
+            await self._apply_rating_change(review["product_id"], -1, {str(review["rating"]): -1}, deleted_at)
+            await self._invalidate(review["product_id"])
         return {"success": success}
 
     async def get_product_rating_summary(self, product_id: str):
         """Get rating statistics for a product"""
-        stats = await self.review_repository.get_product_rating_stats(product_id)
-        if not stats:
-            return {
-                "total_reviews": 0,
-                "average_rating": 0.0,
-                "rating_distribution": {
-                    "5": 0, "4": 0, "3": 0, "2": 0, "1": 0
-                }
-            }
+        return await self._cached(
+            ReviewCacheRepository.SUMMARY, product_id, lambda: self._load_rating_summary(product_id)
+        )
+
+    async def _load_rating_summary(self, product_id: str):
+        """Read a product's rating statistics from its aggregate document"""
+        aggregate = await self.rating_aggregate_repository.get_aggregate(product_id)
+        if aggregate is None:
+            # First read of a product reviewed before aggregates existed; only
+            # a successful computation is persisted (failures propagate)
+            aggregate = await self._compute_aggregate(product_id)
+            try:
+                await asyncio.to_thread(self.rating_aggregate_repository.create_aggregate, aggregate)
+            except CosmosResourceExistsError:
+                pass
+            except Exception as e:
+                print(f"Error saving rating aggregate: {e}")
+
+        return self.map_to_summary_dto(aggregate)
+
+    async def get_rating_summaries(self, product_ids: List[str]) -> Dict[str, dict]:
+        """Get rating statistics for many products at once.
+
+        Cached summaries come from one Redis MGET and the rest from one Cosmos
+        read_items of their aggregates; only products that have no aggregate
+        yet fall back to the per-product path (once, as it creates one).
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        summaries, versions = {}, {}
+        if self.review_cache is not None:
+            try:
+                summaries, versions = await self.review_cache.get_many(ReviewCacheRepository.SUMMARY, product_ids)
+            except RedisError as e:
+                print(f"Review cache read failed (reading from Cosmos): {e}")
+
+        missing = [product_id for product_id in product_ids if product_id not in summaries]
+        if not missing:
+            return summaries
+
+        loaded = {}
+        for aggregate in await self.rating_aggregate_repository.get_aggregates(missing):
+            loaded[aggregate["id"]] = self.map_to_summary_dto(aggregate)
+        without_aggregate = [product_id for product_id in missing if product_id not in loaded]
+        if without_aggregate:
+            results = await asyncio.gather(*(self._load_rating_summary(product_id) for product_id in without_aggregate))
+            loaded.update(zip(without_aggregate, results))
+
+        if self.review_cache is not None and versions:
+            try:
+                await self.review_cache.set_many(
+                    ReviewCacheRepository.SUMMARY,
+                    {product_id: (summary, versions[product_id]) for product_id, summary in loaded.items()}
+                )
+            except RedisError as e:
+                print(f"Review cache write failed: {e}")
+
+        summaries.update(loaded)
+        return {product_id: summaries[product_id] for product_id in product_ids}
+
+    async def get_reviews_with_rating_summary(self, product_id: str, limit: int = 50, continuation_token: Optional[str] = None):
+        """Get product reviews along with rating summary.
+
+        The reviews and the summary are read concurrently. First pages of up
+        to REVIEW_FIRST_PAGE_SIZE reviews are cached together with the
+        summary (per page size, since the continuation token depends on it),
+        so most product page views are one Redis read.
+        """
+        if continuation_token is None and limit <= settings.REVIEW_FIRST_PAGE_SIZE:
+            page = await self._cached(
+                f"{ReviewCacheRepository.FIRST_PAGE}:{limit}", product_id, lambda: self._load_first_page(product_id, limit)
+            )
+        else:
+            page = await self._load_page(product_id, limit, continuation_token, self.get_product_rating_summary(product_id))
 
         return {
-            "total_reviews": stats.get("total_reviews", 0),
-            "average_rating": round(stats.get("average_rating", 0.0), 2),
-            "rating_distribution": {
-                "5": stats.get("five_stars", 0),
-                "4": stats.get("four_stars", 0),
-                "3": stats.get("three_stars", 0),
-                "2": stats.get("two_stars", 0),
-                "1": stats.get("one_star", 0)
+            "reviews": page["reviews"],
+            "rating_summary": page["rating_summary"],
+            "pagination": {
+                "limit": limit,
+                "continuation_token": page["continuation_token"],
+                "has_more": page["continuation_token"] is not None
             }
         }
 
-    async def get_reviews_with_rating_summary(self, product_id: str, limit: int = 50, offset: int = 0):
-        """Get product reviews along with rating summary"""
-        reviews = await self.get_product_reviews(product_id, limit, offset)
-        rating_summary = await self.get_product_rating_summary(product_id)
-        
+    async def _load_first_page(self, product_id: str, limit: int) -> dict:
+        return await self._load_page(product_id, limit, None, self._load_rating_summary(product_id))
+
+    async def _load_page(self, product_id: str, limit: int, continuation_token: Optional[str], rating_summary) -> dict:
+        (reviews, next_token), rating_summary = await asyncio.gather(
+            self.get_product_reviews(product_id, limit, continuation_token),
+            rating_summary
+        )
         return {
-            "reviews": reviews,
+            "reviews": [self.map_to_review_dto(review) for review in reviews],
             "rating_summary": rating_summary,
-            "pagination": {
-                "limit": limit,
-                "offset": offset,
-                "has_more": len(reviews) == limit
-            }
+            "continuation_token": next_token
+        }
+
+    def map_to_summary_dto(self, aggregate: dict) -> dict:
+        total_reviews = aggregate.get("total_reviews", 0)
+        histogram = aggregate.get("histogram", {})
+        return {
+            "total_reviews": total_reviews,
+            "average_rating": round(aggregate.get("rating_sum", 0) / total_reviews, 2) if total_reviews > 0 else 0.0,
+            "rating_distribution": {rating: histogram.get(rating, 0) for rating in reversed(RATINGS)}
         }
 
     def map_to_review_dto(self, review) -> dict:
@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime
+
+from repositories.waiting_room_repository import WaitingRoomRepository, get_waiting_room_repository
+from settings import settings
+from utils import create_admission_token
+
+
+class WaitingRoomService:
+    """Meters users into checkout at WAITING_ROOM_ADMIT_RATE per second.
+
+    Users join the queue and poll their ticket; every join and poll lets the
+    queue advance by whatever the rate allows. An admitted ticket carries a
+    signed token valid for WAITING_ROOM_TOKEN_TTL seconds, which checkout
+    verifies without a Redis round trip. Tickets that stop polling for
+    WAITING_ROOM_TICKET_TTL seconds lose their place.
+    """
+
+    def __init__(self, repository: WaitingRoomRepository):
+        self.repository = repository
+
+    async def _advance(self):
+        await self.repository.admit(
+            settings.WAITING_ROOM_ADMIT_RATE,
+            settings.WAITING_ROOM_BURST,
+            settings.WAITING_ROOM_MAX_SCAN,
+            settings.WAITING_ROOM_TOKEN_TTL
+        )
+
+    async def join(self, user_id: str) -> dict:
+        ticket_id = await self.repository.join(uuid.uuid4().hex, user_id, settings.WAITING_ROOM_TICKET_TTL)
+        return await self.get_status(ticket_id)
+
+    async def get_status(self, ticket_id: str):
+        await self._advance()
+        ticket = await self.repository.get_ticket(ticket_id, settings.WAITING_ROOM_TICKET_TTL)
+        if not ticket:
+            return None
+        return self.map_to_status_dto(ticket)
+
+    def map_to_status_dto(self, ticket: dict) -> dict:
+        status = {
+            "ticket_id": ticket["ticket_id"],
+            "user_id": ticket.get("user_id"),
+            "status": ticket.get("status", "waiting"),
+            "position": ticket.get("position", 0),
+            "estimated_wait_seconds": 0,
+            "admission_token": None,
+            "token_expires_at": None
+        }
+        if status["status"] == "admitted":
+            admitted_at = datetime.utcfromtimestamp(int(ticket.get("admitted_at", 0)) / 1000)
+            token, expires_at = create_admission_token(status["user_id"], status["ticket_id"], admitted_at)
+            status["position"] = 0
+            status["admission_token"] = token
+            status["token_expires_at"] = expires_at
+        else:
+            status["estimated_wait_seconds"] = round(status["position"] / settings.WAITING_ROOM_ADMIT_RATE)
+        return status
+
+
+def validate_waiting_room_settings():
+    """Refuse to start a waiting room whose tokens anyone could forge or that never admits anyone"""
+    if not settings.WAITING_ROOM_ENABLED:
+        return
+    if not settings.WAITING_ROOM_SECRET:
+        raise RuntimeError("WAITING_ROOM_ENABLED requires WAITING_ROOM_SECRET (or SECRET_KEY) to be set")
+    if settings.WAITING_ROOM_ADMIT_RATE <= 0:
+        raise RuntimeError("WAITING_ROOM_ADMIT_RATE must be greater than 0")
+
+
+_waiting_room_service = None
+
+
+def get_waiting_room_service() -> WaitingRoomService:
+    global _waiting_room_service
+    if _waiting_room_service is None:
+        _waiting_room_service = WaitingRoomService(get_waiting_room_repository())
+    return _waiting_room_service
@@ -13,15 +13,97 @@ class Settings(BaseSettings):
     COSMOS_ENDPOINT: str = os.getenv("COSMOS_ENDPOINT", "https://localhost:8081")
     COSMOS_KEY: str = os.getenv("COSMOS_KEY", "cosmos-key")
     COSMOS_DB_NAME: str = os.getenv("COSMOS_DB_NAME", "microservicedb")
-    COSMOS_CONTAINER_CART: str = os.getenv("COSMOS_CONTAINER_CART", "cart")
+    COSMOS_CONTAINER_CARTS: str = os.getenv("COSMOS_CONTAINER_CARTS", os.getenv("COSMOS_CONTAINER_CART", "cart"))
     COSMOS_CONTAINER_ORDERS: str = os.getenv("COSMOS_CONTAINER_ORDERS", "orders")
     COSMOS_CONTAINER_REVIEWS: str = os.getenv("COSMOS_CONTAINER_REVIEWS", "reviews")
+    COSMOS_CONTAINER_RATING_AGGREGATES: str = os.getenv("COSMOS_CONTAINER_RATING_AGGREGATES", "rating_aggregates")
+    COSMOS_CONTAINER_PROMOTIONS: str = os.getenv("COSMOS_CONTAINER_PROMOTIONS", "promotions")
+    COSMOS_CONTAINER_INVENTORY: str = os.getenv("COSMOS_CONTAINER_INVENTORY", "inventory")
 
     # Redis configuration (when implemented)
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
     REDIS_SSL: bool = os.getenv("REDIS_SSL", "false").lower() == "true"
+    # "required", "optional" or "none"; only used when REDIS_SSL is on
+    REDIS_SSL_CERT_REQS: str = os.getenv("REDIS_SSL_CERT_REQS", "required")
+
+    # Core item service, the source of product prices and availability
+    CORE_SERVICE_URL: str = os.getenv("CORE_SERVICE_URL", "http://localhost:8002")
+    PRODUCT_REQUEST_TIMEOUT: float = float(os.getenv("PRODUCT_REQUEST_TIMEOUT", "3.0"))
+    PRODUCT_BATCH_SIZE: int = int(os.getenv("PRODUCT_BATCH_SIZE", "200"))
+    PRODUCT_CACHE_TTL: float = float(os.getenv("PRODUCT_CACHE_TTL", "30"))
+    PRODUCT_CACHE_MAX_ENTRIES: int = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "20000"))
+
+    # Hot cart store in Redis with write-behind persistence to Cosmos
+    CART_STORE_ENABLED: bool = os.getenv("CART_STORE_ENABLED", "true").lower() == "true"
+    CART_CACHE_TTL: int = int(os.getenv("CART_CACHE_TTL", str(7 * 24 * 3600)))
+    CART_FLUSH_INTERVAL: float = float(os.getenv("CART_FLUSH_INTERVAL", "1.0"))
+    CART_FLUSH_BATCH_SIZE: int = int(os.getenv("CART_FLUSH_BATCH_SIZE", "200"))
+    CART_FLUSH_CONCURRENCY: int = int(os.getenv("CART_FLUSH_CONCURRENCY", "16"))
+    # Attempts for an ETag-guarded cart patch that keeps losing to concurrent writers
+    CART_PATCH_MAX_RETRIES: int = int(os.getenv("CART_PATCH_MAX_RETRIES", "5"))
+
+    # Checkout: idempotency keys and the order outbox relay
+    IDEMPOTENCY_TTL: int = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+    IDEMPOTENCY_LOCK_TTL: int = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "60"))
+    OUTBOX_RELAY_ENABLED: bool = os.getenv("OUTBOX_RELAY_ENABLED", "true").lower() == "true"
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "2.0"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_MAX_BACKOFF_SECONDS: int = int(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+    # Order numbers are reserved from Redis in blocks of this size per process
+    ORDER_ID_BLOCK_SIZE: int = int(os.getenv("ORDER_ID_BLOCK_SIZE", "100"))
+    # Blocks skipped past the highest stored order number when the counter is re-seeded,
+    # covering numbers still held in memory by running replicas
+    ORDER_ID_SEED_GAP_BLOCKS: int = int(os.getenv("ORDER_ID_SEED_GAP_BLOCKS", "10"))
+    # Orders per page of a user's order history
+    ORDER_PAGE_SIZE: int = int(os.getenv("ORDER_PAGE_SIZE", "20"))
+    ORDER_EVENTS_STREAM: str = os.getenv("ORDER_EVENTS_STREAM", "events:orders")
+    ORDER_EVENTS_STREAM_MAXLEN: int = int(os.getenv("ORDER_EVENTS_STREAM_MAXLEN", "100000"))
+
+    # Inventory: live counters in Redis, reconciled to Cosmos by the inventory worker
+    INVENTORY_RESERVATION_TTL: int = int(os.getenv("INVENTORY_RESERVATION_TTL", "900"))
+    INVENTORY_COMMITTED_MARKER_TTL: int = int(os.getenv("INVENTORY_COMMITTED_MARKER_TTL", str(7 * 24 * 3600)))
+    INVENTORY_UNTRACKED_TTL: int = int(os.getenv("INVENTORY_UNTRACKED_TTL", "300"))
+    INVENTORY_WORKER_ENABLED: bool = os.getenv("INVENTORY_WORKER_ENABLED", "true").lower() == "true"
+    INVENTORY_WORKER_INTERVAL: float = float(os.getenv("INVENTORY_WORKER_INTERVAL", "1.0"))
+    INVENTORY_SWEEP_BATCH_SIZE: int = int(os.getenv("INVENTORY_SWEEP_BATCH_SIZE", "500"))
+    INVENTORY_RECONCILE_BATCH_SIZE: int = int(os.getenv("INVENTORY_RECONCILE_BATCH_SIZE", "200"))
+    INVENTORY_RECONCILE_CONCURRENCY: int = int(os.getenv("INVENTORY_RECONCILE_CONCURRENCY", "16"))
+
+    # Waiting room in front of checkout; when enabled, checkout requires an admission token
+    WAITING_ROOM_ENABLED: bool = os.getenv("WAITING_ROOM_ENABLED", "false").lower() == "true"
+    WAITING_ROOM_ADMIT_RATE: float = float(os.getenv("WAITING_ROOM_ADMIT_RATE", "20"))
+    WAITING_ROOM_BURST: int = int(os.getenv("WAITING_ROOM_BURST", "20"))
+    WAITING_ROOM_MAX_SCAN: int = int(os.getenv("WAITING_ROOM_MAX_SCAN", "1000"))
+    WAITING_ROOM_TICKET_TTL: int = int(os.getenv("WAITING_ROOM_TICKET_TTL", "120"))
+    WAITING_ROOM_TOKEN_TTL: int = int(os.getenv("WAITING_ROOM_TOKEN_TTL", "300"))
+    WAITING_ROOM_POLL_INTERVAL: float = float(os.getenv("WAITING_ROOM_POLL_INTERVAL", "2.0"))
+    # Signs admission tokens; required when the waiting room is enabled (checked at startup)
+    WAITING_ROOM_SECRET: str = os.getenv("WAITING_ROOM_SECRET", os.getenv("SECRET_KEY", ""))
+    WAITING_ROOM_ALGORITHM: str = os.getenv("WAITING_ROOM_ALGORITHM", "HS256")
+
+    # Review pages: first pages of up to REVIEW_FIRST_PAGE_SIZE reviews and rating summaries are cached
+    REVIEW_CACHE_TTL: int = int(os.getenv("REVIEW_CACHE_TTL", "300"))
+    REVIEW_FIRST_PAGE_SIZE: int = int(os.getenv("REVIEW_FIRST_PAGE_SIZE", "50"))
+    # Attempts for an ETag-guarded review update that keeps losing to concurrent edits
+    REVIEW_UPDATE_MAX_RETRIES: int = int(os.getenv("REVIEW_UPDATE_MAX_RETRIES", "3"))
+
+    # Promotions: compiled rulesets are reused until the app's version in Redis
+    # changes; the version is checked at most once per interval
+    PROMOTION_VERSION_CHECK_INTERVAL: float = float(os.getenv("PROMOTION_VERSION_CHECK_INTERVAL", "5.0"))
+    DEFAULT_APP_ID: str = os.getenv("DEFAULT_APP_ID", "default")
+
+    # Cleanup of data owned by deleted users (events published by the user service)
+    USER_DELETED_STREAM: str = os.getenv("USER_DELETED_STREAM", "events:user-deleted")
+    USER_DELETED_DLQ_STREAM: str = os.getenv("USER_DELETED_DLQ_STREAM", "events:user-deleted:dead")
+    USER_DELETION_CONSUMER_ENABLED: bool = os.getenv("USER_DELETION_CONSUMER_ENABLED", "true").lower() == "true"
+    USER_DELETION_BATCH_SIZE: int = int(os.getenv("USER_DELETION_BATCH_SIZE", "100"))
+    USER_DELETION_CONCURRENCY: int = int(os.getenv("USER_DELETION_CONCURRENCY", "8"))
+    USER_DELETION_CLAIM_IDLE_MS: int = int(os.getenv("USER_DELETION_CLAIM_IDLE_MS", "60000"))
+    USER_DELETION_MAX_DELIVERIES: int = int(os.getenv("USER_DELETION_MAX_DELIVERIES", "5"))
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+from jose import jwt, JWTError
+from settings import settings
+
+ADMISSION_AUDIENCE = "checkout"
+
+
+def create_admission_token(user_id: str, ticket_id: str, admitted_at: datetime) -> tuple:
+    """Return (token, expires_at) letting `user_id` through to checkout"""
+    expires_at = admitted_at + timedelta(seconds=settings.WAITING_ROOM_TOKEN_TTL)
+    claims = {"sub": user_id, "aud": ADMISSION_AUDIENCE, "jti": ticket_id, "exp": expires_at}
+    return jwt.encode(claims, settings.WAITING_ROOM_SECRET, algorithm=settings.WAITING_ROOM_ALGORITHM), expires_at
+
+
+def verify_admission_token(token: str, user_id: str) -> bool:
+    """Check signature, expiry and owner of an admission token without touching Redis"""
+    try:
+        claims = jwt.decode(
+            token,
+            settings.WAITING_ROOM_SECRET,
+            algorithms=[settings.WAITING_ROOM_ALGORITHM],
+            audience=ADMISSION_AUDIENCE
+        )
+    except JWTError:
+        return False
+    return claims.get("sub") == user_id
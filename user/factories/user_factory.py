@@ -1,5 +1,6 @@
 from db.database import create_redis_client
 from repositories.user_repository import UserRepository
+from services.principal_cache import get_principal_cache
 from services.user_service import UserService
 
 
@@ -9,6 +10,6 @@ class UserServiceFactory:
         """Create and configure UserService with its dependencies"""
         user_repository = UserRepository()
         redis = create_redis_client()
-        return UserService(user_repository, redis)
+        return UserService(user_repository, redis, get_principal_cache())
 
         
\ No newline at end of file
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.user_route import router as user_router
+from routes.file_route import router as file_router
+from services.revocation_listener import get_revocation_listener
+from services.deletion_outbox_relay import get_deletion_outbox_relay
 
 # Create FastAPI app
 app = FastAPI(
@@ -20,6 +23,16 @@ app.add_middleware(
 
 # Include routes
 app.include_router(user_router, prefix="/api/v1", tags=["users"])
+app.include_router(file_router, prefix="/api/v1", tags=["files"])
+
+@app.on_event("startup")
+def start_revocation_listener():
+    get_revocation_listener().start()
+
+
+@app.on_event("startup")
+def start_deletion_outbox_relay():
+    get_deletion_outbox_relay().start()
 
 # Health check endpoint
 @app.get("/health")
@@ -1,6 +1,13 @@
-from typing import Optional
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from db.database import container
 
+# Everything a directory export needs; the password hash never leaves Cosmos
+EXPORT_PROJECTION = "c.id, c.full_name, c.email, c.avatar_url, c.role, c.is_active"
+
 
 class UserRepository:
     def get_user_by_id(self, user_id: str) -> Optional[dict]:
@@ -11,6 +18,20 @@ class UserRepository:
         except Exception:
             return None
 
+    def user_exists(self, user_id: str) -> bool:
+        """Whether the user document is still stored (Cosmos errors propagate)"""
+        try:
+            container.read_item(item=user_id, partition_key=user_id)
+            return True
+        except CosmosResourceNotFoundError:
+            return False
+
+    def get_users_by_ids(self, user_ids: list[str]) -> list[dict]:
+        """Point-read many users in a single request (missing ids are skipped)"""
+        if not user_ids:
+            return []
+        return list(container.read_items(items=[(user_id, user_id) for user_id in user_ids]))
+
     def get_user_by_email(self, email: str) -> Optional[dict]:
         """Get a user by email address"""
         try:
@@ -54,6 +75,56 @@ class UserRepository:
             "total_pages": total_pages
         }
 
+    def iter_active_users(self, page_size: int = 500, parallelism: int = 4) -> Iterator[list[dict]]:
+        """Yield pages of active users, reading every feed range in parallel.
+
+        Each range is paged with its own continuation token on a worker thread.
+        Pages are handed over through a bounded queue, so memory stays constant
+        however large the container is, and a slow consumer throttles the reads.
+        """
+        query = f"SELECT {EXPORT_PROJECTION} FROM c WHERE c.is_active = true"
+        feed_ranges = list(container.read_feed_ranges())
+        pages = queue.Queue(maxsize=parallelism * 2)
+        stop = threading.Event()
+        finished = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read_range(feed_range):
+            try:
+                pager = container.query_items(query=query, feed_range=feed_range, max_item_count=page_size).by_page()
+                for page in pager:
+                    if not put(list(page)):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(finished)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(feed_ranges))))
+        try:
+            for feed_range in feed_ranges:
+                pool.submit(read_range, feed_range)
+            remaining = len(feed_ranges)
+            while remaining:
+                item = pages.get()
+                if item is finished:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                elif item:
+                    yield item
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
     def create_user(self, user_data: dict) -> dict:
         """Create a new user"""
         try:
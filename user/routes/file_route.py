@@ -0,0 +1,120 @@
+import mimetypes
+import os
+import re
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from schemas.base_response import BaseResponse
+from settings import settings
+from utils import save_file
+
+
+router = APIRouter()
+
+# Stored names are a SHA-256 hex digest plus an optional extension
+FILENAME_PATTERN = re.compile(r"^[0-9a-f]{64}(\.[0-9a-z]{1,15})?$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(range_header: str, file_size: int):
+    """Return (start, end) for a single byte range, or None if unsatisfiable"""
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    if not match.group(1):
+        # Suffix range: the last N bytes
+        length = int(match.group(2))
+        if length == 0:
+            return None
+        return max(0, file_size - length), file_size - 1
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else file_size - 1
+    if start >= file_size or end < start:
+        return None
+    return start, min(end, file_size - 1)
+
+
+def _iter_range(file_path: str, start: int, end: int):
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.post("/files")
+async def upload_file(
+    request: Request,
+    filename: str = Query(None, description="Original file name; only its extension is kept")
+):
+    """Upload a file sent as the raw request body; identical content resolves to the same name"""
+    try:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+        stored_name = await save_file(request.stream(), filename)
+        return BaseResponse(
+            status_code=201,
+            message="File uploaded successfully",
+            data={"filename": stored_name, "url": f"/api/v1/files/{stored_name}"}
+        )
+    except HTTPException as e:
+        return BaseResponse(
+            status_code=e.status_code,
+            message=str(e.detail),
+            data=None
+        )
+    except Exception as e:
+        return BaseResponse(
+            status_code=500,
+            message=str(e),
+            data=None
+        )
+
+
+@router.get("/files/{filename}")
+def get_file(filename: str, request: Request):
+    """Serve an uploaded file with ETag and single-range support"""
+    if not FILENAME_PATTERN.match(filename):
+        raise HTTPException(status_code=404, detail="File not found")
+    file_path = os.path.join(settings.UPLOAD_DIR, filename)
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Content-addressed names never change content, so the hash is a strong ETag
+    etag = f'"{filename.split(".")[0]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if request.headers.get("if-none-match") in (etag, "*"):
+        return Response(status_code=304, headers=headers)
+
+    file_size = os.path.getsize(file_path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, file_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{file_size}"})
+        start, end = byte_range
+        return StreamingResponse(
+            _iter_range(file_path, start, end),
+            status_code=206,
+            media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end}/{file_size}",
+                "Content-Length": str(end - start + 1)
+            }
+        )
+
+    # Full responses go through FileResponse, which hands the path to the
+    # server for sendfile when it supports the pathsend extension
+    return FileResponse(file_path, headers=headers)
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
 from factories.user_factory import UserServiceFactory
 from schemas.base_response import BaseResponse
 from schemas.user_schema import (
+    UserBatchRequest,
     UserCreateRequest, 
     UserUpdateRequest
 )
@@ -14,6 +16,26 @@ router = APIRouter()
 user_service = UserServiceFactory.create()
 
 
+@router.get("/users/principal-cache/stats")
+def get_principal_cache_stats():
+    """Hit-ratio metrics for the principal cache"""
+    return BaseResponse(
+        status_code=200,
+        message="Principal cache stats retrieved successfully",
+        data=user_service.principal_cache.stats()
+    )
+
+
+@router.get("/users/export")
+def export_users():
+    """Stream all active users as NDJSON"""
+    return StreamingResponse(
+        user_service.export_active_users(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=users.ndjson"}
+    )
+
+
 @router.get("/users/{user_id}")
 def get_user_by_id(user_id: str):
     """Get a user by ID"""
@@ -60,6 +82,30 @@ def get_users(
         )
 
 
+@router.post("/users/batch")
+def get_users_batch(batch_request: UserBatchRequest):
+    """Resolve display data for many users in one call"""
+    try:
+        users = user_service.get_users_by_ids(batch_request.ids)
+        return BaseResponse(
+            status_code=200, 
+            message="Users retrieved successfully", 
+            data=users
+        )
+    except ValueError as e:
+        return BaseResponse(
+            status_code=400, 
+            message=str(e), 
+            data=None
+        )
+    except Exception as e:
+        return BaseResponse(
+            status_code=500, 
+            message=str(e), 
+            data=None
+        )
+
+
 @router.post("/users")
 def create_user(user_request: UserCreateRequest):
     """Create a new user"""
@@ -193,3 +239,28 @@ def delete_user(user_id: str):
             data=None
         )
 
+
+
+@router.get("/users/{user_id}/deletion-status")
+def get_deletion_status(user_id: str):
+    """Progress of the asynchronous cleanup after a user was deleted"""
+    try:
+        status = user_service.get_deletion_status(user_id)
+        if status:
+            return BaseResponse(
+                status_code=200, 
+                message="Deletion status retrieved successfully", 
+                data=status
+            )
+        else:
+            return BaseResponse(
+                status_code=404, 
+                message="No deletion recorded for this user", 
+                data=None
+            )
+    except Exception as e:
+        return BaseResponse(
+            status_code=500, 
+            message=str(e), 
+            data=None
+        )
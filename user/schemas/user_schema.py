@@ -35,3 +35,7 @@ class UserUpdateRequest(BaseModel):
     role: Optional[str] = None
     is_active: Optional[bool] = None
 
+
+class UserBatchRequest(BaseModel):
+    """Request schema for resolving many users at once"""
+    ids: list[str] = Field(..., min_length=1)
@@ -0,0 +1,39 @@
+import threading
+import time
+
+from factories.user_factory import UserServiceFactory
+from settings import settings
+
+
+class DeletionOutboxRelay:
+    """Publishes user deletion events that were left pending after a failed publish"""
+
+    def __init__(self, user_service):
+        self.user_service = user_service
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="deletion-outbox-relay", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                published = self.user_service.publish_pending_deletions()
+                if published:
+                    print(f"Published {published} pending user deletion event(s)")
+            except Exception as e:
+                print(f"Deletion outbox relay error (retrying): {e}")
+            time.sleep(settings.USER_DELETION_RELAY_INTERVAL)
+
+
+_deletion_outbox_relay = None
+
+
+def get_deletion_outbox_relay() -> DeletionOutboxRelay:
+    global _deletion_outbox_relay
+    if _deletion_outbox_relay is None:
+        _deletion_outbox_relay = DeletionOutboxRelay(UserServiceFactory.create())
+    return _deletion_outbox_relay
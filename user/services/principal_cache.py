@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+from db.database import create_redis_client
+from repositories.user_repository import UserRepository
+from settings import settings
+
+# Stored in Redis for ids that do not resolve to a user
+MISSING = "__missing__"
+
+# Fields never exposed as part of a principal
+PRIVATE_FIELDS = ("password", "password_params", "_rid", "_self", "_etag", "_attachments", "_ts")
+
+
+class PrincipalCache:
+    """Short-lived cache of authenticated principals keyed by user id.
+
+    Lookups go process memory -> Redis -> Cosmos. Unknown ids are cached as
+    negative entries so a stream of tokens for deleted users does not reach
+    Cosmos. The in-process TTL is kept short because other replicas only see
+    invalidations through Redis.
+    """
+
+    def __init__(self, redis, loader: Callable[[str], Optional[dict]]):
+        self.redis = redis
+        self.loader = loader
+        self._local = {}
+        self._lock = threading.Lock()
+        self._counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "negative_hits": 0}
+
+    def _key(self, user_id: str) -> str:
+        return f"principal:{user_id}"
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _store_local(self, user_id: str, principal: Optional[dict]):
+        ttl = settings.PRINCIPAL_CACHE_LOCAL_TTL if principal else settings.PRINCIPAL_CACHE_NEGATIVE_TTL
+        with self._lock:
+            self._local.pop(user_id, None)
+            if len(self._local) >= settings.PRINCIPAL_CACHE_MAX_ENTRIES:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                self._local.pop(next(iter(self._local)))
+            self._local[user_id] = (time.monotonic() + ttl, principal)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self._local.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            self._count("local_hits")
+            if entry[1] is None:
+                self._count("negative_hits")
+            return entry[1]
+
+        try:
+            cached = self.redis.get(self._key(user_id))
+        except Exception as e:
+            print(f"Redis principal cache error (continuing without cache): {e}")
+            cached = None
+
+        if cached is not None:
+            self._count("redis_hits")
+            principal = None if cached == MISSING else json.loads(cached)
+            if principal is None:
+                self._count("negative_hits")
+            self._store_local(user_id, principal)
+            return principal
+
+        self._count("misses")
+        user = self.loader(user_id)
+        principal = {k: v for k, v in user.items() if k not in PRIVATE_FIELDS} if user else None
+        self._store_local(user_id, principal)
+        try:
+            if principal:
+                self.redis.set(self._key(user_id), json.dumps(principal, default=str), ex=settings.PRINCIPAL_CACHE_TTL)
+            else:
+                self.redis.set(self._key(user_id), MISSING, ex=settings.PRINCIPAL_CACHE_NEGATIVE_TTL)
+        except Exception as e:
+            print(f"Redis principal cache error (continuing anyway): {e}")
+        return principal
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._local.pop(user_id, None)
+        try:
+            self.redis.delete(self._key(user_id))
+        except Exception as e:
+            print(f"Redis principal cache invalidation error (continuing anyway): {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["local_entries"] = len(self._local)
+        lookups = counters["local_hits"] + counters["redis_hits"] + counters["misses"]
+        counters["lookups"] = lookups
+        counters["hit_ratio"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else 0.0
+        return counters
+
+
+_principal_cache = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache(create_redis_client(), UserRepository().get_user_by_id)
+    return _principal_cache
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from common.revocation_filter import REVOKED_INDEX_KEY, REVOKED_VERSION_KEY, RevocationFilter, snapshot_version
+from db.database import create_redis_client
+from settings import settings
+
+
+class RevocationListener:
+    """Keeps the latest revocation filter in memory so token checks stay local"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.filter = RevocationFilter()
+        self._thread = None
+
+    def is_revoked(self, jti: str) -> bool:
+        if not jti:
+            return False
+        if not self.filter.may_contain(jti):
+            return False
+        # Bloom hit (or no filter yet): confirm against the authoritative key
+        try:
+            return self.redis.exists(f"revoked:{jti}") == 1
+        except Exception as e:
+            print(f"Redis revocation check error (continuing anyway): {e}")
+            return False
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._listen, name="revocation-listener", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.get(settings.REVOCATION_SNAPSHOT_KEY)
+        pipe.get(REVOKED_VERSION_KEY)
+        snapshot, version = pipe.execute()
+        if snapshot and snapshot_version(snapshot) >= int(version or 0):
+            self.filter.apply_message(snapshot)
+            return
+        # The snapshot misses revocations made since it was published
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.get(REVOKED_VERSION_KEY)
+        pipe.zrangebyscore(REVOKED_INDEX_KEY, int(time.time()), "+inf")
+        version, jtis = pipe.execute()
+        self.filter.rebuild(int(version or 0), jtis, settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.REVOCATION_CHANNEL)
+                self._load()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.filter.apply_message(message["data"])
+            except Exception as e:
+                print(f"Revocation listener error, resubscribing: {e}")
+                time.sleep(1)
+
+
+_revocation_listener = None
+
+
+def get_revocation_listener() -> RevocationListener:
+    global _revocation_listener
+    if _revocation_listener is None:
+        _revocation_listener = RevocationListener(create_redis_client())
+    return _revocation_listener
@@ -1,29 +1,87 @@
 import json
 import uuid
-from datetime import timedelta
+from datetime import datetime, timedelta
 from typing import Optional
 
 import redis
 from repositories.user_repository import UserRepository
+from services.principal_cache import PrincipalCache
 from schemas.user_schema import (
     UserDTO, UserDetailDTO, UserCreateRequest
 )
 from settings import settings
-from utils import hash_password
+from utils import hash_password, hash_params
+
+# Cached in place of a user for ids/emails that do not exist
+MISSING = "__missing__"
 
 
 class UserService:
-    def __init__(self, user_repository: UserRepository, redis: redis.Redis):
+    def __init__(self, user_repository: UserRepository, redis: redis.Redis, principal_cache: PrincipalCache):
         self.user_repository = user_repository
         self.redis = redis
+        self.principal_cache = principal_cache
 
     def get_user_by_id(self, user_id: str) -> Optional[UserDetailDTO]:
-        """Get a user by ID"""
+        """Get a user by ID (read-through cache)"""
+        key = self._user_key(user_id)
+        cached = self._cache_get(key)
+        if cached == MISSING:
+            return None
+        if cached:
+            return UserDetailDTO(**json.loads(cached))
+
         user = self.user_repository.get_user_by_id(user_id)
         if user:
-            return self.map_user_to_detail_dto(user)
+            user_dto = self.map_user_to_detail_dto(user)
+            self._cache_set(key, json.dumps(user_dto.model_dump(), default=str), settings.USER_CACHE_TTL)
+            return user_dto
+        self._cache_set(key, MISSING, settings.USER_NEGATIVE_CACHE_TTL)
         return None
 
+    def get_users_by_ids(self, user_ids: list[str]) -> dict:
+        """Resolve many users: cache first (one MGET), then one Cosmos read_items for the misses"""
+        unique_ids = list(dict.fromkeys(user_ids))
+        if len(unique_ids) > settings.MAX_USER_BATCH_SIZE:
+            raise ValueError(f"At most {settings.MAX_USER_BATCH_SIZE} user ids can be requested at once")
+
+        try:
+            cached = self.redis.mget([self._user_key(user_id) for user_id in unique_ids])
+        except Exception as e:
+            print(f"Redis error (continuing without cache): {e}")
+            cached = [None] * len(unique_ids)
+
+        found = {}
+        misses = []
+        for user_id, value in zip(unique_ids, cached):
+            if value == MISSING:
+                continue
+            if value:
+                found[user_id] = UserDTO(**json.loads(value))
+            else:
+                misses.append(user_id)
+
+        if misses:
+            loaded = {user['id']: self.map_user_to_detail_dto(user) for user in self.user_repository.get_users_by_ids(misses)}
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for user_id in misses:
+                    if user_id in loaded:
+                        found[user_id] = UserDTO(**loaded[user_id].model_dump())
+                        pipe.set(self._user_key(user_id), json.dumps(loaded[user_id].model_dump(), default=str), ex=settings.USER_CACHE_TTL)
+                    else:
+                        pipe.set(self._user_key(user_id), MISSING, ex=settings.USER_NEGATIVE_CACHE_TTL)
+                pipe.execute()
+            except Exception as e:
+                print(f"Redis caching error (continuing anyway): {e}")
+                for user_id, user_dto in loaded.items():
+                    found[user_id] = UserDTO(**user_dto.model_dump())
+
+        return {
+            "users": [found[user_id].model_dump() for user_id in unique_ids if user_id in found],
+            "not_found": [user_id for user_id in unique_ids if user_id not in found]
+        }
+
     def get_users(self, page_number: int = 1, page_size: int = 10) -> dict:
         """Get paginated list of users"""
         redis_key = f"users:page:{page_number}:size:{page_size}"
@@ -56,6 +114,11 @@ class UserService:
         
         return data
     
+    def export_active_users(self):
+        """Yield every active user as one NDJSON line"""
+        for page in self.user_repository.iter_active_users(settings.EXPORT_PAGE_SIZE, settings.EXPORT_PARALLELISM):
+            yield "".join(json.dumps(user, default=str) + "\n" for user in page)
+
     def create_user(self, user_request: UserCreateRequest) -> UserDetailDTO:
         """Create a new user"""
         user_data = user_request.model_dump()
@@ -68,11 +131,13 @@ class UserService:
         
         # Hash password before storing
         user_data['password'] = hash_password(user_data['password'])
+        user_data['password_params'] = hash_params()
         
         new_user = self.user_repository.create_user(user_data)
         
-        # Clear cache
+        # Clear cache, including any negative entry for this email
         self._clear_users_cache()
+        self._invalidate_user(new_user['id'], new_user.get('email'))
         
         return self.map_user_to_detail_dto(new_user)
     
@@ -83,9 +148,13 @@ class UserService:
         for field in restricted_fields:
             update_data.pop(field, None)
         
+        # The old email's entry has to go too when the email changes
+        previous_user = self.get_user_by_id(user_id) if 'email' in update_data else None
+
         updated_user = self.user_repository.update_user(user_id, update_data)
         if updated_user:
             self._clear_users_cache()
+            self._invalidate_user(user_id, updated_user.get('email'), previous_user.email if previous_user else None)
             return self.map_user_to_detail_dto(updated_user)
         return None
     
@@ -94,6 +163,7 @@ class UserService:
         success = self.user_repository.deactivate_user(user_id)
         if success:
             self._clear_users_cache()
+            self._invalidate_user(user_id)
         return success
 
     def activate_user(self, user_id: str) -> bool:
@@ -101,14 +171,105 @@ class UserService:
         success = self.user_repository.activate_user(user_id)
         if success:
             self._clear_users_cache()
+            self._invalidate_user(user_id)
         return success
 
     def delete_user(self, user_id: str) -> bool:
-        """Hard delete a user"""
+        """Hard delete a user; dependent data is cleaned up asynchronously by each service"""
+        user = self.get_user_by_id(user_id)
+        if not user:
+            return False
+        # Record the deletion as pending before touching Cosmos. The event is
+        # only published once the delete succeeded; if publishing fails the
+        # outbox relay finds the pending entry and publishes it later.
+        self.redis.zadd(self._pending_deletions_key(), {user_id: datetime.utcnow().timestamp()})
         success = self.user_repository.delete_user(user_id)
-        if success:
-            self._clear_users_cache()
-        return success
+        if not success:
+            self._discard_pending_deletion(user_id)
+            return False
+        self._clear_users_cache()
+        self._invalidate_user(user_id, user.email if user else None)
+        try:
+            self._publish_user_deleted(user_id)
+        except Exception as e:
+            print(f"User deletion event publish error (relay will retry): {e}")
+        return True
+
+    def publish_pending_deletions(self) -> int:
+        """Publish deletion events that were not published right after the delete"""
+        cutoff = datetime.utcnow().timestamp() - settings.USER_DELETION_RELAY_GRACE_SECONDS
+        user_ids = self.redis.zrangebyscore(
+            self._pending_deletions_key(), "-inf", cutoff,
+            start=0, num=settings.USER_DELETION_RELAY_BATCH_SIZE
+        )
+        published = 0
+        for user_id in user_ids:
+            # Still in Cosmos: the delete never went through, so there is nothing to clean up
+            if self.user_repository.user_exists(user_id):
+                self._discard_pending_deletion(user_id)
+                continue
+            self._publish_user_deleted(user_id)
+            published += 1
+        return published
+
+    def get_deletion_status(self, user_id: str) -> Optional[dict]:
+        """Progress of the cascading cleanup, per consuming service"""
+        status = self.redis.hgetall(self._deletion_key(user_id))
+        return status or None
+
+    def _deletion_key(self, user_id: str) -> str:
+        return f"user_deletion:{user_id}"
+
+    def _pending_deletions_key(self) -> str:
+        return "user_deletion:pending"
+
+    def _discard_pending_deletion(self, user_id: str):
+        try:
+            self.redis.zrem(self._pending_deletions_key(), user_id)
+        except Exception as e:
+            print(f"Redis pending deletion clear error (relay will recheck): {e}")
+
+    def _publish_user_deleted(self, user_id: str):
+        deleted_at = datetime.utcnow().isoformat()
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self._deletion_key(user_id), mapping={"requested_at": deleted_at})
+        pipe.expire(self._deletion_key(user_id), settings.USER_DELETION_PROGRESS_TTL)
+        pipe.xadd(
+            settings.USER_DELETED_STREAM,
+            {"event_id": uuid.uuid4().hex, "user_id": user_id, "deleted_at": deleted_at},
+            maxlen=settings.USER_DELETED_STREAM_MAXLEN,
+            approximate=True
+        )
+        pipe.zrem(self._pending_deletions_key(), user_id)
+        pipe.execute()
+
+    def _user_key(self, user_id: str) -> str:
+        return f"user:id:{user_id}"
+
+    def _email_key(self, email: str) -> str:
+        return f"user:email:{email.strip().lower()}"
+
+    def _cache_get(self, key: str):
+        try:
+            return self.redis.get(key)
+        except Exception as e:
+            print(f"Redis error (continuing without cache): {e}")
+            return None
+
+    def _cache_set(self, key: str, value: str, ttl: int):
+        try:
+            self.redis.set(key, value, ex=ttl)
+        except Exception as e:
+            print(f"Redis caching error (continuing anyway): {e}")
+
+    def _invalidate_user(self, user_id: str, *emails: Optional[str]):
+        """Drop the cached entries of a single user after a write"""
+        self.principal_cache.invalidate(user_id)
+        keys = [self._user_key(user_id)] + [self._email_key(email) for email in emails if email]
+        try:
+            self.redis.delete(*keys)
+        except Exception as e:
+            print(f"Redis cache clear error (continuing anyway): {e}")
 
     def _clear_users_cache(self):
         """Clear all users cache"""
@@ -129,9 +290,17 @@ class UserService:
         return [UserDTO(**user) for user in users]
 
     def get_user_by_email(self, email: str) -> Optional[UserDetailDTO]:
-        """Get a user by email"""
+        """Get a user by email (the email entry caches the user id)"""
+        key = self._email_key(email)
+        cached = self._cache_get(key)
+        if cached == MISSING:
+            return None
+        if cached:
+            return self.get_user_by_id(cached)
+
         user = self.user_repository.get_user_by_email(email)
         if user:
+            self._cache_set(key, user['id'], settings.USER_CACHE_TTL)
             return self.map_user_to_detail_dto(user)
+        self._cache_set(key, MISSING, settings.USER_NEGATIVE_CACHE_TTL)
         return None
-
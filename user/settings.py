@@ -28,10 +28,39 @@ class Settings(BaseSettings):
     # Default pagination settings
     DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "10"))
     MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    MAX_USER_BATCH_SIZE: int = int(os.getenv("MAX_USER_BATCH_SIZE", "100"))
+
+    # Directory export (pages per feed range, ranges read in parallel)
+    EXPORT_PAGE_SIZE: int = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+    EXPORT_PARALLELISM: int = int(os.getenv("EXPORT_PARALLELISM", "4"))
     
     # Cache settings
     USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", "300"))  # 5 minutes
+    USER_NEGATIVE_CACHE_TTL: int = int(os.getenv("USER_NEGATIVE_CACHE_TTL", "30"))
+
+    # Principal cache used by get_current_user
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    PRINCIPAL_CACHE_LOCAL_TTL: int = int(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL", "5"))
+    PRINCIPAL_CACHE_NEGATIVE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_NEGATIVE_TTL", "10"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
     
+    # User lifecycle events consumed by core, ecommerce and authentication
+    USER_DELETED_STREAM: str = os.getenv("USER_DELETED_STREAM", "events:user-deleted")
+    USER_DELETED_STREAM_MAXLEN: int = int(os.getenv("USER_DELETED_STREAM_MAXLEN", "100000"))
+    USER_DELETION_PROGRESS_TTL: int = int(os.getenv("USER_DELETION_PROGRESS_TTL", str(7 * 24 * 3600)))
+    # Outbox relay for deletions whose event could not be published right away
+    USER_DELETION_RELAY_INTERVAL: int = int(os.getenv("USER_DELETION_RELAY_INTERVAL", "30"))
+    USER_DELETION_RELAY_GRACE_SECONDS: int = int(os.getenv("USER_DELETION_RELAY_GRACE_SECONDS", "60"))
+    USER_DELETION_RELAY_BATCH_SIZE: int = int(os.getenv("USER_DELETION_RELAY_BATCH_SIZE", "100"))
+
+    # Password hashing (calibrated with the authentication service's `cli.py calibrate-hash`)
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+
+    # File uploads (stored under content-hash names)
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", os.path.join(os.getcwd(), "static", "files"))
+    MAX_UPLOAD_SIZE_MB: int = int(os.getenv("MAX_UPLOAD_SIZE_MB", "10"))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+
     # Password requirements
     MIN_PASSWORD_LENGTH: int = int(os.getenv("MIN_PASSWORD_LENGTH", "8"))
     MAX_PASSWORD_LENGTH: int = int(os.getenv("MAX_PASSWORD_LENGTH", "128"))
@@ -46,6 +75,13 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+    # Access token revocation (filter published by the authentication service)
+    REVOCATION_CHANNEL: str = os.getenv("REVOCATION_CHANNEL", "auth:revocations")
+    REVOCATION_SNAPSHOT_KEY: str = os.getenv("REVOCATION_SNAPSHOT_KEY", "revoked:bloom")
+    # Sizing of the local filter built when the published snapshot is outdated
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
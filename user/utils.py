@@ -1,10 +1,13 @@
+import hashlib
 import os
+import re
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
 import uuid
 from dotenv import load_dotenv
 from passlib.context import CryptContext
-from fastapi import HTTPException, Depends, UploadFile
+from fastapi import HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import APIKeyHeader
 from jose import JWTError, jwt
 from settings import settings
@@ -15,7 +18,13 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 api_key_scheme = APIKeyHeader(name="Authorization")
 
 credentials_exception = HTTPException(
@@ -28,6 +37,10 @@ def hash_password(password: str) -> str:
     return pwd.hash(password)
 
 
+def hash_params() -> dict:
+    return {"scheme": "bcrypt", "rounds": settings.PASSWORD_HASH_ROUNDS}
+
+
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd.verify(plain, hashed)
 
@@ -40,25 +53,37 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def decode_token(token: str) -> str:
+def decode_payload(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        return user_id
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise credentials_exception
 
 
+def decode_token(token: str) -> str:
+    user_id: str = decode_payload(token).get("sub")
+    if user_id is None:
+        raise credentials_exception
+    return user_id
+
+
 async def get_current_user(token: str = Depends(api_key_scheme)):
     token = token.replace("Bearer ", "")
-    user_id = decode_token(token)
-    
-    from repositories.user_repository import UserRepository
-    user_repo = UserRepository()
-    user = user_repo.get_user_by_id(user_id)
-    if not user:
+    payload = decode_payload(token)
+
+    from services.revocation_listener import get_revocation_listener
+    if get_revocation_listener().is_revoked(payload.get("jti")):
+        raise credentials_exception
+
+    # Tokens from the authentication service carry {"id", "role"} as the subject
+    subject = payload.get("sub")
+    user_id = subject.get("id") if isinstance(subject, dict) else subject
+    if user_id is None:
+        raise credentials_exception
+
+    from services.principal_cache import get_principal_cache
+    user = get_principal_cache().get(user_id)
+    if not user or not user.get("is_active", True):
         raise credentials_exception
     return user
 
@@ -76,13 +101,46 @@ def require_owner_or_role(user: dict, roles: list, owner_id: str):
     raise HTTPException(status_code=403, detail="Forbidden")
 
 
-async def save_file(file: UploadFile) -> str:
-    upload_dir = os.path.join(os.getcwd(), "static", "files")
+# ASCII letters and digits only, as accepted by FILENAME_PATTERN in routes/file_route.py
+UPLOAD_EXTENSION_PATTERN = re.compile(r"^\.[0-9a-z]{1,15}$")
+
+
+async def save_file(chunks: AsyncIterator[bytes], original_name: Optional[str] = None) -> str:
+    """Stream an upload to disk under its SHA-256 name; identical content is stored once.
+
+    `chunks` is the raw request body, so the size limit is enforced while it
+    arrives instead of after the whole upload has been buffered.
+    """
+    upload_dir = settings.UPLOAD_DIR
     os.makedirs(upload_dir, exist_ok=True)
-    filename = f"{uuid.uuid4()}-{file.filename}"
+    extension = os.path.splitext(original_name or "")[1].lower()
+    if not UPLOAD_EXTENSION_PATTERN.match(extension):
+        extension = ""
+    max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+
+    temp_path = os.path.join(upload_dir, f".upload-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    size = 0
+    handle = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+            digest.update(chunk)
+            await run_in_threadpool(handle.write, chunk)
+    except BaseException:
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(os.remove, temp_path)
+        raise
+    await run_in_threadpool(handle.close)
+
+    filename = f"{digest.hexdigest()}{extension}"
     file_path = os.path.join(upload_dir, filename)
-    await file.seek(0)
-    data = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(data)
+    if os.path.exists(file_path):
+        await run_in_threadpool(os.remove, temp_path)
+    else:
+        await run_in_threadpool(os.replace, temp_path, file_path)
     return filename